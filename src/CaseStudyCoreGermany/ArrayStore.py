@@ -0,0 +1,161 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from Cubes import to_cube
+from Prices import PRICE_CUBE_FILE, load_price_cube
+
+RUN_ARRAYS = "arrays"
+
+# Hourly result tables of a run folder: name -> (file, dims, value column)
+TABLES = {
+    "s": ("s_vals.csv", ["st", "n", "h", "td"], "val"),
+    "e": ("e_vals.csv", ["pt", "n", "h", "td"], "val"),
+    "d": ("d_vals.csv", ["ct", "n", "h", "td"], "val"),
+    "storage_in": ("storage_in.csv", ["j", "l", "n", "h", "td"], "val"),
+    "storage_out": ("storage_out.csv", ["j", "l", "n", "h", "td"], "val"),
+    "storage_level_daily": ("storage_level_daily.csv", ["j", "n", "h", "td"], "val"),
+    "storage_level": ("storage_level_seasonal.csv", ["j", "n", "t"], "val"),
+}
+
+# -------------------------------------------------------------
+# Labeled arrays on disk: <name>.bin (raw, C order) + <name>.json (dtype, shape, dims, coords)
+# -------------------------------------------------------------
+class LabeledArray:
+    def __init__(self, data, dims, coords):
+        self.data = data      # np.memmap when opened from disk
+        self.dims = dims
+        self.coords = coords  # dim -> list of labels, for every dim that has labels
+
+    def index(self, dim, label):
+        return self.coords[dim].index(label)
+
+    def sel(self, **labels):
+        """Slice by label (dim=label); unselected dims are kept. Reads only the selected pages."""
+        idx = []
+        for d in self.dims:
+            if d in labels:
+                lab = labels.pop(d)
+                idx.append(lab if d not in self.coords else self.index(d, lab))
+            else:
+                idx.append(slice(None))
+        if labels:
+            raise KeyError(f"Unknown dimensions: {', '.join(labels)}")
+        return np.asarray(self.data[tuple(idx)])
+
+
+def _labels(values):
+    return [v.item() if isinstance(v, np.generic) else v for v in values]
+
+
+def _tmp(path):
+    return f"{path}.{os.getpid()}.tmp"
+
+
+def _write_header(base, dtype, shape, dims, coords):
+    header = {
+        "dtype": np.dtype(dtype).str, "shape": list(shape), "dims": list(dims),
+        "coords": {d: _labels(c) for d, c in coords.items()},
+    }
+    with open(_tmp(base + ".json"), "w") as f:
+        json.dump(header, f)
+    os.replace(_tmp(base + ".json"), base + ".json")
+
+
+def create_array(base, shape, dims, coords, dtype="float64", fill=np.nan):
+    """Writable memory-mapped array, e.g. to fill a large cross-run stack one run at a time."""
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    data = np.memmap(base + ".bin", dtype=dtype, mode="w+", shape=tuple(shape))
+    data[...] = fill
+    _write_header(base, dtype, shape, dims, coords)
+    return LabeledArray(data, list(dims), coords)
+
+
+def save_array(base, values, dims, coords):
+    """Written to temporary files and moved in place, data before header: a reader running at the same
+    time (e.g. parallel plotting workers building the same run array) never maps a partial file."""
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    values = np.ascontiguousarray(values)
+    values.tofile(_tmp(base + ".bin"))
+    os.replace(_tmp(base + ".bin"), base + ".bin")
+    _write_header(base, values.dtype, values.shape, dims, coords)
+
+
+def array_exists(base):
+    return os.path.exists(base + ".json") and os.path.exists(base + ".bin")
+
+
+def open_array(base, mode="r"):
+    with open(base + ".json", "r") as f:
+        header = json.load(f)
+    shape = tuple(header["shape"])
+    if 0 in shape:
+        data = np.zeros(shape, dtype=header["dtype"])  # np.memmap cannot map empty files
+    else:
+        data = np.memmap(base + ".bin", dtype=header["dtype"], mode=mode, shape=shape)
+    return LabeledArray(data, header["dims"], header["coords"])
+
+# -------------------------------------------------------------
+# Arrays of a run folder, converted from the CSV tables on first use
+# -------------------------------------------------------------
+def _from_table(data_dir, name):
+    fname, dims, value = TABLES[name]
+    df = pd.read_csv(os.path.join(data_dir, fname))
+    cube, coords = to_cube(df, dims, value)
+    return cube, dims, coords
+
+
+def _from_price(data_dir, name):
+    cube = load_price_cube(data_dir)
+    coords = {"l": cube.layers, "n": cube.nodes, "h": cube.hours, "td": cube.typical_days}
+    if name == "weight":
+        return cube.weight, ["h", "td"], {"h": cube.hours, "td": cube.typical_days}
+    return cube.eur_per_mwh, ["l", "n", "h", "td"], coords
+
+
+BUILDERS = {name: _from_table for name in TABLES}
+BUILDERS.update({"price": _from_price, "weight": _from_price})
+
+
+def _stale(data_dir, name, base):
+    fname = TABLES[name][0] if name in TABLES else PRICE_CUBE_FILE
+    source = os.path.join(data_dir, fname)
+    return os.path.exists(source) and os.path.getmtime(source) > os.path.getmtime(base + ".json")
+
+
+def run_array(data_dir, name):
+    """Memory-mapped result array ``name`` of a run (s, e, d, storage levels, price [€/MWh], weight),
+    converted from the run's tables on first use and again whenever they are newer."""
+    base = os.path.join(data_dir, RUN_ARRAYS, name)
+    if not array_exists(base) or _stale(data_dir, name, base):
+        values, dims, coords = BUILDERS[name](data_dir, name)
+        save_array(base, values, dims, coords)
+    return open_array(base)
+
+
+def run_array_available(data_dir, name):
+    if array_exists(os.path.join(data_dir, RUN_ARRAYS, name)):
+        return True
+    if name in TABLES:
+        return os.path.exists(os.path.join(data_dir, TABLES[name][0]))
+    # price / weight: any of the sources load_price_cube reads
+    return any(os.path.exists(os.path.join(data_dir, f)) for f in [PRICE_CUBE_FILE, "price.csv", "dual_vals.csv"])
+
+
+def stack_arrays(base, arrays):
+    """[run, ...] memory-mapped stack of LabeledArrays (None for runs without the array),
+    over the union of their labels; filled one run at a time, NaN where missing."""
+    present = [a for a in arrays if a is not None]
+    dims = present[0].dims
+    coords = {d: sorted(set().union(*(a.coords[d] for a in present))) for d in dims}
+    shape = [len(arrays)] + [len(coords[d]) for d in dims]
+    out = create_array(base, shape, ["run"] + dims, coords)
+    for i, a in enumerate(arrays):
+        if a is None:
+            continue
+        pos = [pd.Index(coords[d]).get_indexer(a.coords[d]) for d in dims]
+        out.data[i][np.ix_(*pos)] = a.data
+    out.data.flush()
+    return open_array(base)
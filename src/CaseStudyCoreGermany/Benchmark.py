@@ -0,0 +1,180 @@
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------
+# Model variants: AMPL statements applied to CaseStudy_Math.mod around reading the data
+# -------------------------------------------------------------
+# Annual totals as they were written before: 8760-term sums over PERIODS, collapsed by AMPL onto (h, td).
+# PERIOD_SUMS_ROWS keeps the production rows of the current model, so its instance is comparable with "current"
+PERIOD_SUMS_ROWS = """
+redeclare param total_time := sum {t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (t_op[h,td]);
+redeclare subject to resource_availability {i in RESOURCES}:
+    sum {n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (g[i,n,h,td] * t_op[h,td]) <= avail[i];
+redeclare subject to production_year_calc {p in PROCESSORS}:
+    row_scale["production_year_calc"] * Production_year[p]
+        = row_scale["production_year_calc"] * sum {n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (e[p,n,h,td] * t_op[h,td]);
+redeclare subject to operation_cost_calc {i in RESOURCES}:
+    row_scale["operation_cost_calc"] * C_op[i]
+        = row_scale["operation_cost_calc"] * sum {n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (c_op[i] * g[i,n,h,td] * t_op[h,td]);
+redeclare subject to gwp_op_calc {i in RESOURCES}:
+    row_scale["gwp_op_calc"] * GWP_op[i]
+        = row_scale["gwp_op_calc"] * sum {n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (gwp_op[i] * g[i,n,h,td] * t_op[h,td]);
+"""
+# ... and as the share constraints were written before, on 8760-term sums without the production rows
+PERIOD_SUMS = PERIOD_SUMS_ROWS + """
+redeclare subject to process_capacity_factor {p in PROCESSORS}:
+    sum {n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (e[p,n,h,td] * t_op[h,td]) <= F[p] * c_p[p] * total_time;
+redeclare subject to f_min_perc {eut in END_USES_TYPES, j in TECHNOLOGIES_OF_END_USES_TYPE[eut]}:
+    sum {n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (e[j,n,h,td] * t_op[h,td]) >= fmin_perc[j] * sum {j2 in TECHNOLOGIES_OF_END_USES_TYPE[eut], n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (e[j2,n,h,td] * t_op[h,td]);
+redeclare subject to f_max_perc {eut in END_USES_TYPES, j in TECHNOLOGIES_OF_END_USES_TYPE[eut]}:
+    sum {n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (e[j,n,h,td] * t_op[h,td]) <= fmax_perc[j] * sum {j2 in TECHNOLOGIES_OF_END_USES_TYPE[eut], n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (e[j2,n,h,td] * t_op[h,td]);
+drop production_year_calc; drop production_eut_calc;
+"""
+
+# f_min_perc / f_max_perc with the end-use total re-summed for every technology (quadratic in nonzeros)
+PERC_RESUMS = """
+redeclare subject to process_capacity_factor {p in PROCESSORS}:
+    sum {n in NODES, h in HOURS, td in TYPICAL_DAYS} (w[h,td] * t_op[h,td] * e[p,n,h,td]) <= F[p] * c_p[p] * total_time;
+redeclare subject to f_min_perc {eut in END_USES_TYPES, j in TECHNOLOGIES_OF_END_USES_TYPE[eut]}:
+    sum {n in NODES, h in HOURS, td in TYPICAL_DAYS} (w[h,td] * t_op[h,td] * e[j,n,h,td]) >= fmin_perc[j] * sum {j2 in TECHNOLOGIES_OF_END_USES_TYPE[eut], n in NODES, h in HOURS, td in TYPICAL_DAYS} (w[h,td] * t_op[h,td] * e[j2,n,h,td]);
+redeclare subject to f_max_perc {eut in END_USES_TYPES, j in TECHNOLOGIES_OF_END_USES_TYPE[eut]}:
+    sum {n in NODES, h in HOURS, td in TYPICAL_DAYS} (w[h,td] * t_op[h,td] * e[j,n,h,td]) <= fmax_perc[j] * sum {j2 in TECHNOLOGIES_OF_END_USES_TYPE[eut], n in NODES, h in HOURS, td in TYPICAL_DAYS} (w[h,td] * t_op[h,td] * e[j2,n,h,td]);
+drop production_year_calc; drop production_eut_calc;
+"""
+
+# Time index as it was derived before: 8760 T_H_TD tuples read from CaseStudyPeriods.dat and
+# per-period / per-(h, td) set scans over them
+SET_SCANS = """
+redeclare set T_H_TD within {PERIODS, HOURS, TYPICAL_DAYS};
+redeclare set HOUR_OF_PERIOD {t in PERIODS} := setof {h in HOURS, td in TYPICAL_DAYS: (t,h,td) in T_H_TD} h;
+redeclare set TYPICAL_DAY_OF_PERIOD {t in PERIODS} := setof {h in HOURS, td in TYPICAL_DAYS: (t,h,td) in T_H_TD} td;
+redeclare param w {h in HOURS, td in TYPICAL_DAYS} := card {t in PERIODS: (t,h,td) in T_H_TD};
+"""
+SCAN_DATA = ["CaseStudy_Math.dat", "CaseStudyPeriods.dat", "CaseStudyTimeSeries.dat"]
+
+# name -> (statements before reading the data, statements after, data files; None: CaseStudy.DATA_FILES)
+VARIANTS = {
+    "original": (SET_SCANS, PERIOD_SUMS, SCAN_DATA),
+    "original_rows": (SET_SCANS, PERIOD_SUMS_ROWS, SCAN_DATA),
+    "period_sums": ("", PERIOD_SUMS, None),
+    "set_scans": (SET_SCANS, "", SCAN_DATA),
+    "perc_resums": ("", PERC_RESUMS, None),
+    "current": ("", "", None),
+}
+
+
+def has_production_rows(variant):
+    """Whether the instance of ``variant`` has the production_year_calc / production_eut_calc rows."""
+    return "drop production_year_calc" not in VARIANTS[variant][1]
+
+# -------------------------------------------------------------
+# Timing
+# -------------------------------------------------------------
+def _generate(variant, stub, backend=None):
+    """Fresh model of ``variant``: (load time, generation time) [s] and, if ``backend`` is given, the optimal
+    SocialWelfare; the instance is written to ``stub``.nl. AMPL evaluates defined sets and parameters
+    on first use, so their cost shows up in the generation time."""
+    from amplpy import AMPL
+    from CaseStudy import DATA_FILES, MODEL_FILE, script_dir
+
+    before, after, data = VARIANTS[variant]
+    start = time.time()
+    ampl = AMPL()
+    ampl.read(os.path.join(script_dir, MODEL_FILE))
+    if before:
+        ampl.eval(before)
+    for name in data or DATA_FILES:
+        ampl.read_data(os.path.join(script_dir, name))
+    if after:
+        ampl.eval(after)
+    ampl.eval("objective SocialWelfare;")
+    loaded = time.time()
+    ampl.eval(f"write g{stub};")  # generates every set, parameter, constraint and objective instance
+    generated = time.time()
+    welfare = np.nan
+    if backend:
+        import Solvers
+        if Solvers.solve(ampl, backend, Solvers.SolverOptions(verbose=False)).ok:
+            welfare = ampl.get_objective("SocialWelfare").value()
+    ampl.close()
+    return loaded - start, generated - loaded, welfare
+
+
+def _numbers(line):
+    return [float(x) for x in re.findall(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?", line)]
+
+
+def nl_size(path):
+    """Variables, constraints and Jacobian nonzeros from the header of a .nl file."""
+    with open(path, "r") as f:
+        header = [next(f) for _ in range(10)]
+    sizes = {}
+    for line in header:
+        numbers = line.split("#")[0].split()
+        if "vars, constraints" in line:
+            sizes["vars"], sizes["cons"] = int(numbers[0]), int(numbers[1])
+        elif "nonzeros in Jacobian" in line:
+            sizes["nonzeros"] = int(numbers[0])
+    return sizes
+
+
+def compare_nl(path_a, path_b, rtol=1e-12):
+    """Number of lines of two .nl files that differ beyond ``rtol`` (reordered float sums
+    may change the last bits of a coefficient), and the largest relative difference."""
+    with open(path_a, "r") as fa, open(path_b, "r") as fb:
+        a, b = fa.read().splitlines(), fb.read().splitlines()
+    if len(a) != len(b):
+        return max(len(a), len(b)), np.inf
+    differing, worst = 0, 0.0
+    for la, lb in zip(a, b):
+        if la == lb:
+            continue
+        na, nb = np.array(_numbers(la)), np.array(_numbers(lb))
+        if na.shape != nb.shape or re.sub(r"[-+.\deE]", "", la) != re.sub(r"[-+.\deE]", "", lb):
+            differing += 1
+            worst = np.inf
+            continue
+        rel = np.abs(na - nb) / np.maximum(np.maximum(np.abs(na), np.abs(nb)), 1e-300)
+        worst = max(worst, rel.max())
+        differing += int(rel.max() > rtol)
+    return differing, worst
+
+
+def benchmark(variants=("original", "original_rows", "current"), repeat=3, backend=None):
+    """Median load and generation times of each variant, its size, and whether the generated instances
+    match; with ``backend`` also the optimal SocialWelfare of each variant. Times are relative to the first
+    variant; instances are compared with the first variant that has the same rows (with or without the
+    production rows), instances with different rows only through SocialWelfare."""
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for variant in variants:
+            stub = os.path.join(tmp, variant)
+            times = [_generate(variant, stub, backend if i == 0 else None) for i in range(repeat)]
+            load, gen = np.median([t[:2] for t in times], axis=0)
+            rows.append({"variant": variant, "load_s": load, "generate_s": gen, "total_s": load + gen,
+                         **nl_size(stub + ".nl"), "SocialWelfare": times[0][2]})
+
+        for row in rows:
+            reference = next(v for v in variants if has_production_rows(v) == has_production_rows(row["variant"]))
+            differing, worst = compare_nl(os.path.join(tmp, reference + ".nl"), os.path.join(tmp, row["variant"] + ".nl"))
+            row["reference"], row["differing_lines"], row["max_rel_diff"] = reference, differing, worst
+
+    df = pd.DataFrame(rows)
+    df["speedup"] = df["total_s"].iloc[0] / df["total_s"]
+    return df
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load and generation time of model variants; the first is the reference.")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS), default=["original", "original_rows", "current"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--solve", default=None, metavar="BACKEND", help="also solve each variant once and compare SocialWelfare")
+    args = parser.parse_args()
+    print(benchmark(args.variants, args.repeat, args.solve).to_string(index=False))
@@ -0,0 +1,104 @@
+### Chronological dispatch with fixed capacities ###
+# Read after CaseStudy_Math.mod and solved as problem Dispatch by Dispatch.py: the operation of one
+# window of consecutive periods, each with the profiles of its (h, td) pair in T_H_TD
+
+# Window
+param window_start integer >= 1 default 1;
+param window_length integer >= 1 default 192; # [h]
+param window_end := min(window_start + window_length - 1, card(PERIODS));
+set WINDOW := window_start .. window_end;
+param h_of {t in PERIODS} := (t - 1) mod 24 + 1; # hour of period t, as in HOUR_OF_PERIOD
+param td_of {t in PERIODS} := TD_OF_DAYS[(t - 1) div 24 + 1]; # typical day of period t, as in TYPICAL_DAY_OF_PERIOD
+param window_share := sum {t in WINDOW} t_op[h_of[t],td_of[t]] / total_time; # [], share of the annual limits
+
+# Fixed design and storage state
+param F_fix {TECHNOLOGIES} >= 0 default 0; # [GW], storage [GWh], capacities of the typical-day solution
+param level_start {STORAGE_TECH, NODES} >= 0 default 0; # [GWh], storage level before the first period of the window
+param level_target {STORAGE_TECH, NODES} >= 0 default 0; # [GWh], minimum level after the last period of the window
+
+### Variables ###
+var d_seg_ch {SEGMENTS, CONSUMERS, NODES, WINDOW} >= 0; # [GW]
+var d_ch {CONSUMERS, NODES, WINDOW} >= 0; # [GW]
+var g_ch {SUPPLIERS, NODES, WINDOW} >= 0; # [GW]
+var e_ch {PROCESSORS, NODES, WINDOW} >= 0; # [GW]
+var Storage_in_ch {STORAGE_TECH, LAYERS, NODES, WINDOW} >= 0; # [GW]
+var Storage_out_ch {STORAGE_TECH, LAYERS, NODES, WINDOW} >= 0; # [GW]
+var Storage_level_ch {STORAGE_TECH, NODES, WINDOW} >= 0; # [GWh]
+var Import_constant_ch {RES_IMPORT_CONSTANT} >= 0; # [GWh]
+var Level_shortfall {STORAGE_TECH, NODES} >= 0; # [GWh], level missing on level_target, priced at VOLL
+
+### Constraints ###
+# Consumers
+subject to satisfy_demand_ch {c in CONSUMERS, n in NODES, t in WINDOW}:
+    fix_demand * d_ch[c,n,t] = fix_demand * d_ref[c,n,h_of[t],td_of[t]];
+
+subject to seg_bounds_ch {k in SEGMENTS, c in CONSUMERS, n in NODES, t in WINDOW}:
+    d_seg_ch[k,c,n,t] <= D[k,c,n,h_of[t],td_of[t]];
+
+subject to demand_partition_ch {c in CONSUMERS, n in NODES, t in WINDOW}:
+    sum {k in SEGMENTS} d_seg_ch[k,c,n,t] = d_ch[c,n,t];
+
+# Resources (annual limits pro rata)
+subject to resource_availability_ch {i in RESOURCES}:
+    sum {n in NODES, t in WINDOW} (t_op[h_of[t],td_of[t]] * g_ch[i,n,t]) <= avail[i] * window_share;
+
+subject to resource_constant_import_ch {i in RES_IMPORT_CONSTANT, t in WINDOW}:
+    sum {n in NODES} g_ch[i,n,t] * t_op[h_of[t],td_of[t]] = Import_constant_ch[i];
+
+# Emission cap of the run, pro rata like the resource limits; dropped by presolve without a cap
+subject to emission_cap_ch:
+    sum {s in SUPPLIERS, n in NODES, t in WINDOW} (gwp_op[s] * t_op[h_of[t],td_of[t]] * g_ch[s,n,t])
+        <= (if use_epsilon = 1 then epsilon_value * window_share else Infinity);
+
+# Processors
+subject to process_capacity_factor_t_ch {p in PROCESSORS, t in WINDOW}:
+    sum {n in NODES} e_ch[p,n,t] <= F_fix[p] * c_p_t[p,h_of[t],td_of[t]];
+
+subject to process_capacity_factor_ch {p in PROCESSORS}:
+    sum {n in NODES, t in WINDOW} (t_op[h_of[t],td_of[t]] * e_ch[p,n,t]) <= F_fix[p] * c_p[p] * total_time * window_share;
+
+# Storage
+subject to storage_level_ch {j in STORAGE_TECH, n in NODES, t in WINDOW}:
+    Storage_level_ch[j,n,t] = (if t = window_start then level_start[j,n] else Storage_level_ch[j,n,t-1]) * (1.0 - storage_losses[j])
+        + t_op[h_of[t],td_of[t]] * (  (sum {l in LAYERS: storage_eff_in[j,l] > 0} (Storage_in_ch[j,l,n,t] * storage_eff_in[j,l]))
+                                    - (sum {l in LAYERS: storage_eff_out[j,l] > 0} (Storage_out_ch[j,l,n,t] / storage_eff_out[j,l])));
+
+subject to storage_capacity_ch {j in STORAGE_TECH, n in NODES, t in WINDOW}:
+    Storage_level_ch[j,n,t] <= F_fix[j];
+
+subject to storage_end_level_ch {j in STORAGE_TECH, n in NODES}:
+    Storage_level_ch[j,n,window_end] + Level_shortfall[j,n] >= level_target[j,n];
+
+subject to storage_layer_in_ch {j in STORAGE_TECH, l in LAYERS, n in NODES, t in WINDOW}:
+    Storage_in_ch[j,l,n,t] * (ceil (storage_eff_in[j,l]) - 1) = 0;
+subject to storage_layer_out_ch {j in STORAGE_TECH, l in LAYERS, n in NODES, t in WINDOW}:
+    Storage_out_ch[j,l,n,t] * (ceil (storage_eff_out[j,l]) - 1) = 0;
+
+subject to limit_energy_to_power_ratio_ch {j in STORAGE_TECH, l in LAYERS, n in NODES, t in WINDOW}:
+    Storage_in_ch[j,l,n,t] * storage_charge_time[j] + Storage_out_ch[j,l,n,t] * storage_discharge_time[j] <= F_fix[j] * storage_availability[j];
+
+# Balance
+subject to balance_ch {l in LAYERS, n in NODES, t in WINDOW}:
+    sum {c in CONSUMERS: c = l} d_ch[c,n,t]
+    + sum {p in PROCESSORS: layers_in_out[p,l] < 0} (-layers_in_out[p,l]) * e_ch[p,n,t]
+    + sum {sto in STORAGES} Storage_in_ch[sto,l,n,t]
+  =
+    sum {s in SUPPLIERS} layers_in_out[s,l] * g_ch[s,n,t]
+    + sum {p in PROCESSORS: layers_in_out[p,l] > 0} layers_in_out[p,l] * e_ch[p,n,t]
+    + sum {sto in STORAGES} Storage_out_ch[sto,l,n,t];
+
+### Objective [M€/window] ###
+maximize DispatchWelfare:
+    sum {n in NODES, t in WINDOW}
+        ((sum {c in CONSUMERS, k in SEGMENTS}
+            (if stepwise_bids = 1 then a_step[k,c,n,h_of[t],td_of[t]] * d_seg_ch[k,c,n,t]
+             else a[k,c,n,h_of[t],td_of[t]] * d_seg_ch[k,c,n,t] - 0.5 * b[k,c,n,h_of[t],td_of[t]] * (d_seg_ch[k,c,n,t])^2)
+          - sum {s in SUPPLIERS} (c_op[s] + carbon_price * gwp_op[s]) * g_ch[s,n,t]) * t_op[h_of[t],td_of[t]])
+  - VOLL * sum {j in STORAGE_TECH, n in NODES} Level_shortfall[j,n];
+
+problem Dispatch:
+    d_seg_ch, d_ch, g_ch, e_ch, Storage_in_ch, Storage_out_ch, Storage_level_ch, Import_constant_ch, Level_shortfall,
+    satisfy_demand_ch, seg_bounds_ch, demand_partition_ch, resource_availability_ch, resource_constant_import_ch, emission_cap_ch,
+    process_capacity_factor_t_ch, process_capacity_factor_ch, storage_level_ch, storage_capacity_ch, storage_end_level_ch,
+    storage_layer_in_ch, storage_layer_out_ch, limit_energy_to_power_ratio_ch, balance_ch,
+    DispatchWelfare;
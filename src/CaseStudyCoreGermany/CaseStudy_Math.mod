@@ -6,9 +6,11 @@ set NODES;
 set PERIODS := 1 .. 8760;
 set HOURS := 1..24;
 set TYPICAL_DAYS:= 1 .. 12;
-set T_H_TD within {PERIODS, HOURS, TYPICAL_DAYS};
-set HOUR_OF_PERIOD {t in PERIODS} := setof {h in HOURS, td in TYPICAL_DAYS: (t,h,td) in T_H_TD} h;
-set TYPICAL_DAY_OF_PERIOD {t in PERIODS} := setof {h in HOURS, td in TYPICAL_DAYS: (t,h,td) in T_H_TD} td;
+set DAYS := 1 .. 365;
+param TD_OF_DAYS {DAYS} in TYPICAL_DAYS; # typical day of each calendar day, CaseStudyDays.dat (generated by Chronology.py)
+set HOUR_OF_PERIOD {t in PERIODS} := {(t - 1) mod 24 + 1};
+set TYPICAL_DAY_OF_PERIOD {t in PERIODS} := {TD_OF_DAYS[(t - 1) div 24 + 1]};
+set T_H_TD within {PERIODS, HOURS, TYPICAL_DAYS} := setof {t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (t,h,td);
 
 # Sectors
 set SECTORS;
@@ -48,9 +50,10 @@ set LAYERS := RESOURCES union END_USES_TYPES;
 
 ### Parameters ###
 # Time
-param w {h in HOURS, td in TYPICAL_DAYS} := card {t in PERIODS: (t,h,td) in T_H_TD}; # [1/year], yearly weight of each hour and typical day pair
+param w {h in HOURS, td in TYPICAL_DAYS} >= 0; # [1/year], yearly weight of each hour and typical day pair, CaseStudyDays.dat
+check: sum {h in HOURS, td in TYPICAL_DAYS} w[h,td] = card(PERIODS);
 param t_op {HOURS, TYPICAL_DAYS} default 1; # [h]
-param total_time := sum {t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (t_op[h,td]); # [h/year]
+param total_time := sum {h in HOURS, td in TYPICAL_DAYS} (w[h,td] * t_op[h,td]); # [h/year]
 param i_rate > 0; # []
 
 # Time series
@@ -109,6 +112,9 @@ param b {k in SEGMENTS, c in CONSUMERS, n in NODES, h in HOURS, td in TYPICAL_DA
     (p_pwl[k-1,c,n,h,td] - p_pwl[k,c,n,h,td]) / D[k,c,n,h,td];
 param a {k in SEGMENTS, c in CONSUMERS, n in NODES, h in HOURS, td in TYPICAL_DAYS} := # [M€/GWh=€/kWh], segment intercept
     p_pwl[k-1,c,n,h,td];
+param stepwise_bids default 0; # [], 1: each segment is a flat bid block at its average price, the model is an LP
+param a_step {k in SEGMENTS, c in CONSUMERS, n in NODES, h in HOURS, td in TYPICAL_DAYS} := # [M€/GWh=€/kWh], block bid price
+    0.5 * (p_pwl[k-1,c,n,h,td] + p_pwl[k,c,n,h,td]);
 
 # Resources
 param avail {RESOURCES} >= 0; # [GWh/year]
@@ -144,6 +150,12 @@ param c_grid_extra >= 0; # [M€/GW]
 # Emissions
 param use_epsilon; # [], flag to use epsilon constraint if set to 1
 param epsilon_value; # [ktCO2-eq./year], maximum allowed GWP when using epsilon constraint
+param carbon_price >= 0 default 0; # [M€/ktCO2-eq.], charge on TotalGWP in SocialWelfare, the parametric alternative to the cap
+
+# Numerics
+set SCALED_ROWS := {"production_year_calc", "production_eut_calc", "total_cost_cal", "investment_cost_calc",
+    "maintenance_cost_calc", "operation_cost_calc", "totalGWP_calc", "gwp_constr_calc", "gwp_op_calc"};
+param row_scale {SCALED_ROWS} > 0 default 1; # [], factor on both sides of definitional rows whose duals are not exported (Scaling.py)
 
 ### Variables ###
 # Independent
@@ -164,6 +176,8 @@ var Storage_level_daily {STORAGE_DAILY, NODES, HOURS, TYPICAL_DAYS} >= 0; # [GWh
 var d_diff {CONSUMERS, NODES, HOURS, TYPICAL_DAYS}; # [GW], difference between actual and reference demand
 var Network_losses {END_USES_TYPES, HOURS, TYPICAL_DAYS} >= 0; # [GW]
 var Import_constant {RES_IMPORT_CONSTANT} >= 0; # [GWh]
+var Production_year {PROCESSORS} >= 0; # [GWh/year], annual production of each processor
+var Production_eut {END_USES_TYPES} >= 0; # [GWh/year], annual production of the technologies of each end-use type
 var TotalCost >= 0; # [M€/year]
 var C_inv {TECHNOLOGIES} >= 0; # [M€]
 var C_maint {TECHNOLOGIES} >= 0; # [M€/year]
@@ -192,9 +206,9 @@ subject to network_losses {eut in END_USES_TYPES, h in HOURS, td in TYPICAL_DAYS
         + sum {n in NODES, p in PROCESSORS: layers_in_out[p,eut] > 0} (layers_in_out[p,eut] * e[p,n,h,td]))
         * loss_network[eut];
 
-# Resources
+# Resources (annual totals as w-weighted sums over the typical days, not 8760-term sums over PERIODS)
 subject to resource_availability {i in RESOURCES}:
-    sum {n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (g[i,n,h,td] * t_op[h,td]) <= avail[i];
+    sum {n in NODES, h in HOURS, td in TYPICAL_DAYS} (w[h,td] * t_op[h,td] * g[i,n,h,td]) <= avail[i];
 
 subject to resource_constant_import {i in RES_IMPORT_CONSTANT, h in HOURS, td in TYPICAL_DAYS}:
 	sum {n in NODES} g[i,n,h,td] * t_op[h,td] = Import_constant[i];
@@ -207,13 +221,22 @@ subject to size_limit {j in TECHNOLOGIES}:
 subject to process_capacity_factor_t {p in PROCESSORS, h in HOURS, td in TYPICAL_DAYS}:
     sum {n in NODES} e[p,n,h,td] <= F[p] * c_p_t[p,h,td];
 
+subject to production_year_calc {p in PROCESSORS}:
+    row_scale["production_year_calc"] * Production_year[p]
+        = row_scale["production_year_calc"] * sum {n in NODES, h in HOURS, td in TYPICAL_DAYS} (w[h,td] * t_op[h,td] * e[p,n,h,td]);
+
+subject to production_eut_calc {eut in END_USES_TYPES}:
+    row_scale["production_eut_calc"] * Production_eut[eut]
+        = row_scale["production_eut_calc"] * sum {j in TECHNOLOGIES_OF_END_USES_TYPE[eut]} Production_year[j];
+
 subject to process_capacity_factor {p in PROCESSORS}:
-    sum {n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (e[p,n,h,td] * t_op[h,td]) <= F[p] * c_p[p] * total_time;
+    Production_year[p] <= F[p] * c_p[p] * total_time;
 
+# shares of the end-use production, on the totals above instead of re-summing all j2 for every j
 subject to f_min_perc {eut in END_USES_TYPES, j in TECHNOLOGIES_OF_END_USES_TYPE[eut]}:
-	sum {n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (e[j,n,h,td]  * t_op[h,td]) >= fmin_perc[j] * sum {j2 in TECHNOLOGIES_OF_END_USES_TYPE[eut], n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (e[j2,n,h,td] *  t_op[h,td]);
+	Production_year[j] >= fmin_perc[j] * Production_eut[eut];
 subject to f_max_perc {eut in END_USES_TYPES, j in TECHNOLOGIES_OF_END_USES_TYPE[eut]}:
-	sum {n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (e[j,n,h,td]  * t_op[h,td]) <= fmax_perc[j] * sum {j2 in TECHNOLOGIES_OF_END_USES_TYPE[eut], n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (e[j2,n,h,td] * t_op[h,td]);
+	Production_year[j] <= fmax_perc[j] * Production_eut[eut];
 
 subject to solar_area_limited:
 	F["PV"] / power_density_pv + (F["DEC_SOLAR"] + F["DHN_SOLAR"]) / power_density_solar_thermal <= solar_area;
@@ -269,31 +292,34 @@ subject to extra_dhn:
 
 # Cost
 subject to total_cost_cal:
-	TotalCost = sum {j in TECHNOLOGIES} (tau[j]  * C_inv[j] + C_maint[j]) + sum {i in RESOURCES} C_op[i];
+	row_scale["total_cost_cal"] * TotalCost
+		= row_scale["total_cost_cal"] * (sum {j in TECHNOLOGIES} (tau[j]  * C_inv[j] + C_maint[j]) + sum {i in RESOURCES} C_op[i]);
 
 subject to investment_cost_calc {j in TECHNOLOGIES}: 
-	C_inv[j] = c_inv[j] * F[j];
+	row_scale["investment_cost_calc"] * C_inv[j] = row_scale["investment_cost_calc"] * c_inv[j] * F[j];
 
 subject to maintenance_cost_calc {j in TECHNOLOGIES}: 
-	C_maint[j] = c_maint[j] * F[j];
+	row_scale["maintenance_cost_calc"] * C_maint[j] = row_scale["maintenance_cost_calc"] * c_maint[j] * F[j];
 
 subject to operation_cost_calc {i in RESOURCES}:
-	C_op[i] = sum {n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (c_op[i] * g[i,n,h,td] * t_op[h,td]);
+	row_scale["operation_cost_calc"] * C_op[i]
+		= row_scale["operation_cost_calc"] * sum {n in NODES, h in HOURS, td in TYPICAL_DAYS} (c_op[i] * w[h,td] * t_op[h,td] * g[i,n,h,td]);
 
 # Emission
 subject to totalGWP_calc:
-	TotalGWP = sum {i in RESOURCES} GWP_op[i];
+	row_scale["totalGWP_calc"] * TotalGWP = row_scale["totalGWP_calc"] * sum {i in RESOURCES} GWP_op[i];
 # just RESOURCES: TotalGWP = sum {i in RESOURCES} GWP_op[i];
 # including GREY EMISSIONS: TotalGWP = sum {j in TECHNOLOGIES} (GWP_constr[j] / lifetime[j]) + sum {i in RESOURCES} GWP_op[i];
 	 
 subject to gwp_constr_calc {j in TECHNOLOGIES}:
-	GWP_constr[j] = gwp_constr[j] * F[j];
+	row_scale["gwp_constr_calc"] * GWP_constr[j] = row_scale["gwp_constr_calc"] * gwp_constr[j] * F[j];
  
 subject to gwp_op_calc {i in RESOURCES}:
-	GWP_op[i] = sum {n in NODES, t in PERIODS, h in HOUR_OF_PERIOD[t], td in TYPICAL_DAY_OF_PERIOD[t]} (gwp_op[i] * g[i,n,h,td] * t_op[h,td]);
+	row_scale["gwp_op_calc"] * GWP_op[i]
+		= row_scale["gwp_op_calc"] * sum {n in NODES, h in HOURS, td in TYPICAL_DAYS} (gwp_op[i] * w[h,td] * t_op[h,td] * g[i,n,h,td]);
 
 subject to Minimum_GWP_constraint:
-    TotalGWP <= (if use_epsilon = 1 then epsilon_value else 1e6);
+    TotalGWP <= (if use_epsilon = 1 then epsilon_value else Infinity); # dropped by presolve without a cap
 
 # Balance
 subject to balance {l in LAYERS, n in NODES, h in HOURS, td in TYPICAL_DAYS}:
@@ -308,6 +334,13 @@ subject to balance {l in LAYERS, n in NODES, h in HOURS, td in TYPICAL_DAYS}:
 ### Objective [M€/year] ###
 maximize SocialWelfare:
     sum {n in NODES, h in HOURS, td in TYPICAL_DAYS}
-        ((sum {c in CONSUMERS, k in SEGMENTS} (a[k,c,n,h,td] * d_seg[k,c,n,h,td] - 0.5 * b[k,c,n,h,td] * (d_seg[k,c,n,h,td])^2)
+        ((sum {c in CONSUMERS, k in SEGMENTS}
+            (if stepwise_bids = 1 then a_step[k,c,n,h,td] * d_seg[k,c,n,h,td]
+             else a[k,c,n,h,td] * d_seg[k,c,n,h,td] - 0.5 * b[k,c,n,h,td] * (d_seg[k,c,n,h,td])^2)
           - sum {s in SUPPLIERS} c_op[s] * g[s,n,h,td]) * w[h,td] * t_op[h,td])
-  - sum {j in TECHNOLOGIES} (tau[j] * C_inv[j] + C_maint[j]);
+  - sum {j in TECHNOLOGIES} (tau[j] * C_inv[j] + C_maint[j])
+  - carbon_price * TotalGWP;
+
+# Lowest reachable emissions [ktCO2-eq./year], the feasibility bound of epsilon_value
+minimize MinimumEmissions:
+    TotalGWP;
@@ -0,0 +1,264 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from ArrayStore import run_array
+from Cubes import ampl_frame, to_cube
+
+CHECK_DATA_FILE = "check_data.npz"
+CHECK_FILE = "check.csv"
+TOL = 1e-5  # [], violation relative to the magnitude of the row's terms (at least 1)
+
+# Limits of CaseStudy_Math.mod the checker needs besides the exported results: name -> (dims, default)
+PARAMS = {
+    "c_p_t": (["processors", "hours", "typical_days"], 1.0),
+    "c_p": (["processors"], 1.0),
+    "f_min": (["technologies"], 0.0),
+    "f_max": (["technologies"], np.inf),
+    "avail": (["resources"], np.inf),
+    "storage_eff_in": (["storages", "layers"], 0.0),
+    "storage_eff_out": (["storages", "layers"], 0.0),
+    "storage_losses": (["storages"], 0.0),
+    "storage_charge_time": (["storages"], 0.0),
+    "storage_discharge_time": (["storages"], 0.0),
+    "storage_availability": (["storages"], 1.0),
+}
+
+# -------------------------------------------------------------
+# Sets and limits of a run, saved next to its results
+# -------------------------------------------------------------
+def check_data_from_ampl(ampl):
+    def members(name):
+        return ampl.get_set(name).get_values().to_list()
+
+    coords = {
+        "resources": members("RESOURCES"), "processors": members("PROCESSORS"), "storages": members("STORAGE_TECH"),
+        "daily": members("STORAGE_DAILY"), "technologies": members("TECHNOLOGIES"), "layers": members("LAYERS"),
+        "nodes": members("NODES"), "hours": [int(h) for h in members("HOURS")],
+        "typical_days": [int(td) for td in members("TYPICAL_DAYS")],
+    }
+    values = {"total_time": np.array(ampl.get_parameter("total_time").value())}
+    for name, (dims, default) in PARAMS.items():
+        df = ampl_frame(ampl.get_parameter(name), dims)
+        values[name] = to_cube(df, dims, "val", {d: coords[d] for d in dims}, fill=default)[0]
+    return coords, values
+
+
+def save_check_data(data, data_dir):
+    coords, values = data
+    arrays = {f"coord_{k}": np.array(v) for k, v in coords.items()}
+    arrays.update(values)
+    np.savez_compressed(os.path.join(data_dir, CHECK_DATA_FILE), **arrays)
+
+
+def load_check_data(data_dir):
+    path = os.path.join(data_dir, CHECK_DATA_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found: the run was exported before the checker, re-export it")
+    with np.load(path) as f:
+        coords = {k[len("coord_"):]: f[k].tolist() for k in f.files if k.startswith("coord_")}
+        values = {k: f[k] for k in f.files if not k.startswith("coord_")}
+    return coords, values
+
+# -------------------------------------------------------------
+# Results of the run as dense arrays over the model's sets
+# -------------------------------------------------------------
+def _aligned(data_dir, name, labels):
+    """Run array ``name`` reindexed to ``labels`` (one list per dim), 0 for labels it does not have."""
+    arr = run_array(data_dir, name)
+    out = np.asarray(arr.data)
+    for axis, (dim, want) in enumerate(zip(arr.dims, labels)):
+        idx = pd.Index(arr.coords[dim]).get_indexer(want)
+        if len(arr.coords[dim]) == 0:
+            shape = list(out.shape)
+            shape[axis] = len(want)
+            out = np.zeros(shape)
+            continue
+        out = np.take(out, np.maximum(idx, 0), axis=axis)
+        out[(slice(None),) * axis + (idx < 0,)] = 0.0
+    return out
+
+
+def _read(data_dir, name):
+    return pd.read_csv(os.path.join(data_dir, name))
+
+
+def _weight(data_dir, name, ht):
+    df = _read(data_dir, name)
+    return to_cube(df, ["h", "td"], df.columns[-1], ht)[0]  # value column named w / mult / t_op by export version
+
+
+def load_run(data_dir):
+    """Flows, storage levels, capacities and weights of an exported run, over the sets of its check data."""
+    coords, values = load_check_data(data_dir)
+    R, P, J, L = coords["resources"], coords["processors"], coords["storages"], coords["layers"]
+    N, H, TD = coords["nodes"], coords["hours"], coords["typical_days"]
+    ht = {"h": H, "td": TD}
+
+    lio_df = _read(data_dir, "layers_in_out.csv")
+    missing = [r for r in R if r not in set(lio_df["pt"])]  # older exports: each resource feeds its own layer
+    lio_df = pd.concat([lio_df, pd.DataFrame({"pt": missing, "p": missing, "layers_in_out": 1.0})])
+    F_df = _read(data_dir, "F_capacities.csv")
+    F_df.columns = ["TECHNOLOGY", "capacity"]
+    t_map = _read(data_dir, "t_h_td_mapping.csv").sort_values("t")
+
+    run = {
+        "g": _aligned(data_dir, "s", [R, N, H, TD]),
+        "e": _aligned(data_dir, "e", [P, N, H, TD]),
+        "d": _aligned(data_dir, "d", [L, N, H, TD]),  # consumers are layers
+        "storage_in": _aligned(data_dir, "storage_in", [J, L, N, H, TD]),
+        "storage_out": _aligned(data_dir, "storage_out", [J, L, N, H, TD]),
+        "level": _aligned(data_dir, "storage_level", [J, N, t_map["t"].tolist()]),
+        "level_daily": _aligned(data_dir, "storage_level_daily", [coords["daily"], N, H, TD]),
+        "lio": to_cube(lio_df, ["pt", "p"], "layers_in_out", {"pt": R + P, "p": L})[0],
+        "F": to_cube(F_df, ["TECHNOLOGY"], "capacity", {"TECHNOLOGY": coords["technologies"]})[0],
+        "w": _weight(data_dir, "mult.csv", ht),
+        "t_op": _weight(data_dir, "t_op.csv", ht),
+        "t": t_map["t"].tolist(),
+        "h_of_t": pd.Index(H).get_indexer(t_map["h"]),
+        "td_of_t": pd.Index(TD).get_indexer(t_map["td"]),
+    }
+    return coords, values, run
+
+# -------------------------------------------------------------
+# Residuals and violations per constraint family
+# -------------------------------------------------------------
+def _row(family, violation, scale, labels):
+    """Largest violation of a family (violation >= 0 where a row is violated) and where it occurs."""
+    violation = np.asarray(violation, dtype=float)
+    scale = np.broadcast_to(scale, violation.shape)
+    rel = violation / np.maximum(scale, 1.0)
+    if rel.size == 0:
+        return {"family": family, "rows": 0, "max_abs": 0.0, "max_rel": 0.0, "worst": ""}
+    i = np.unravel_index(np.argmax(rel), rel.shape)
+    return {
+        "family": family, "rows": int(rel.size), "max_abs": float(violation[i]), "max_rel": float(rel[i]),
+        "worst": ", ".join(str(lab[k]) for lab, k in zip(labels, i)),
+    }
+
+
+def check(coords, values, run, tol=TOL):
+    """Residuals of the balance, storage, capacity and annual resource constraints and the variable
+    bounds of CaseStudy_Math.mod, recomputed from the exported results; one row per family."""
+    R, P, J, L = coords["resources"], coords["processors"], coords["storages"], coords["layers"]
+    N, H, TD, T = coords["nodes"], coords["hours"], coords["typical_days"], run["t"]
+    daily = coords["daily"]
+    g, e, d, s_in, s_out = run["g"], run["e"], run["d"], run["storage_in"], run["storage_out"]
+    F, lio, weight = run["F"], run["lio"], run["w"] * run["t_op"]
+    F_of = {j: F[coords["technologies"].index(j)] for j in set(P) | set(J)}
+    F_p = np.array([F_of[p] for p in P])
+    F_j = np.array([F_of[j] for j in J])
+    rows = []
+
+    # balance[l, n, h, td]
+    flows = np.concatenate([g, e])
+    net = np.einsum("kl,knht->lnht", lio, flows)
+    resid = d + s_in.sum(axis=0) - s_out.sum(axis=0) - net
+    scale = d + s_in.sum(axis=0) + s_out.sum(axis=0) + np.einsum("kl,knht->lnht", np.abs(lio), flows)
+    rows.append(_row("balance", np.abs(resid), scale, [L, N, H, TD]))
+
+    # storage_level[j, n, t], cyclic over the year; impose_daily_storage
+    eff_in, eff_out = values["storage_eff_in"], values["storage_eff_out"]
+    inv_out = np.divide(1.0, eff_out, out=np.zeros_like(eff_out), where=eff_out > 0)
+    charge = np.einsum("jl,jlnht->jnht", eff_in, s_in) - np.einsum("jl,jlnht->jnht", inv_out, s_out)
+    h_t, td_t = run["h_of_t"], run["td_of_t"]
+    flow_t = run["t_op"][h_t, td_t] * charge[:, :, h_t, td_t]
+    level = run["level"]
+    kept = np.roll(level, 1, axis=-1) * (1.0 - values["storage_losses"])[:, None, None]
+    resid = level - kept - flow_t
+    rows.append(_row("storage_level", np.abs(resid), np.abs(level) + np.abs(kept) + np.abs(flow_t), [J, N, T]))
+    di = [J.index(j) for j in daily]
+    resid = level[di] - run["level_daily"][:, :, h_t, td_t]
+    rows.append(_row("impose_daily_storage", np.abs(resid), np.abs(level[di]), [daily, N, T]))
+    rows.append(_row("storage_layer_in", s_in * (eff_in == 0)[:, :, None, None, None], s_in, [J, L, N, H, TD]))
+    rows.append(_row("storage_layer_out", s_out * (eff_out == 0)[:, :, None, None, None], s_out, [J, L, N, H, TD]))
+
+    # capacities
+    e_sum = e.sum(axis=1)
+    cap_t = F_p[:, None, None] * values["c_p_t"]
+    rows.append(_row("process_capacity_factor_t", np.maximum(e_sum - cap_t, 0), np.abs(cap_t), [P, H, TD]))
+    production = (e_sum * weight).sum(axis=(-2, -1))
+    cap_y = F_p * values["c_p"] * values["total_time"]
+    rows.append(_row("process_capacity_factor", np.maximum(production - cap_y, 0), np.abs(cap_y), [P]))
+    seasonal = [k for k, j in enumerate(J) if j not in daily]
+    rows.append(_row("limit_energy_stored_to_maximum", np.maximum(level[seasonal] - F_j[seasonal, None, None], 0),
+                     F_j[seasonal, None, None], [[J[k] for k in seasonal], N, T]))
+    F_d = F_j[di][:, None, None, None]
+    rows.append(_row("daily_storage_capacity", np.maximum(run["level_daily"] - F_d, 0), F_d, [daily, N, H, TD]))
+    power = (s_in * values["storage_charge_time"][:, None, None, None, None]
+             + s_out * values["storage_discharge_time"][:, None, None, None, None])
+    limit = (F_j * values["storage_availability"])[:, None, None, None, None]
+    rows.append(_row("limit_energy_to_power_ratio", np.maximum(power - limit, 0), limit, [J, L, N, H, TD]))
+    T_all = coords["technologies"]
+    rows.append(_row("size_limit", np.maximum(values["f_min"] - F, 0) + np.maximum(F - values["f_max"], 0),
+                     np.abs(F), [T_all]))
+
+    # resource_availability[i], annual
+    used = (g.sum(axis=1) * weight).sum(axis=(-2, -1))
+    avail = values["avail"]
+    rows.append(_row("resource_availability", np.maximum(used - avail, 0), np.where(np.isfinite(avail), avail, used), [R]))
+
+    # variable bounds (>= 0)
+    for name, x, labels in [("g", g, [R, N, H, TD]), ("e", e, [P, N, H, TD]), ("d", d, [L, N, H, TD]),
+                            ("Storage_in", s_in, [J, L, N, H, TD]), ("Storage_out", s_out, [J, L, N, H, TD]),
+                            ("Storage_level", level, [J, N, T]), ("F", F, [T_all])]:
+        rows.append(_row(f"{name} >= 0", np.maximum(-x, 0), np.abs(x), labels))
+
+    df = pd.DataFrame(rows)
+    df["ok"] = df["max_rel"] <= tol
+    return df
+
+
+def export_roundtrip(coords, run, ampl, tol=TOL):
+    """Exported tables as re-read by load_run against the model they were written from; one row per table."""
+    sets = {"r": coords["resources"], "p": coords["processors"], "l": coords["layers"], "n": coords["nodes"],
+            "h": coords["hours"], "td": coords["typical_days"], "k": coords["technologies"]}
+    rows = []
+    for key, name, dims in [("w", "w", ["h", "td"]), ("t_op", "t_op", ["h", "td"]), ("F", "F", ["k"]),
+                            ("g", "g", ["r", "n", "h", "td"]), ("e", "e", ["p", "n", "h", "td"]),
+                            ("d", "d", ["l", "n", "h", "td"])]:
+        entity = ampl.get_parameter(name) if name in ("w", "t_op") else ampl.get_variable(name)
+        model = to_cube(ampl_frame(entity, dims), dims, "val", {d: sets[d] for d in dims})[0]
+        diff = np.abs(run[key] - model)
+        rows.append(_row(f"export {name}", diff, np.abs(model), [sets[d] for d in dims]))
+    df = pd.DataFrame(rows)
+    df["ok"] = df["max_rel"] <= tol
+    return df
+
+
+def check_run(data_dir, tol=TOL, ampl=None):
+    """Residuals of an exported run; with the model it was exported from, also the round trip of its tables."""
+    coords, values, run = load_run(data_dir)
+    df = check(coords, values, run, tol)
+    if ampl is not None:
+        df = pd.concat([export_roundtrip(coords, run, ampl, tol), df], ignore_index=True)
+    return df
+
+
+def write_check(data_dir, tol=TOL, ampl=None):
+    """Check an exported run, write ``check.csv`` and print the families that are violated."""
+    df = check_run(data_dir, tol, ampl)
+    df.to_csv(os.path.join(data_dir, CHECK_FILE), index=False)
+    for r in df[~df["ok"]].itertuples():
+        print(f"[WARNING] {r.family}: violated by {r.max_abs:.3g} ({r.max_rel:.2e} relative) at {r.worst}")
+    return df
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Recompute the constraint residuals of exported runs.")
+    parser.add_argument("data_dirs", nargs="+", help="run folders")
+    parser.add_argument("--tol", type=float, default=TOL, help="max violation relative to the row magnitude")
+    args = parser.parse_args()
+
+    failed = 0
+    for data_dir in args.data_dirs:
+        start = time.time()
+        df = write_check(data_dir, args.tol)
+        print(f"{data_dir}: {int((~df['ok']).sum())} of {len(df)} families violated ({time.time() - start:.3f} s)")
+        failed += int(not df["ok"].all())
+    sys.exit(1 if failed else 0)
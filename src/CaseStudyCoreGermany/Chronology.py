@@ -0,0 +1,155 @@
+import os
+import re
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from ArrayStore import run_array
+
+# -------------------------------------------------------------
+# T_H_TD as index arrays
+# -------------------------------------------------------------
+@dataclass(frozen=True)
+class Chronology:
+    """Period -> (hour, typical day) mapping of T_H_TD, one entry per period t."""
+    h_of_t: np.ndarray   # [t], hour label of each period
+    td_of_t: np.ndarray  # [t], typical day label of each period
+
+    @property
+    def periods(self):
+        return np.arange(1, len(self.h_of_t) + 1)
+
+    def _positions(self, hours, typical_days):
+        hours = np.arange(1, self.h_of_t.max() + 1) if hours is None else np.asarray(hours)
+        typical_days = np.arange(1, self.td_of_t.max() + 1) if typical_days is None else np.asarray(typical_days)
+        positions = []
+        for name, labels, of_t in [("hour", hours, self.h_of_t), ("typical day", typical_days, self.td_of_t)]:
+            pos = pd.Index(labels).get_indexer(of_t)
+            if (pos < 0).any():
+                missing = sorted(set(of_t[pos < 0].tolist()))
+                raise KeyError(f"No {name} label for {', '.join(map(str, missing))} of the chronology")
+            positions.append(pos)
+        return tuple(positions)
+
+    def expand(self, values, hours=None, typical_days=None):
+        """Map any [..., h, td] array to its chronological [..., t] series."""
+        i_h, i_td = self._positions(hours, typical_days)
+        return values[..., i_h, i_td]
+
+    def representative_periods(self):
+        """[h, td] position of the first period mapped to each (h, td) pair."""
+        first = np.zeros((self.h_of_t.max(), self.td_of_t.max()), dtype=int)
+        first[self.h_of_t[::-1] - 1, self.td_of_t[::-1] - 1] = np.arange(len(self.h_of_t))[::-1]
+        return first
+
+    def period_weights(self):
+        """[h, td] number of periods represented by each (h, td) pair, i.e. the model's w."""
+        w = np.zeros((self.h_of_t.max(), self.td_of_t.max()))
+        np.add.at(w, (self.h_of_t - 1, self.td_of_t - 1), 1)
+        return w
+
+
+def chronology_from_frame(df):
+    df = df.sort_values("t")
+    return Chronology(df["h"].to_numpy(dtype=int), df["td"].to_numpy(dtype=int))
+
+
+def load_chronology(data_dir):
+    return chronology_from_frame(pd.read_csv(os.path.join(data_dir, "t_h_td_mapping.csv")))
+
+
+def chronology_from_ampl(ampl):
+    df = ampl.get_set("T_H_TD").get_values().to_pandas()
+    return chronology_from_frame(pd.DataFrame(df.index.tolist(), columns=["t", "h", "td"]))
+
+
+def chronology_from_days(td_of_days, hours_per_day=24):
+    """Chronology of consecutive days of ``hours_per_day`` periods, each mapped to one typical day."""
+    td_of_days = np.asarray(td_of_days, dtype=int)
+    h_of_t = np.tile(np.arange(1, hours_per_day + 1), len(td_of_days))
+    return Chronology(h_of_t, np.repeat(td_of_days, hours_per_day))
+
+
+def days_of_chronology(chronology, hours_per_day=24):
+    """[day] typical day of each calendar day; fails if a day is not one whole typical day."""
+    h = chronology.h_of_t.reshape(-1, hours_per_day)
+    td = chronology.td_of_t.reshape(-1, hours_per_day)
+    if (h != np.arange(1, hours_per_day + 1)).any() or (td != td[:, :1]).any():
+        raise ValueError("T_H_TD does not map whole calendar days onto typical days.")
+    return td[:, 0]
+
+# -------------------------------------------------------------
+# Time index data of the model: 365 day assignments and w instead of 8760 T_H_TD tuples
+# -------------------------------------------------------------
+DAYS_DAT = "CaseStudyDays.dat"
+
+
+def read_periods_dat(path):
+    """Chronology of a data file listing T_H_TD as (t, h, td) tuples."""
+    with open(path, "r") as f:
+        values = np.array(re.findall(r"\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)", f.read()), dtype=int)
+    return chronology_from_frame(pd.DataFrame(values, columns=["t", "h", "td"]))
+
+
+def write_days_dat(chronology, path, source=None):
+    td_of_days = days_of_chronology(chronology)
+    w = chronology.period_weights().astype(int)
+    lines = [f"# Generated by Chronology.py{' from ' + source if source else ''}, do not edit",
+             "# typical day of each calendar day, T_H_TD and the period sets are derived from it", "",
+             "param TD_OF_DAYS :="]
+    lines += [f"{d}\t{td}" for d, td in enumerate(td_of_days, 1)]
+    lines += [";", "", "# [1/year], periods represented by each (h, td) pair",
+              "param w :\t" + "\t".join(str(td) for td in range(1, w.shape[1] + 1)) + "\t:="]
+    lines += [f"{h}\t" + "\t".join(str(v) for v in row) for h, row in enumerate(w, 1)]
+    lines += [";", ""]
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+
+# -------------------------------------------------------------
+# Annual series of a run
+# -------------------------------------------------------------
+def annual_price(price_cube, chronology, unit="eur_per_mwh"):
+    """[l, n, t] chronological prices from a PriceCube."""
+    return chronology.expand(price_cube.values(unit), price_cube.hours, price_cube.typical_days)
+
+
+def annual_flows(data_dir, name, chronology):
+    """[tech, n, t] chronological series of a [tech, n, h, td] run array (s, e, d, ...)."""
+    arr = run_array(data_dir, name)
+    return chronology.expand(arr.data, arr.coords["h"], arr.coords["td"]), arr.coords
+
+
+def _align(arr, dims, coords):
+    """Values of a LabeledArray reordered onto ``coords``, zero for labels it does not have."""
+    out = np.zeros(tuple(len(coords[d]) for d in dims))
+    pos = [pd.Index(coords[d]).get_indexer(arr.coords[d]) for d in dims]
+    keep = [p >= 0 for p in pos]
+    out[np.ix_(*[p[k] for p, k in zip(pos, keep)])] = np.asarray(arr.data)[np.ix_(*keep)]
+    return out
+
+
+def annual_storage_level(data_dir, chronology):
+    """[j, n, t] storage levels: Storage_level_daily expanded for STORAGE_DAILY, Storage_level otherwise."""
+    seasonal = run_array(data_dir, "storage_level")
+    daily = run_array(data_dir, "storage_level_daily")
+    techs = pd.read_csv(os.path.join(data_dir, "storage_tech.csv"))["STORAGE_TECH"].tolist()
+    daily_set = pd.read_csv(os.path.join(data_dir, "storage_daily.csv"))["STORAGE_DAILY"].tolist()
+
+    nodes = sorted(set(seasonal.coords["n"]) | set(daily.coords["n"]))
+    periods = chronology.periods.tolist()
+    level = _align(seasonal, ["j", "n", "t"], {"j": techs, "n": nodes, "t": periods})
+
+    hours, tds = daily.coords["h"], daily.coords["td"]
+    daily_cube = _align(daily, ["j", "n", "h", "td"], {"j": techs, "n": nodes, "h": hours, "td": tds})
+    is_daily = np.isin(techs, daily_set)[:, None, None]
+    level = np.where(is_daily, chronology.expand(daily_cube, hours, tds), level)
+    return level, {"j": techs, "n": nodes, "t": periods}
+
+
+if __name__ == "__main__":
+    # python Chronology.py: regenerate CaseStudyDays.dat from the T_H_TD tuples of CaseStudyPeriods.dat
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    chronology = read_periods_dat(os.path.join(script_dir, "CaseStudyPeriods.dat"))
+    write_days_dat(chronology, os.path.join(script_dir, DAYS_DAT), "CaseStudyPeriods.dat")
+    print(f"{len(days_of_chronology(chronology))} days -> {DAYS_DAT}")
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------
+# Dense arrays from long result tables
+# -------------------------------------------------------------
+def to_cube(df, dims, value, coords=None, fill=0.0):
+    """Pivot a long table (one row per index tuple) into a dense array over ``dims``."""
+    if coords is None:
+        coords = {d: sorted(df[d].unique().tolist()) for d in dims}
+
+    shape = tuple(len(coords[d]) for d in dims)
+    cube = np.full(shape, fill, dtype=float)
+
+    idx = tuple(pd.Index(coords[d]).get_indexer(df[d]) for d in dims)
+    keep = np.logical_and.reduce([i >= 0 for i in idx])
+    cube[tuple(i[keep] for i in idx)] = df[value].to_numpy(dtype=float)[keep]
+    return cube, coords
+
+
+def ampl_frame(entity, dims, suffix="val"):
+    """Long DataFrame of an AMPL variable/parameter/constraint with named index columns."""
+    df = entity.get_values(suffix).to_pandas().reset_index()
+    df.columns = list(dims) + [suffix]
+    return df
+
+
+def ampl_cube(entity, dims, suffix="val", coords=None):
+    """Dense array of an AMPL entity over ``dims``."""
+    return to_cube(ampl_frame(entity, dims, suffix), dims, suffix, coords)
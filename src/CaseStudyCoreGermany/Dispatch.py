@@ -0,0 +1,224 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+
+import Solvers
+from ArrayStore import run_array
+from MeritOrder import read_capacities
+from Scenarios import SCENARIOS, ScenarioState, apply_scenario, carbon_price_overrides
+from Summary import load_summary
+
+DISPATCH_MODEL = "CaseStudy_Dispatch.mod"
+OUT_DIR = "dispatch"
+KEEP_HOURS = 168    # periods of a window that are kept
+OVERLAP_HOURS = 24  # look-ahead solved with each window and discarded
+
+# -------------------------------------------------------------
+# Windows and storage state of the typical-day solution
+# -------------------------------------------------------------
+def windows(n_periods, keep=KEEP_HOURS, overlap=OVERLAP_HOURS):
+    """(first period, periods solved, periods kept) of consecutive overlapping windows."""
+    out = []
+    for start in range(1, n_periods + 1, keep):
+        kept = min(keep, n_periods - start + 1)
+        out.append((start, min(kept + overlap, n_periods - start + 1), kept))
+    return out
+
+
+def td_levels(data_dir):
+    """[j, n, t] Storage_level of the typical-day run, its coords and the daily storages."""
+    arr = run_array(data_dir, "storage_level")
+    daily = pd.read_csv(os.path.join(data_dir, "storage_daily.csv"))["STORAGE_DAILY"].tolist()
+    return np.asarray(arr.data), arr.coords, set(daily)
+
+
+def _levels(level, coords, t, keep=None):
+    """{(j, n): level} after period ``t`` (cyclic: period 0 is the last one), for the storages in ``keep``."""
+    i = coords["t"].index(t if t >= 1 else coords["t"][-1])
+    return {(j, n): float(level[a, b, i]) for a, j in enumerate(coords["j"]) for b, n in enumerate(coords["n"])
+            if keep is None or j in keep}
+
+# -------------------------------------------------------------
+# Worker processes: one model each, with the capacities of the run fixed
+# -------------------------------------------------------------
+_worker = {}
+
+
+def _init_worker(config):
+    from CaseStudy import load_model, script_dir
+
+    ampl = load_model()
+    meta = config["meta"]
+    state = ScenarioState(ampl)
+    apply_scenario(state, SCENARIOS.get(meta.get("scenario")), meta.get("elasticity_tag"),
+                   meta.get("epsilon"), meta.get("stepwise_bids", False))
+    state.apply(carbon_price_overrides(meta.get("carbon_price_eur_per_t")))  # runs of the carbon-price sweep
+    ampl.read(os.path.join(script_dir, DISPATCH_MODEL))  # declares and selects problem Dispatch
+    ampl.get_parameter("F_fix").set_values(config["capacities"])
+    _worker.update(ampl=ampl, config=config, options=Solvers.SolverOptions(**config["options"]))
+
+
+def _frame(ampl, index, names, expr):
+    df = ampl.get_data(f"{{{index}}} {expr}").to_pandas().reset_index()
+    df.columns = names + ["val"]
+    return df
+
+
+def _solve_window(start, length, keep, level_start, level_target):
+    ampl, config = _worker["ampl"], _worker["config"]
+    ampl.get_parameter("window_start").set(start)
+    ampl.get_parameter("window_length").set(length)
+    ampl.get_parameter("level_start").set_values(level_start)
+    ampl.get_parameter("level_target").set_values(level_target)
+    record = Solvers.solve(ampl, config["backend"], _worker["options"])
+    out = {"start": start, "length": length, "keep": keep, "status": record.status, "wall_time": record.wall_time}
+    if not record.ok:
+        return out
+
+    end = start + keep - 1
+    per_c = "c in CONSUMERS, t in WINDOW: t <= " + str(end)
+    per_t = "t in WINDOW: t <= " + str(end)
+    consumers = _frame(ampl, per_c, ["c", "t"], "sum {n in NODES} d_ch[c,n,t]").rename(columns={"val": "served"})
+    consumers["curtailed"] = _frame(ampl, per_c, ["c", "t"],
+                                    "sum {n in NODES} (d_ref[c,n,h_of[t],td_of[t]] - d_ch[c,n,t])")["val"]
+    # first segment, bid from VOLL: demand that is lost rather than shifted by the elasticity
+    consumers["unserved"] = _frame(ampl, per_c, ["c", "t"],
+                                   "sum {n in NODES} (D[1,c,n,h_of[t],td_of[t]] - d_seg_ch[1,c,n,t])")["val"]
+    periods = _frame(ampl, per_t, ["t"], "sum {n in NODES, s in SUPPLIERS} c_op[s] * g_ch[s,n,t] * t_op[h_of[t],td_of[t]]")
+    periods = periods.rename(columns={"val": "op_cost"})
+    periods["gwp"] = _frame(ampl, per_t, ["t"], "sum {n in NODES, s in SUPPLIERS} gwp_op[s] * g_ch[s,n,t] * t_op[h_of[t],td_of[t]]")["val"]
+    periods["value"] = _frame(ampl, per_t, ["t"], (
+        "sum {n in NODES, c in CONSUMERS, k in SEGMENTS} t_op[h_of[t],td_of[t]] * "
+        "(if stepwise_bids = 1 then a_step[k,c,n,h_of[t],td_of[t]] * d_seg_ch[k,c,n,t] "
+        "else a[k,c,n,h_of[t],td_of[t]] * d_seg_ch[k,c,n,t] - 0.5 * b[k,c,n,h_of[t],td_of[t]] * d_seg_ch[k,c,n,t]^2)"))["val"]
+    level = _frame(ampl, "j in STORAGE_TECH, n in NODES", ["j", "n"], f"Storage_level_ch[j,n,{end}]")
+    out.update({
+        "consumers": consumers, "periods": periods,
+        "level_end": {(j, n): v for j, n, v in level.itertuples(index=False)},
+        "shortfall": ampl.get_value("sum {j in STORAGE_TECH, n in NODES} Level_shortfall[j,n]"),
+        # emissions of the whole solved window against its share of the cap (NaN without a cap)
+        "gwp": ampl.get_value("sum {s in SUPPLIERS, n in NODES, t in WINDOW} gwp_op[s] * t_op[h_of[t],td_of[t]] * g_ch[s,n,t]"),
+        "gwp_cap": ampl.get_value("if use_epsilon = 1 then epsilon_value * window_share else Infinity"),
+    })
+    return out
+
+# -------------------------------------------------------------
+# Driver
+# -------------------------------------------------------------
+def run(data_dir, workers=None, sequential=False, backend=None, options=None, keep=KEEP_HOURS, overlap=OVERLAP_HOURS):
+    """Chronological dispatch of the year with the capacities of the typical-day run in ``data_dir``.
+
+    Windows start from the run's Storage_level and must end at it for seasonal storage, so they are
+    independent and solved in a process pool; ``sequential`` passes the storage state of each window
+    on to the next instead."""
+    options = options or Solvers.SolverOptions(verbose=False)
+    with open(os.path.join(data_dir, "last_run.json"), "r") as f:
+        meta = json.load(f)
+    config = {
+        "meta": meta, "capacities": read_capacities(data_dir),
+        "backend": Solvers.select_backend(backend), "options": asdict(options),
+    }
+    level, coords, daily = td_levels(data_dir)
+    seasonal = set(coords["j"]) - daily
+    plan = windows(len(coords["t"]), keep, overlap)
+
+    def targets(start, length):
+        target = _levels(level, coords, start + length - 1, seasonal)
+        return {**{(j, n): 0.0 for j in daily for n in coords["n"]}, **target}
+
+    results = []
+    start_time = time.time()
+    if sequential:
+        _init_worker(config)
+        state = _levels(level, coords, 0)
+        for start, length, kept in plan:
+            res = _solve_window(start, length, kept, state, targets(start, length))
+            state = res.get("level_end", _levels(level, coords, start + kept - 1))
+            results.append(res)
+            print(f"window {start:5d}-{start + kept - 1:5d}: {res['status']}")
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(config,)) as pool:
+            futures = [pool.submit(_solve_window, start, length, kept, _levels(level, coords, start - 1),
+                                   targets(start, length)) for start, length, kept in plan]
+            for done, fut in enumerate(as_completed(futures), 1):
+                results.append(fut.result())
+                print(f"{done}/{len(plan)} windows")
+    results.sort(key=lambda r: r["start"])
+    elapsed = time.time() - start_time
+
+    return report(data_dir, results, level, coords, seasonal, elapsed)
+
+
+def report(data_dir, results, level, coords, seasonal, elapsed):
+    """Write the chronological series and the window log, and compare with the typical-day run."""
+    out_dir = os.path.join(data_dir, OUT_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    solved = [r for r in results if r["status"] == "solved"]
+
+    rows = []
+    for r in results:
+        end = r["start"] + r["keep"] - 1
+        row = {k: r[k] for k in ["start", "length", "keep", "status", "wall_time"]}
+        if "level_end" in r:
+            # gap to the typical-day level at the hand-over period, for the seasonal storages
+            td = _levels(level, coords, end, seasonal)
+            row["shortfall"] = r["shortfall"]
+            row["gwp"], row["gwp_cap"] = r["gwp"], r["gwp_cap"] if np.isfinite(r["gwp_cap"]) else np.nan
+            row["handover_gap"] = sum(abs(r["level_end"][k] - v) for k, v in td.items())
+        rows.append(row)
+    log = pd.DataFrame(rows)
+    log.to_csv(os.path.join(out_dir, "windows.csv"), index=False)
+    if not solved:
+        return {"windows": len(results), "solved": 0}
+
+    consumers = pd.concat([r["consumers"] for r in solved], ignore_index=True)
+    periods = pd.concat([r["periods"] for r in solved], ignore_index=True)
+    consumers.to_csv(os.path.join(out_dir, "consumers.csv"), index=False)
+    periods.to_csv(os.path.join(out_dir, "periods.csv"), index=False)
+
+    td = load_summary(data_dir)
+    td_op_cost = float(np.nansum(td["C_op"].to_numpy()))
+    fixed_cost = td.totals["TotalCost"] - td_op_cost
+    op_cost = float(periods["op_cost"].sum())
+    welfare = float((periods["value"] - periods["op_cost"]).sum()) - fixed_cost
+    served = consumers.groupby("c")["served"].sum()
+    summary = {
+        "windows": len(results), "solved": len(solved), "wall_time": elapsed,
+        "periods": int(periods["t"].nunique()),
+        "op_cost": op_cost, "op_cost_td": td_op_cost,
+        "op_cost_deviation": (op_cost - td_op_cost) / td_op_cost if td_op_cost else None,
+        "SocialWelfare": welfare, "SocialWelfare_td": td.totals["SocialWelfare"],
+        "TotalGWP": float(periods["gwp"].sum()), "TotalGWP_td": td.totals["TotalGWP"],
+        "unserved_GWh": consumers.groupby("c")["unserved"].sum().to_dict(),
+        "unserved_hours": {c: int(n) for c, n in consumers[consumers["unserved"] > 1e-6].groupby("c")["t"].nunique().items()},
+        "curtailed_GWh": consumers.groupby("c")["curtailed"].sum().to_dict(),
+        "demand_GWh": served.to_dict(),
+        "demand_GWh_td": td["demand"].to_dict(),
+        "storage_shortfall_GWh": float(log["shortfall"].sum()),
+    }
+    with open(os.path.join(out_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=4)
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Chronological dispatch of a typical-day run over the full year in weekly windows.")
+    parser.add_argument("data_dir", help="run folder with F_capacities.csv, storage levels and last_run.json")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--sequential", action="store_true", help="pass the storage state from window to window")
+    parser.add_argument("--keep", type=int, default=KEEP_HOURS, help="[h] periods kept per window")
+    parser.add_argument("--overlap", type=int, default=OVERLAP_HOURS, help="[h] look-ahead per window")
+    Solvers.add_arguments(parser)
+    args = parser.parse_args()
+
+    options = Solvers.options_from_args(args)
+    options.verbose = False
+    summary = run(args.data_dir, args.workers, args.sequential, args.solver, options, args.keep, args.overlap)
+    print(json.dumps(summary, indent=4))
@@ -0,0 +1,428 @@
+import json
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from Cubes import ampl_frame, to_cube
+
+SYSTEM_FILE = "merit_order_system.npz"
+ELECTRICITY = "ELECTRICITY"
+ITERATIONS = 3   # heat / electricity passes; heat pumps and cogeneration couple the layers
+CHUNK = 256      # scenarios cleared at once, bounds the [scenario, hour, step, segment] temporaries
+
+# -------------------------------------------------------------
+# Fixed-capacity system of a run
+# -------------------------------------------------------------
+@dataclass(frozen=True)
+class System:
+    """Single-node system with the capacities F of a run, dense over the (h, td) hours.
+
+    Each processor is dispatched on the end-use layer it belongs to; its other end-use flows
+    (electricity of heat pumps and cogeneration) are priced at, and passed on to, the other layers.
+    Annual limits (avail, c_p, f_min_perc / f_max_perc, constant imports) and seasonal storage are not
+    modelled: avail only caps the hourly rate of direct imports at avail / total_time."""
+    layers: tuple          # end-use layers, one market each
+    resources: tuple
+    processors: tuple
+    storages: tuple        # daily storages of an end-use layer
+    hours: tuple
+    typical_days: tuple
+    main: np.ndarray       # [p], index of the layer each processor is dispatched on
+    fuel: np.ndarray       # [p, r], resource input per unit of activity
+    out: np.ndarray        # [p, l], end-use output (> 0) or input (< 0) per unit of activity
+    imports: np.ndarray    # [r, l], direct supply of end-use layers by resources
+    import_rate: np.ndarray  # [r], avail / total_time [GW]
+    c_op: np.ndarray       # [r], base resource costs [M€/GWh]
+    capacity: np.ndarray   # [p, h, td], F * c_p_t [GW]
+    storage_layer: np.ndarray  # [j]
+    storage_energy: np.ndarray  # [j], F [GWh]
+    storage_in: np.ndarray   # [j], charge power [GW]
+    storage_out: np.ndarray  # [j], discharge power [GW]
+    eff_in: np.ndarray     # [j]
+    eff_out: np.ndarray    # [j]
+    p_pwl: np.ndarray      # [l, breakpoint, h, td], demand curve prices [M€/GWh]
+    width: np.ndarray      # [l, segment, h, td], segment widths D [GW]
+    weight: np.ndarray     # [h, td], w * t_op [h/year]
+    fixed_cost: float      # [M€/year], annualised investment and maintenance of F
+    stepwise: bool         # flat bid blocks at the segment average price (stepwise_bids = 1)
+
+    @property
+    def bid_prices(self):
+        """(start, end) price of every demand segment [l, segment, h, td]."""
+        if self.stepwise:
+            step = 0.5 * (self.p_pwl[:, :-1] + self.p_pwl[:, 1:])
+            return step, step
+        return self.p_pwl[:, :-1], self.p_pwl[:, 1:]
+
+
+def _set(ampl, name):
+    return ampl.get_set(name).get_values().to_list()
+
+
+def _param(ampl, name, dims, coords, fill=0.0):
+    return to_cube(ampl_frame(ampl.get_parameter(name), dims), dims, "val", coords, fill)[0]
+
+
+def system_from_ampl(ampl, capacities):
+    """System of the data loaded in ``ampl`` (scenario applied, not solved) with ``capacities``
+    (technology -> F); reads the model data only, no solve."""
+    nodes = _set(ampl, "NODES")
+    if len(nodes) > 1:
+        raise ValueError("The merit order dispatch is single-node; the model has nodes " + ", ".join(nodes))
+    layers = _set(ampl, "END_USES_TYPES")
+    resources = _set(ampl, "RESOURCES")
+    processors = _set(ampl, "PROCESSORS")
+    all_layers = _set(ampl, "LAYERS")
+    hours = [int(h) for h in _set(ampl, "HOURS")]
+    tds = [int(td) for td in _set(ampl, "TYPICAL_DAYS")]
+    ht = {"h": hours, "td": tds}
+
+    tech_of = ampl.get_set("TECHNOLOGIES_OF_END_USES_TYPE")
+    main = np.zeros(len(processors), dtype=int)
+    for i, l in enumerate(layers):
+        for j in tech_of.get(l).to_list():
+            main[processors.index(j)] = i
+
+    lio = _param(ampl, "layers_in_out", ["x", "l"], {"x": resources + processors, "l": all_layers})
+    fuels = [all_layers.index(r) for r in resources]
+    outs = [all_layers.index(l) for l in layers]
+    fuel = np.where(np.isin(resources, layers), 0.0, -lio[len(resources):, fuels])
+    out = lio[len(resources):, outs]
+    imports = lio[:len(resources), outs]
+
+    res = {"r": resources}
+    avail = _param(ampl, "avail", ["r"], res)
+    total_time = ampl.get_parameter("total_time").value()
+    F = np.array([capacities.get(p, 0.0) for p in processors])
+    c_p_t = _param(ampl, "c_p_t", ["p", "h", "td"], {"p": processors, **ht}, fill=1.0)
+
+    # daily storages of an end-use layer, except the ones dedicated to a decentralised technology
+    storage_of = ampl.get_set("STORAGE_OF_END_USES_TYPES")
+    dedicated = set()
+    ts_of = ampl.get_set("TS_OF_DEC_TECH")
+    for j in tech_of.get("HEAT_LOW_T_DECEN").to_list():
+        if j != "DEC_SOLAR":
+            dedicated.update(ts_of.get(j).to_list())
+    daily = set(_set(ampl, "STORAGE_DAILY"))
+    storages, storage_layer = [], []
+    for i, l in enumerate(layers):
+        for j in storage_of.get(l).to_list():
+            if j in daily and j not in dedicated:
+                storages.append(j)
+                storage_layer.append(i)
+    sto = {"j": storages}
+    eff_in = _param(ampl, "storage_eff_in", ["j", "l"], {"j": storages, "l": all_layers})
+    eff_out = _param(ampl, "storage_eff_out", ["j", "l"], {"j": storages, "l": all_layers})
+    rows = np.arange(len(storages))
+    cols = [all_layers.index(layers[i]) for i in storage_layer]
+    power = np.array([capacities.get(j, 0.0) for j in storages]) * _param(ampl, "storage_availability", ["j"], sto, 1.0)
+
+    techs = _set(ampl, "TECHNOLOGIES")
+    tech = {"j": techs}
+    F_all = np.array([capacities.get(j, 0.0) for j in techs])
+    fixed_cost = float(((_param(ampl, "tau", ["j"], tech) * _param(ampl, "c_inv", ["j"], tech)
+                         + _param(ampl, "c_maint", ["j"], tech)) * F_all).sum())
+
+    seg = {"c": layers, "n": nodes, **ht}
+    p_pwl = _param(ampl, "p_pwl", ["b", "c", "n", "h", "td"], {"b": [int(b) for b in _set(ampl, "BREAKPOINTS")], **seg})
+    width = _param(ampl, "D", ["k", "c", "n", "h", "td"], {"k": [int(k) for k in _set(ampl, "SEGMENTS")], **seg})
+
+    return System(
+        tuple(layers), tuple(resources), tuple(processors), tuple(storages), tuple(hours), tuple(tds),
+        main, fuel, out, imports, avail / total_time, _param(ampl, "c_op", ["r"], res),
+        F[:, None, None] * c_p_t,
+        np.array(storage_layer, dtype=int), np.array([capacities.get(j, 0.0) for j in storages]),
+        power / _param(ampl, "storage_charge_time", ["j"], sto, 1.0),
+        power / _param(ampl, "storage_discharge_time", ["j"], sto, 1.0),
+        eff_in[rows, cols], eff_out[rows, cols],
+        p_pwl[:, :, 0].swapaxes(0, 1), width[:, :, 0].swapaxes(0, 1),
+        _param(ampl, "w", ["h", "td"], ht) * _param(ampl, "t_op", ["h", "td"], ht, 1.0),
+        fixed_cost, ampl.get_parameter("stepwise_bids").value() == 1,
+    )
+
+
+def read_capacities(data_dir):
+    df = pd.read_csv(os.path.join(data_dir, "F_capacities.csv"))
+    df.columns = ["TECHNOLOGY", "capacity"]  # the exported header is "index,capacity"
+    return dict(zip(df["TECHNOLOGY"], df["capacity"]))
+
+
+def save_system(system, path):
+    np.savez_compressed(path, **{
+        name: np.array(value) for name, value in system.__dict__.items()
+    })
+
+
+def load_system(path):
+    with np.load(path) as f:
+        values = {name: f[name] for name in f.files}
+    for name in ["layers", "resources", "processors", "storages", "hours", "typical_days"]:
+        values[name] = tuple(values[name].tolist())
+    values["fixed_cost"] = float(values["fixed_cost"])
+    values["stepwise"] = bool(values["stepwise"])
+    return System(**values)
+
+
+def run_system(data_dir):
+    """System of a run folder: the run's capacities with the data of its scenario, cached in the folder."""
+    path = os.path.join(data_dir, SYSTEM_FILE)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(os.path.join(data_dir, "F_capacities.csv")):
+        return load_system(path)
+
+    from CaseStudy import load_model
+    from Scenarios import SCENARIOS, ScenarioState, apply_scenario
+
+    with open(os.path.join(data_dir, "last_run.json"), "r") as f:
+        meta = json.load(f)
+    ampl = load_model()
+    apply_scenario(ScenarioState(ampl), SCENARIOS.get(meta.get("scenario")), meta.get("elasticity_tag"),
+                   meta.get("epsilon"), meta.get("stepwise_bids", False))
+    system = system_from_ampl(ampl, read_capacities(data_dir))
+    ampl.close()
+    save_system(system, path)
+    return system
+
+# -------------------------------------------------------------
+# Market clearing, vectorized over leading axes (scenario, hour)
+# -------------------------------------------------------------
+def _bounds(width):
+    end = np.cumsum(width, axis=-1)
+    return end - width, end
+
+
+def _demand_at(price, width, p_hi, p_lo):
+    """Quantity bid at or above each of the ``price`` [..., j] by the segments [..., k]."""
+    c = price[..., :, None]
+    hi, lo = p_hi[..., None, :], p_lo[..., None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = np.where(hi > lo, (hi - c) / (hi - lo), (c < hi).astype(float))
+    return (np.clip(frac, 0.0, 1.0) * width[..., None, :]).sum(axis=-1)
+
+
+def _price_at(quantity, width, p_hi, p_lo):
+    """Demand price just below ``quantity`` [...] on the segments [..., k]."""
+    start, end = _bounds(width)
+    q = quantity[..., None]
+    inside = (q > start) & (q <= end)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price = p_hi - (p_hi - p_lo) * np.where(width > 0, (q - start) / width, 0.0)
+    price = np.where(inside, price, -np.inf).max(axis=-1)
+    return np.where(np.isfinite(price), price, p_hi[..., 0])
+
+
+def clear(cost, cap, width, p_hi, p_lo):
+    """Clear supply steps (``cost``, ``cap`` [..., j]) against decreasing demand segments (``width``
+    bid from ``p_hi`` down to ``p_lo`` [..., k]); returns the price [...], the dispatch of each
+    step [..., j] and the quantity served in each segment [..., k]."""
+    cost, cap = np.broadcast_arrays(cost, cap)
+    order = np.argsort(cost, axis=-1, kind="stable")
+    c = np.take_along_axis(cost, order, axis=-1)
+    q = np.take_along_axis(cap, order, axis=-1)
+    start = np.concatenate([np.zeros(q.shape[:-1] + (1,)), np.cumsum(q[..., :-1], axis=-1)], axis=-1)
+
+    # each step runs up to the demand bid at its own cost
+    run = np.clip(_demand_at(c, width, p_hi, p_lo) - start, 0.0, q)
+    quantity = run.sum(axis=-1)
+    # the price is set by a partly dispatched step, else by the demand between the last running and the first idle step
+    c_lo = np.where(run > 0, c, -np.inf).max(axis=-1)
+    c_hi = np.where(run < q, c, np.inf).min(axis=-1)
+    price = np.minimum(np.maximum(_price_at(quantity, width, p_hi, p_lo), c_lo), c_hi)
+
+    dispatch = np.empty_like(run)
+    np.put_along_axis(dispatch, order, run, axis=-1)
+    seg_start, _ = _bounds(width)
+    served = np.clip(quantity[..., None] - seg_start, 0.0, width)
+    return price, dispatch, served
+
+
+def storage_schedule(price, energy, p_in, p_out, eff_in, eff_out):
+    """Greedy daily arbitrage of one storage on the prices [..., h, td]: the k-th cheapest hour
+    charges for the k-th most expensive one while the spread covers the losses. Returns the
+    (charge, discharge) power [..., h, td]."""
+    day = np.moveaxis(price, -2, -1)  # [..., td, h]
+    order = np.argsort(day, axis=-1)
+    low = np.take_along_axis(day, order, axis=-1)
+    n = day.shape[-1]
+    charge = np.zeros_like(day)
+    discharge = np.zeros_like(day)
+    left = np.full(day.shape[:-1], float(energy))
+    for k in range(n // 2):
+        cheap, dear = order[..., k:k + 1], order[..., n - 1 - k:n - k]
+        stored = np.where(low[..., n - 1 - k] * eff_in * eff_out > low[..., k],
+                          np.minimum(np.minimum(p_in * eff_in, p_out / eff_out), left), 0.0)
+        left = left - stored
+        np.put_along_axis(charge, cheap, (stored / eff_in)[..., None], axis=-1)
+        np.put_along_axis(discharge, dear, (stored * eff_out)[..., None], axis=-1)
+    return np.moveaxis(charge, -1, -2), np.moveaxis(discharge, -1, -2)
+
+# -------------------------------------------------------------
+# Dispatch of the whole system
+# -------------------------------------------------------------
+@dataclass
+class Dispatch:
+    """Merit order results of S price scenarios."""
+    system: System
+    c_op: np.ndarray       # [s, r]
+    price: np.ndarray      # [s, l, h, td] [M€/GWh]
+    activity: np.ndarray   # [s, p, h, td] [GW]
+    imports: np.ndarray    # [s, r, h, td] [GW]
+    demand: np.ndarray     # [s, l, h, td], served consumer demand [GW]
+    charge: np.ndarray     # [s, j, h, td] [GW]
+    discharge: np.ndarray  # [s, j, h, td] [GW]
+    welfare: np.ndarray    # [s], SocialWelfare [M€/year]
+
+    def annual_average_price(self, l):
+        """[s] weighted annual average price of layer ``l`` [€/MWh]."""
+        w = self.system.weight
+        return (self.price[:, self.system.layers.index(l)] * w).sum(axis=(-2, -1)) / w.sum() * 1e3
+
+    def summary(self):
+        df = pd.DataFrame({"SocialWelfare": self.welfare})
+        for l in self.system.layers:
+            df[f"price_{l}"] = self.annual_average_price(l)
+        w = self.system.weight
+        df[[f"c_op_{r}" for r in self.system.resources]] = self.c_op
+        df["production_GWh"] = (self.activity * w).sum(axis=(1, 2, 3))
+        return df
+
+
+def _layer(system, m, c_op, fuel_cost, price, activity, imports, storage):
+    """Clear layer ``m`` for the current prices and activities of the other layers (all [s, t, ...])."""
+    S, T = price.shape[:2]
+    procs = np.flatnonzero(system.main == m)
+    res = np.flatnonzero(system.imports[:, m] > 0)
+    others = np.arange(len(system.layers)) != m
+
+    # supply: processors at fuel cost net of their other end-use flows, direct imports, and
+    # must-take flows of the processors of the other layers (e.g. cogeneration electricity)
+    yield_ = system.out[procs, m]
+    cost = (fuel_cost[:, None, procs] - price[:, :, others] @ system.out[procs][:, others].T) / yield_
+    cap = np.broadcast_to(system.capacity[procs].reshape(len(procs), T).T * yield_, (S, T, len(procs)))
+    imp_cost = np.broadcast_to((c_op[:, res] / system.imports[res, m])[:, None, :], (S, T, len(res)))
+    imp_cap = np.broadcast_to(system.import_rate[res] * system.imports[res, m], (S, T, len(res)))
+    flow = activity[:, :, system.main != m] @ system.out[system.main != m, m]  # [s, t]
+    inject, extra = np.maximum(flow, 0.0), np.maximum(-flow, 0.0)
+
+    p_hi, p_lo = (p[m].reshape(-1, T).T for p in system.bid_prices)
+    width = system.width[m].reshape(-1, T).T
+
+    def _clear(extra, inject):
+        # inelastic demand (other layers' inputs, storage charge) bids VOLL ahead of the consumers
+        voll = p_hi[:, :1]
+        seg_w = np.concatenate([extra[..., None], np.broadcast_to(width, (S, T, width.shape[-1]))], axis=-1)
+        seg_hi = np.broadcast_to(np.concatenate([voll, p_hi], axis=-1), seg_w.shape)
+        seg_lo = np.broadcast_to(np.concatenate([voll, p_lo], axis=-1), seg_w.shape)
+        steps_cost = np.concatenate([np.zeros((S, T, 1)), cost, imp_cost], axis=-1)
+        steps_cap = np.concatenate([inject[..., None], cap, imp_cap], axis=-1)
+        return clear(steps_cost, steps_cap, seg_w, seg_hi, seg_lo)
+
+    result = _clear(extra, inject)
+    sto = np.flatnonzero(system.storage_layer == m)
+    charge = np.zeros((S, T, len(sto)))
+    discharge = np.zeros((S, T, len(sto)))
+    if len(sto):
+        shape = (S,) + system.weight.shape
+        for i, j in enumerate(sto):
+            c, d = storage_schedule(result[0].reshape(shape), system.storage_energy[j], system.storage_in[j],
+                                    system.storage_out[j], system.eff_in[j], system.eff_out[j])
+            charge[..., i], discharge[..., i] = c.reshape(S, T), d.reshape(S, T)
+        result = _clear(extra + charge.sum(axis=-1), inject + discharge.sum(axis=-1))
+
+    p, disp, served = result
+    price[:, :, m] = p
+    activity[:, :, procs] = disp[..., 1:1 + len(procs)] / yield_
+    imports[:, :, res] = disp[..., 1 + len(procs):] / system.imports[res, m]
+    storage[0][:, :, sto], storage[1][:, :, sto] = charge, discharge
+    return served[..., 1:]
+
+
+def _dispatch(system, c_op, iterations):
+    S = c_op.shape[0]
+    T = system.weight.size
+    L, P, R, J = len(system.layers), len(system.processors), len(system.resources), len(system.storages)
+    fuel_cost = c_op @ system.fuel.T  # [s, p]
+    price = np.zeros((S, T, L))
+    activity = np.zeros((S, T, P))
+    imports = np.zeros((S, T, R))
+    storage = (np.zeros((S, T, J)), np.zeros((S, T, J)))
+    served = [None] * L
+
+    # electricity first to price the heat pumps, then heat and electricity in turn
+    order = [m for m in range(L) if system.layers[m] != ELECTRICITY]
+    order += [m for m in range(L) if system.layers[m] == ELECTRICITY]
+    for m in order[-1:] + order * iterations:
+        served[m] = _layer(system, m, c_op, fuel_cost, price, activity, imports, storage)
+
+    # consumer value of the served segments minus resource costs, as in SocialWelfare
+    w = system.weight.reshape(-1)
+    value = np.zeros((S, T))
+    for m in range(L):
+        hi, lo = (p[m].reshape(-1, T).T for p in system.bid_prices)
+        width = system.width[m].reshape(-1, T).T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = np.where(width > 0, (hi - lo) / width, 0.0)
+        x = served[m]
+        value += (hi * x - 0.5 * slope * x ** 2).sum(axis=-1)
+    cost = (activity * fuel_cost[:, None, :]).sum(axis=-1) + (imports * c_op[:, None, :]).sum(axis=-1)
+    welfare = ((value - cost) * w).sum(axis=-1) - system.fixed_cost
+
+    demand = np.stack([served[m].sum(axis=-1) for m in range(L)], axis=-1)
+    shape = system.weight.shape
+    cube = lambda a: np.moveaxis(a, 1, -1).reshape(a.shape[0], a.shape[2], *shape)
+    return cube(price), cube(activity), cube(imports), cube(demand), cube(storage[0]), cube(storage[1]), welfare
+
+
+def dispatch(system, c_op=None, iterations=ITERATIONS, chunk=CHUNK):
+    """Merit order dispatch of ``system`` for resource cost scenarios ``c_op`` [s, r] (default: the base
+    costs), cleared per (h, td) hour without the optimizer."""
+    c_op = np.atleast_2d(system.c_op if c_op is None else c_op).astype(float)
+    parts = [_dispatch(system, c_op[i:i + chunk], iterations) for i in range(0, len(c_op), chunk)]
+    return Dispatch(system, c_op, *(np.concatenate(p, axis=0) for p in zip(*parts)))
+
+
+def sample_c_op(system, n, low=0.7, high=1.3, seed=None):
+    """[n, r] resource costs, each scaled independently on a Latin hypercube over [low, high]."""
+    from MonteCarlo import latin_hypercube
+
+    return system.c_op * (low + latin_hypercube(n, len(system.resources), seed) * (high - low))
+
+
+def compare_run(result, data_dir):
+    """Annual average prices [€/MWh] of the base-cost dispatch against the optimized run."""
+    from Prices import load_price_cube
+
+    cube = load_price_cube(data_dir)
+    return pd.DataFrame([{
+        "layer": l,
+        "merit_order": float(result.annual_average_price(l)[0]),
+        "optimized": cube.annual_average(l),
+    } for l in result.system.layers])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-dispatch the capacities of a solved run under resource cost scenarios.")
+    parser.add_argument("data_dir", help="run folder with F_capacities.csv and last_run.json")
+    parser.add_argument("--scenarios", type=int, default=1000)
+    parser.add_argument("--low", type=float, default=0.7, help="lowest c_op factor")
+    parser.add_argument("--high", type=float, default=1.3, help="highest c_op factor")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    args = parser.parse_args()
+
+    system = run_system(args.data_dir)
+    base = dispatch(system, iterations=args.iterations)
+    print(compare_run(base, args.data_dir).to_string(index=False))
+    print(f"SocialWelfare: {base.welfare[0]:.1f} (merit order)")
+
+    c_op = sample_c_op(system, args.scenarios, args.low, args.high, args.seed)
+    start = time.time()
+    result = dispatch(system, c_op, args.iterations)
+    elapsed = time.time() - start
+    print(f"{args.scenarios} scenarios in {elapsed:.2f} s ({args.scenarios / elapsed:.0f} per second)")
+    result.summary().to_csv(os.path.join(args.data_dir, "merit_order.csv"), index_label="scenario")
+    print(result.summary().describe().T[["mean", "std", "min", "max"]].to_string())
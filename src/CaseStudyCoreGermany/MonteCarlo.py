@@ -0,0 +1,213 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+import Solvers
+from ArrayStore import create_array, open_array
+from Scenarios import SCENARIOS, ScenarioState, apply_scenario
+
+# -------------------------------------------------------------
+# Uncertain parameters
+# -------------------------------------------------------------
+@dataclass(frozen=True)
+class Uncertain:
+    param: str
+    kind: str     # "scale": factor on the (scenario) base values, "value": the parameter itself
+    low: float
+    high: float
+
+
+UNCERTAIN = [
+    Uncertain("c_op", "scale", 0.7, 1.3),
+    Uncertain("c_inv", "scale", 0.8, 1.2),
+    Uncertain("elasticity", "value", -0.10, -0.025),
+    Uncertain("alpha_d", "scale", 0.5, 2.0),
+    Uncertain("VOLL", "scale", 0.5, 2.0),
+]
+
+# -------------------------------------------------------------
+# Sampling on the unit cube
+# -------------------------------------------------------------
+def latin_hypercube(n, d, seed=None):
+    """[n, d] Latin hypercube sample: one point per stratum and dimension, randomly paired."""
+    rng = np.random.default_rng(seed)
+    u = (np.arange(n)[:, None] + rng.random((n, d))) / n
+    return np.take_along_axis(u, rng.random((n, d)).argsort(axis=0), axis=0)
+
+
+def sobol(n, d, seed=None):
+    try:
+        from scipy.stats import qmc
+    except ImportError:
+        raise ImportError("Sobol sampling needs scipy; use method='lhs' otherwise.")
+    return qmc.Sobol(d, scramble=True, seed=seed).random(n)
+
+
+SAMPLERS = {"lhs": latin_hypercube, "sobol": sobol}
+
+
+def draw(n, uncertain=UNCERTAIN, method="lhs", seed=None):
+    u = SAMPLERS[method](n, len(uncertain), seed)
+    low = np.array([p.low for p in uncertain])
+    high = np.array([p.high for p in uncertain])
+    return low + u * (high - low)
+
+
+def sample_overrides(x, uncertain=UNCERTAIN):
+    overrides, scale = {}, {}
+    for p, v in zip(uncertain, x):
+        if p.kind == "scale":
+            scale[p.param] = float(v)
+        else:
+            overrides[p.param] = float(v)
+    if "elasticity" in overrides:
+        overrides["fix_demand"] = 0
+    return overrides, scale
+
+# -------------------------------------------------------------
+# Worker processes: one loaded model each, warm-started from the nominal solution
+# -------------------------------------------------------------
+_worker = {}
+
+
+def _apply_base(state, config):
+    apply_scenario(state, SCENARIOS.get(config["scenario"]), config["elasticity_tag"], config["epsilon"],
+                   config.get("stepwise_bids", False))
+
+
+def _results(ampl, record):
+    from Prices import price_cube_from_ampl
+
+    out = {"status": record.status, "wall_time": record.wall_time}
+    if not record.ok:
+        return out
+    cube = price_cube_from_ampl(ampl)
+    out.update({
+        "TotalCost": ampl.get_variable("TotalCost").value(),
+        "TotalGWP": ampl.get_variable("TotalGWP").value(),
+        "SocialWelfare": ampl.get_objective("SocialWelfare").value(),
+        "F": ampl.get_variable("F").get_values().to_dict(),
+        "price": {l: cube.annual_average(l) for l in cube.layers},
+    })
+    return out
+
+
+def _init_worker(config):
+    from CaseStudy import load_model
+
+    ampl = load_model()
+    state = ScenarioState(ampl)
+    _apply_base(state, config)
+    options = Solvers.SolverOptions(**config["options"])
+    Solvers.solve(ampl, config["backend"], options)  # nominal solution, start point of all samples
+    _worker.update(ampl=ampl, state=state, config=config, options=options)
+
+
+def _solve_sample(i, x):
+    ampl, state, config = _worker["ampl"], _worker["state"], _worker["config"]
+    _apply_base(state, config)
+    state.apply(*sample_overrides(x))
+    record = Solvers.solve(ampl, config["backend"], _worker["options"])
+    return i, _results(ampl, record)
+
+# -------------------------------------------------------------
+# Driver: columnar store filled as samples complete
+# -------------------------------------------------------------
+STATUS = {"solved": 0, "infeasible": 1, "unbounded": 2, "limit": 3, "failure": 4}
+SCALARS = ["TotalCost", "TotalGWP", "SocialWelfare", "wall_time"]
+
+
+def run(out_dir, n, method="lhs", seed=0, workers=None, scenario="NormalPrice",
+        elasticity_tag="elast_5pct", epsilon=None, backend=None, options=None, stepwise_bids=False):
+    """Solve ``n`` parameter samples and stream the results into memory-mapped columns in ``out_dir``."""
+    from CaseStudy import load_model
+
+    options = options or Solvers.SolverOptions(verbose=False)
+    config = {
+        "scenario": scenario, "elasticity_tag": elasticity_tag, "epsilon": epsilon, "stepwise_bids": stepwise_bids,
+        "backend": Solvers.select_backend(backend), "options": asdict(options),
+    }
+    samples = draw(n, UNCERTAIN, method, seed)
+
+    # nominal solve in the driver fixes the column layout (technologies, layers)
+    ampl = load_model()
+    _apply_base(ScenarioState(ampl), config)
+    nominal = _results(ampl, Solvers.solve(ampl, config["backend"], options))
+    ampl.close()
+    techs, layers = list(nominal["F"]), list(nominal["price"])
+
+    base = lambda name: os.path.join(out_dir, name)
+    params = create_array(base("params"), (n, len(UNCERTAIN)), ["sample", "param"],
+                          {"param": [p.param for p in UNCERTAIN]})
+    params.data[:] = samples
+    status = create_array(base("status"), (n,), ["sample"], {}, dtype="int8", fill=-1)
+    scalars = {k: create_array(base(k), (n,), ["sample"], {}) for k in SCALARS}
+    F = create_array(base("F"), (n, len(techs)), ["sample", "tech"], {"tech": techs})
+    price = create_array(base("price"), (n, len(layers)), ["sample", "l"], {"l": layers})
+    with open(base("config.json"), "w") as f:
+        json.dump({**config, "n": n, "method": method, "seed": seed,
+                   "uncertain": [asdict(p) for p in UNCERTAIN], "nominal": nominal}, f, indent=2)
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(config,)) as pool:
+        futures = [pool.submit(_solve_sample, i, x) for i, x in enumerate(samples)]
+        for done, fut in enumerate(as_completed(futures), 1):
+            i, res = fut.result()
+            status.data[i] = STATUS.get(res["status"], STATUS["failure"])
+            scalars["wall_time"].data[i] = res["wall_time"]
+            if res["status"] == "solved":
+                for k in SCALARS[:-1]:
+                    scalars[k].data[i] = res[k]
+                F.data[i] = [res["F"].get(t, np.nan) for t in techs]
+                price.data[i] = [res["price"].get(l, np.nan) for l in layers]
+            if done % 10 == 0 or done == n:
+                for col in [status, F, price, *scalars.values()]:
+                    col.data.flush()
+                print(f"{done}/{n} samples")
+
+    summary = summarize(out_dir)
+    summary.to_csv(base("distribution_summary.csv"))
+    return summary
+
+
+def summarize(out_dir):
+    """Mean, standard deviation and percentiles of the solved samples."""
+    base = lambda name: os.path.join(out_dir, name)
+    solved = np.asarray(open_array(base("status")).data) == STATUS["solved"]
+    columns = {k: np.asarray(open_array(base(k)).data)[solved] for k in SCALARS[:-1]}
+    for name, label in [("F", "F"), ("price", "price")]:
+        arr = open_array(base(name))
+        dim = arr.dims[1]
+        for j, lab in enumerate(arr.coords[dim]):
+            columns[f"{label}[{lab}]"] = np.asarray(arr.data)[solved, j]
+
+    df = pd.DataFrame(columns)
+    summary = df.describe(percentiles=[0.05, 0.5, 0.95]).T
+    summary["solved_share"] = solved.mean()
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+    from Scenarios import ELASTICITIES
+
+    parser = argparse.ArgumentParser(description="Monte Carlo sampling of cost and demand parameters.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--n", type=int, default=100)
+    parser.add_argument("--method", choices=list(SAMPLERS), default="lhs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--scenario", choices=list(SCENARIOS), default="NormalPrice")
+    parser.add_argument("--elasticity", choices=list(ELASTICITIES), default="elast_5pct")
+    parser.add_argument("--epsilon", type=float, default=None)
+    parser.add_argument("--stepwise-bids", action="store_true", help="LP with flat bid blocks, much faster per sample")
+    Solvers.add_arguments(parser)
+    args = parser.parse_args()
+
+    options = Solvers.options_from_args(args)
+    options.verbose = False
+    print(run(args.out_dir, args.n, args.method, args.seed, args.workers, args.scenario,
+              args.elasticity, args.epsilon, args.solver, options, args.stepwise_bids).to_string())
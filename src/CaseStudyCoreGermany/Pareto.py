@@ -1,56 +1,49 @@
 import os
-import subprocess
+import argparse
 import json
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
+import Solvers
+from Scaling import row_scale_overrides
+from Scenarios import (ELASTICITIES, SCENARIOS, EUR_PER_T, ScenarioState, apply_scenario, carbon_folder,
+                       carbon_price_overrides, metadata, run_folder)
+from SweepRunner import SweepRunner, model_digest
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
-dat_file = os.path.join(script_dir, "CaseStudy.dat")
-case_script = os.path.join(script_dir, "CaseStudy.py")
-data_dir = os.path.join(script_dir, "Data")
 output_dir  = os.path.join(script_dir, "Results", "Figures", "Pareto")
-os.makedirs(output_dir, exist_ok=True)
 
-def set_epsilon(eps_value, enable=True):
-    with open(dat_file, "r") as f:
-        lines = f.readlines()
-
-    with open(dat_file, "w") as f:
-        for line in lines:
-            if line.strip().startswith("param use_epsilon"):
-                f.write(f"param use_epsilon := {1 if enable else 0};\n")
-            elif line.strip().startswith("param epsilon_value"):
-                f.write(f"param epsilon_value := {eps_value};\n")
-            else:
-                f.write(line)
-
-def set_elasticity(eps):
-    # Important: epsilon must be disabled before changing elasticity
-    set_epsilon(1e12, enable=False)
-
-    with open(dat_file, "r") as f:
-        lines = f.readlines()
-
-    with open(dat_file, "w") as f:
-        for line in lines:
-            if line.strip().startswith("param elasticity"):
-                if eps == "HARD":
-                    f.write("param elasticity := -0.02;\n")
-                else:
-                    f.write(f"param elasticity := {eps};\n")
-            elif line.strip().startswith("param fix_demand"):
-                f.write("param fix_demand := 1;\n" if eps == "HARD" else "param fix_demand := 0;\n")
-            else:
-                f.write(line)
+parser = argparse.ArgumentParser(description="SW vs. GWP Pareto front per elasticity; other flags are passed to CaseStudy.py.")
+parser.add_argument("--scenario", choices=list(SCENARIOS), default=None)
+parser.add_argument("--epsilons", type=float, nargs="+", default=None, help="explicit emission caps instead of linspace")
+parser.add_argument("--adaptive", action="store_true", help="place epsilons where the front bends instead of evenly")
+parser.add_argument("--tol", type=float, default=0.005, help="adaptive: max chord-to-front gap, share of the welfare range")
+parser.add_argument("--f-tol", type=float, default=0.25, help="adaptive: max relative capacity change between neighbours")
+parser.add_argument("--budget", type=int, default=10, help="adaptive: max solves per elasticity besides the anchors")
+parser.add_argument("--timeout", type=float, default=None, help="[s] per solve attempt, retried with other solver flags")
+parser.add_argument("--fresh-anchors", action="store_true", help="ignore cached anchor solutions")
+parser.add_argument("--carbon-prices", type=float, nargs="*", default=None,
+                    help="[€/tCO2-eq.] trace the front with a carbon charge instead of caps (default list without values)")
+parser.add_argument("--cross-check", action="store_true",
+                    help="carbon prices: re-solve each point as a cap and compare welfare and the cap's dual")
+args, solver_args = parser.parse_known_args()  # e.g. --solver highs --method barrier
+if args.scenario:
+    solver_args = ["--scenario", args.scenario] + solver_args
+
+# runs of different scenarios must not overwrite each other (and their cached anchors)
+data_dir = os.path.join(script_dir, "Data", *([SCENARIOS[args.scenario].folder()] if args.scenario else []))
+anchor_file = os.path.join(data_dir, "pareto_anchors.json")
+runner = SweepRunner(data_dir, args.timeout)
+os.makedirs(output_dir, exist_ok=True)
 
 # def run_model():
 #     subprocess.run(["python", case_script], check=True)
 
-def run_model_with_folder(folder_name):
-    folder_path = os.path.join(data_dir, folder_name)
-    os.makedirs(folder_path, exist_ok=True)
-    subprocess.run(["python", case_script, folder_path], check=True)
-    return folder_path
+def run_model_with_folder(folder_name, case_args):
+    # scenario settings are applied in memory by CaseStudy.py, the .dat files stay untouched;
+    # points already solved with the same inputs are skipped when the sweep is restarted
+    runner.run(folder_name, case_args + solver_args)
+    return os.path.join(data_dir, folder_name)
 
 # def get_results():
 #     fname = os.path.join(data_dir, "last_run.json")
@@ -66,64 +59,314 @@ def get_results(folder):
     with open(fname, "r") as f:
         return json.load(f)
 
-elasticities = {
-    -0.10: "elast_10pct",
-    -0.05: "elast_5pct",
-    -0.025: "elast_2_5pct",
-    "HARD": "demand_fixed"
-}
+
+def get_status(folder):
+    """Solve status of a run folder from its solve_record.json; 'failure' if CaseStudy.py crashed before."""
+    fname = os.path.join(folder, "solve_record.json")
+    if not os.path.exists(fname):
+        return {"status": "failure", "message": "no solve_record.json, CaseStudy.py did not finish"}
+    with open(fname, "r") as f:
+        record = json.load(f)
+    return {"status": record["status"], "message": record["message"], "wall_time": record["wall_time"]}
+
+
+def get_capacities(folder):
+    df = pd.read_csv(os.path.join(folder, "F_capacities.csv"))
+    return dict(zip(df["index"], df["capacity"]))
+
+
+def log_point(eps_tag, epsilon, status, source):
+    entry = {"epsilon": epsilon, "source": source, **status}
+    point_log[eps_tag].append(entry)
+    if status["status"] != "solved":
+        print(f"    {status['status']} for ε = {epsilon} ({source}): {status.get('message', '')}")
+
+
+def solve_point(eps_tag, epsilon):
+    """Front point at emission cap ``epsilon`` (None: no cap), or None if not solved.
+    Caps below the min-GWP bound are rejected without a solve, caps above the max-welfare anchor reuse it."""
+    anchors = all_anchors.get(eps_tag)
+    if anchors is not None and epsilon is not None:
+        if epsilon < anchors["gwp_min"] - GWP_TOL:
+            log_point(eps_tag, epsilon, {"status": "infeasible",
+                                         "message": f"below the lowest reachable emissions {anchors['gwp_min']:.2f}"}, "prescreen")
+            return None
+        if epsilon >= anchors["max_sw"]["TotalGWP"]:
+            log_point(eps_tag, epsilon, {"status": "solved", "message": "cap not binding"}, "anchor")
+            return dict(anchors["max_sw"], epsilon=epsilon, added_by="anchor")
+
+    eps_arg = "none" if epsilon is None else str(epsilon)
+    folder_path = run_model_with_folder(run_folder(eps_tag, epsilon), ["--elasticity", eps_tag, "--epsilon", eps_arg])
+    status = get_status(folder_path)
+    log_point(eps_tag, epsilon, status, "solve")
+    if status["status"] != "solved":
+        return None
+    r = get_results(folder_path)
+    r["epsilon"] = epsilon
+    r["elasticity_tag"] = eps_tag
+    r["_F"] = get_capacities(folder_path)
+    return r
+
+# -------------------------------------------------------------
+# Anchors, cached per scenario and elasticity
+# -------------------------------------------------------------
+GWP_TOL = 1e-6      # [ktCO2-eq./year], slack on the min-GWP bound against solver tolerances
+
+
+def anchor_signature():
+    """Content of the model, scenario and export files (as in the sweep journal) and the solver flags
+    the cached anchors were computed with."""
+    return {"model": model_digest(), "args": solver_args}
+
+
+def load_anchor_cache():
+    if args.fresh_anchors or not os.path.exists(anchor_file):
+        return {}
+    with open(anchor_file, "r") as f:
+        cache = json.load(f)
+    return cache if cache.get("signature") == anchor_signature() else {}
+
+
+def save_anchor_cache(cache):
+    cache["signature"] = anchor_signature()
+    with open(anchor_file, "w") as f:
+        json.dump(cache, f, indent=4)
+
+
+def compute_anchors(eps_tag):
+    """Lowest reachable emissions (LP feasibility bound), then the max-welfare point without cap and at that bound.
+    Returns None if the model is infeasible for this elasticity."""
+    print("Running feasibility bound: min emissions (LP)")
+    folder_path = run_model_with_folder(f"{eps_tag}_min_gwp",
+                                        ["--elasticity", eps_tag, "--objective", "min_gwp", "--no-tables"])
+    status = get_status(folder_path)
+    log_point(eps_tag, "min_gwp", status, "solve")
+    if status["status"] != "solved":
+        return None
+    gwp_min = get_results(folder_path)["TotalGWP"]
+
+    print("Running anchor: max social welfare (high emissions)")
+    max_sw = solve_point(eps_tag, None)
+    print("Running anchor: min emissions (low social welfare)")
+    min_gwp = solve_point(eps_tag, gwp_min + GWP_TOL)
+    if max_sw is None or min_gwp is None:
+        return None
+    return {"gwp_min": gwp_min, "max_sw": max_sw, "min_gwp": min_gwp}
+
+# -------------------------------------------------------------
+# Adaptive placement of the epsilon points
+# -------------------------------------------------------------
+MIN_GAP = 0.01      # [-], intervals narrower than this share of the GWP range are not split
+F_FLOOR = 1e-3      # [GW] or [GWh], capacities below are treated as zero
+
+
+def chord_error(p, q):
+    """Gap between the chord p-q and the front, bounded by the tangents at both ends
+    (slopes dSW/dGWP = gwp_dual; the front is concave). Returns (gap, GWP where it is attained);
+    gap is NaN if the slopes are unknown."""
+    x0, y0, x1, y1 = p["TotalGWP"], p["SocialWelfare"], q["TotalGWP"], q["SocialWelfare"]
+    s0, s1 = p.get("gwp_dual"), q.get("gwp_dual")
+    if s0 is None or s1 is None:
+        return np.nan, 0.5 * (x0 + x1)
+    if s0 - s1 <= 1e-12:  # parallel tangents: the front is linear here
+        return 0.0, 0.5 * (x0 + x1)
+    xt = np.clip((y1 - y0 + s0 * x0 - s1 * x1) / (s0 - s1), x0, x1)
+    chord = y0 + (y1 - y0) * (xt - x0) / (x1 - x0)
+    return max(y0 + s0 * (xt - x0) - chord, 0.0), float(xt)
+
+
+def capacity_change(p, q):
+    """Largest relative change of an installed capacity between two front points."""
+    change = 0.0
+    for j in set(p["_F"]) | set(q["_F"]):
+        a, b = p["_F"].get(j, 0.0), q["_F"].get(j, 0.0)
+        change = max(change, abs(a - b) / max(abs(a), abs(b), F_FLOOR))
+    return change
+
+
+def refine(eps_tag, front):
+    """Add epsilon points to the interval with the largest chord gap or capacity change until both are
+    within tolerance or the budget is spent. Returns the decisions taken."""
+    gwp_range = max(p["TotalGWP"] for p in front) - min(p["TotalGWP"] for p in front)
+    sw_range = max(p["SocialWelfare"] for p in front) - min(p["SocialWelfare"] for p in front)
+    decisions, stop = [], "budget"
+    while len(decisions) < args.budget:
+        front.sort(key=lambda p: p["TotalGWP"])
+        best = None
+        for p, q in zip(front, front[1:]):
+            width = q["TotalGWP"] - p["TotalGWP"]
+            if width < MIN_GAP * gwp_range:
+                continue
+            gap, x = chord_error(p, q)
+            dF = capacity_change(p, q)
+            score_gap = np.inf if np.isnan(gap) else gap / max(args.tol * sw_range, 1e-9)
+            score = max(score_gap, dF / args.f_tol)
+            if best is None or score > best["score"]:
+                if score_gap < dF / args.f_tol:
+                    x = 0.5 * (p["TotalGWP"] + q["TotalGWP"])  # a capacity switch: bisect
+                x = float(np.clip(x, p["TotalGWP"] + 0.1 * width, q["TotalGWP"] - 0.1 * width))
+                best = {
+                    "score": float(score), "interval": [p["TotalGWP"], q["TotalGWP"]], "epsilon": x,
+                    "chord_gap": None if np.isnan(gap) else float(gap), "capacity_change": float(dF),
+                    "reason": "chord_gap" if score_gap >= dF / args.f_tol else "capacity_change",
+                }
+        if best is None or best["score"] <= 1.0:
+            stop = "tolerance"
+            break
+
+        print(f"  ε = {best['epsilon']:.1f} ({best['reason']}, score {best['score']:.2f})")
+        r = solve_point(eps_tag, best["epsilon"])
+        best["status"] = "solved" if r is not None else "infeasible"
+        decisions.append(best)
+        if r is None:
+            print(f"    Infeasible for ε = {best['epsilon']:.1f}")
+            break
+        r["added_by"] = best["reason"]
+        front.append(r)
+    return {"tol": args.tol, "f_tol": args.f_tol, "budget": args.budget,
+            "solves": len(decisions), "stop": stop, "decisions": decisions}
+
+# -------------------------------------------------------------
+# Carbon-price sweep: SocialWelfare - lambda * TotalGWP, feasible at every lambda
+# -------------------------------------------------------------
+CARBON_PRICES = [0, 25, 50, 75, 100, 150, 200, 300, 500, 1000]  # [€/tCO2-eq.]
+carbon_model = {}
+
+
+def solver_setup():
+    """Backend and options of the in-process solves, from the flags passed on to CaseStudy.py."""
+    solver_parser = argparse.ArgumentParser(add_help=False)
+    Solvers.add_arguments(solver_parser)
+    known, _ = solver_parser.parse_known_args(solver_args)
+    return known.solver, Solvers.options_from_args(known)
+
+
+def carbon_price_sweep(eps_tag, prices):
+    """Front points for increasing carbon prices on one loaded model: each solve starts from the previous
+    optimum (basis for simplex, primal-dual point otherwise). At price lambda the point is the optimum under
+    the cap TotalGWP <= its own emissions, and lambda [M€/ktCO2-eq.] is the slope of the front there.
+    Prices that land on an already found point (a kink of the front) add no point."""
+    from CaseStudy import export_results, load_model
+
+    if not carbon_model:
+        ampl = load_model()
+        carbon_model.update(ampl=ampl, state=ScenarioState(ampl), solver=solver_setup())
+    ampl, state = carbon_model["ampl"], carbon_model["state"]
+    backend, options = carbon_model["solver"]
+
+    front = []
+    for price in sorted(prices):
+        print(f"  λ = {price:g} €/tCO2-eq.")
+        apply_scenario(state, SCENARIOS.get(args.scenario), eps_tag, None)
+        state.apply(carbon_price_overrides(price))
+        if "--row-scale" in solver_args:
+            state.apply(row_scale_overrides(ampl))
+        record = Solvers.solve(ampl, backend, options)
+        folder_path = os.path.join(data_dir, carbon_folder(eps_tag, price))
+        meta = dict(metadata(SCENARIOS.get(args.scenario), eps_tag, None), carbon_price_eur_per_t=price)
+        export_results(ampl, folder_path, record, meta)
+        status = get_status(folder_path)
+        log_point(eps_tag, None, dict(status, carbon_price=price), "carbon_price")
+        if status["status"] != "solved":
+            continue
+        r = get_results(folder_path)
+        if front and abs(r["TotalGWP"] - front[-1]["TotalGWP"]) <= GWP_TOL:
+            front[-1]["carbon_price_max"] = price
+            continue
+        r["gwp_dual"] = r["carbon_price"]  # supporting slope dSW/dGWP, comparable with the cap's dual
+        r["added_by"] = "carbon_price"
+        r["_F"] = get_capacities(folder_path)
+        front.append(r)
+    state.revert()
+    return front
+
+
+def cross_check(eps_tag, front):
+    """Solve each priced point again as a cap at its emissions: welfare should match and the cap's dual
+    should equal the price (at a kink, lie between the neighbouring prices)."""
+    rows = []
+    for p in front:
+        if p["carbon_price"] <= 0:
+            continue
+        r = solve_point(eps_tag, p["TotalGWP"] + GWP_TOL)
+        rows.append({
+            "carbon_price_eur_per_t": p["carbon_price_eur_per_t"], "TotalGWP": p["TotalGWP"],
+            "SocialWelfare_price": p["SocialWelfare"], "SocialWelfare_cap": None if r is None else r["SocialWelfare"],
+            "welfare_gap": None if r is None else r["SocialWelfare"] - p["SocialWelfare"],
+            "gwp_dual_eur_per_t": None if r is None else r["gwp_dual"] / EUR_PER_T,
+        })
+    with open(os.path.join(output_dir, f"pareto_crosscheck_{eps_tag}.json"), "w") as f:
+        json.dump(rows, f, indent=4)
+    return rows
+
 
 N_POINTS = 5
 all_fronts = {}
+all_anchors = {}
+point_log = {}
+anchor_cache = load_anchor_cache()
 
-for eps, eps_tag in elasticities.items():
+for eps_tag in ELASTICITIES:
     print(f"\n=== ELASTICITY {eps_tag} ===")
     all_fronts[eps_tag] = []
+    point_log[eps_tag] = []
 
-    set_elasticity(eps)
+    if args.carbon_prices is not None:
+        prices = args.carbon_prices or CARBON_PRICES
+        all_fronts[eps_tag] = carbon_price_sweep(eps_tag, prices)
+        front = [{k: v for k, v in p.items() if k != "_F"} for p in sorted(all_fronts[eps_tag], key=lambda p: p["TotalGWP"])]
+        with open(os.path.join(output_dir, f"pareto_SW_vs_GWP_{eps_tag}.json"), "w") as f:
+            json.dump(front, f, indent=4)
+        with open(os.path.join(output_dir, f"pareto_sweep_{eps_tag}.json"), "w") as f:
+            json.dump({"anchors": None, "carbon_prices": sorted(prices),
+                       "points": point_log[eps_tag], "refinement": None}, f, indent=4)
+        if args.cross_check:
+            for row in cross_check(eps_tag, front):
+                print(f"  λ = {row['carbon_price_eur_per_t']:g}: welfare gap {row['welfare_gap']}, "
+                      f"cap dual {row['gwp_dual_eur_per_t']} €/tCO2-eq.")
+        continue
 
-    # Anchor 1
-    print("Running anchor: max social welfare (high emissions)")
-    set_epsilon(1e12, enable=False)
-    folder = f"{eps_tag}_eps_NONE"
-    folder_path = run_model_with_folder(folder)
-    anchor_maxSW = get_results(folder_path)
-    gwp_high = anchor_maxSW["TotalGWP"]
+    key = f"{args.scenario}/{eps_tag}"
+    cached = key in anchor_cache
+    if cached:
+        print("Reusing cached anchors")
+        anchors = anchor_cache[key]
+        log_point(eps_tag, None, {"status": "solved", "message": "cached"}, "cache")
+    else:
+        anchors = compute_anchors(eps_tag)
+        if anchors is None:
+            print("    No feasible anchors, skipping this elasticity")
+            with open(os.path.join(output_dir, f"pareto_sweep_{eps_tag}.json"), "w") as f:
+                json.dump({"anchors": None, "points": point_log[eps_tag], "refinement": None}, f, indent=4)
+            continue
+        anchor_cache[key] = anchors
+        save_anchor_cache(anchor_cache)
+    all_anchors[eps_tag] = anchors
 
-    anchor_maxSW["epsilon"] = None
-    anchor_maxSW["elasticity_tag"] = eps_tag
-    all_fronts[eps_tag].append(anchor_maxSW)
+    gwp_high = anchors["max_sw"]["TotalGWP"]
+    gwp_low = anchors["min_gwp"]["TotalGWP"]
+    all_fronts[eps_tag] += [dict(anchors["max_sw"], added_by="anchor"), dict(anchors["min_gwp"], added_by="anchor")]
 
-    # Anchor 2
-    print("Running anchor: min emissions (low social welfare)")
-    set_epsilon(0.0, enable=True)
-    folder = f"{eps_tag}_eps_{0.0:.2f}"
-    folder_path = run_model_with_folder(folder)
-    anchor_minGWP = get_results(folder_path)
-    gwp_low = anchor_minGWP["TotalGWP"]
-
-    anchor_minGWP["epsilon"] = 0.0
-    anchor_minGWP["elasticity_tag"] = eps_tag
-    all_fronts[eps_tag].append(anchor_minGWP)
-
-
-    epsilons = np.linspace(gwp_low, gwp_high, N_POINTS)[1:-1]
-
-    for e in epsilons:
-        print(f"  ε = {e:.1f}")
-        set_epsilon(float(e), enable=True)
-        folder = f"{eps_tag}_eps_{e:.2f}"
-        folder_path = run_model_with_folder(folder)
-        try:
-            r = get_results(folder_path)
-        except:
-            print(f"    Infeasible for ε = {e:.1f}")
-            continue
-        r["epsilon"] = float(e)
-        r["elasticity_tag"] = eps_tag
-        all_fronts[eps_tag].append(r)
+    if args.adaptive:
+        refinement = refine(eps_tag, all_fronts[eps_tag])
+        print(f"  stopped on {refinement['stop']} after {refinement['solves']} solves")
+    else:
+        refinement = None
+        epsilons = args.epsilons if args.epsilons else np.linspace(gwp_low, gwp_high, N_POINTS)[1:-1]
+
+        for e in epsilons:
+            print(f"  ε = {e:.1f}")
+            r = solve_point(eps_tag, float(e))
+            if r is None:
+                continue
+            r.setdefault("added_by", "epsilons" if args.epsilons else "linspace")
+            all_fronts[eps_tag].append(r)
 
     all_fronts[eps_tag] = sorted(all_fronts[eps_tag], key=lambda p: p["TotalGWP"])
+    front = [{k: v for k, v in p.items() if k != "_F"} for p in all_fronts[eps_tag]]
 
     with open(os.path.join(output_dir, f"pareto_SW_vs_GWP_{eps_tag}.json"), "w") as f:
-        json.dump(all_fronts[eps_tag], f, indent=4)
+        json.dump(front, f, indent=4)
+    with open(os.path.join(output_dir, f"pareto_sweep_{eps_tag}.json"), "w") as f:
+        json.dump({"anchors": {"gwp_min": anchors["gwp_min"], "cached": cached},
+                   "points": point_log[eps_tag], "refinement": refinement}, f, indent=4)
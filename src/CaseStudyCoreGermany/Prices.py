@@ -0,0 +1,197 @@
+import json
+import os
+import sys
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+from Cubes import ampl_cube, to_cube
+
+PRICE_CUBE_FILE = "price_cube.npz"
+EUR_PER_MWH_PER_M_EUR_PER_GWH = 1e3
+VERTEX_PRICE_TOL = 1e-6  # [€/MWh], numerical zero for vertex (crossover) duals
+IPM_PRICE_TOL = 1e-2     # [€/MWh], residual complementarity of interior-point duals
+
+# -------------------------------------------------------------
+# Price cube
+# -------------------------------------------------------------
+@dataclass(frozen=True)
+class PriceCube:
+    """Nodal prices from the ``balance`` duals, dense over [l, n, h, td]."""
+    layers: tuple
+    nodes: tuple
+    hours: tuple
+    typical_days: tuple
+    dual: np.ndarray    # [l, n, h, td], raw balance dual [M€/year per GW]
+    weight: np.ndarray  # [h, td], w * t_op [h/year]
+
+    @property
+    def m_eur_per_gwh(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.weight > 0, self.dual / self.weight, 0.0)
+
+    @property
+    def eur_per_mwh(self):
+        return self.m_eur_per_gwh * EUR_PER_MWH_PER_M_EUR_PER_GWH
+
+    def values(self, unit="eur_per_mwh"):
+        if unit == "eur_per_mwh":
+            return self.eur_per_mwh
+        if unit == "m_eur_per_gwh":
+            return self.m_eur_per_gwh
+        raise ValueError(f"Unknown price unit: {unit}")
+
+    def layer(self, l, node=None, unit="eur_per_mwh"):
+        """[h, td] price array of one layer at one node (first node by default)."""
+        n = 0 if node is None else self.nodes.index(node)
+        return self.values(unit)[self.layers.index(l), n]
+
+    def at(self, l, n, h, td, unit="eur_per_mwh"):
+        return float(self.values(unit)[
+            self.layers.index(l), self.nodes.index(n),
+            self.hours.index(h), self.typical_days.index(td)
+        ])
+
+    def hourly_average(self, l, node=None, unit="eur_per_mwh"):
+        """[h] price averaged over typical days with the yearly weights."""
+        return (self.layer(l, node, unit) * self.weight).sum(axis=1) / self.weight.sum(axis=1)
+
+    def annual_average(self, l, node=None, unit="eur_per_mwh"):
+        return float((self.layer(l, node, unit) * self.weight).sum() / self.weight.sum())
+
+    def annual_hours(self, mask):
+        """Hours per year for which the [h, td] boolean ``mask`` holds."""
+        return float(self.weight[mask].sum())
+
+    def snapped(self, tol=IPM_PRICE_TOL):
+        """Copy with prices below ``tol`` [€/MWh] in magnitude set to exactly zero.
+
+        Interior-point duals of hours with slack supply stay slightly positive instead of
+        reaching the zero of the vertex solution; this is where they differ most."""
+        return replace(self, dual=np.where(np.abs(self.eur_per_mwh) < tol, 0.0, self.dual))
+
+    def to_frame(self):
+        """Long table in the layout of the legacy price.csv."""
+        idx = pd.MultiIndex.from_product(
+            [self.layers, self.nodes, self.hours, self.typical_days], names=["p", "n", "h", "td"]
+        )
+        df = idx.to_frame(index=False)
+        df["dual_raw"] = self.dual.ravel()
+        df["weight"] = np.broadcast_to(self.weight, self.dual.shape).ravel()
+        df["price_M€_per_GWh"] = self.m_eur_per_gwh.ravel()
+        df["price_€_per_MWh"] = self.eur_per_mwh.ravel()
+        return df
+
+# -------------------------------------------------------------
+# Build from a solved model
+# -------------------------------------------------------------
+def price_cube_from_ampl(ampl):
+    dims = ["l", "n", "h", "td"]
+    coords = {
+        "l": ampl.get_set("LAYERS").get_values().to_list(),
+        "n": ampl.get_set("NODES").get_values().to_list(),
+        "h": [int(h) for h in ampl.get_set("HOURS").get_values().to_list()],
+        "td": [int(td) for td in ampl.get_set("TYPICAL_DAYS").get_values().to_list()],
+    }
+    dual, _ = ampl_cube(ampl.get_constraint("balance"), dims, "dual", coords)
+    w, _ = ampl_cube(ampl.get_parameter("w"), ["h", "td"], coords={"h": coords["h"], "td": coords["td"]})
+    t_op, _ = ampl_cube(ampl.get_parameter("t_op"), ["h", "td"], coords={"h": coords["h"], "td": coords["td"]})
+    return PriceCube(
+        tuple(coords["l"]), tuple(coords["n"]), tuple(coords["h"]), tuple(coords["td"]),
+        dual, w * t_op
+    )
+
+# -------------------------------------------------------------
+# Interior-point vs. vertex prices
+# -------------------------------------------------------------
+def price_tolerance(data_dir):
+    """Numerical zero for the prices of a run: larger if it was solved without crossover."""
+    path = os.path.join(data_dir, "solve_record.json")
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            if json.load(f).get("crossover") is False:
+                return IPM_PRICE_TOL
+    return VERTEX_PRICE_TOL
+
+
+def price_error(cube, reference, unit="eur_per_mwh"):
+    """Per-layer error of ``cube`` (e.g. barrier without crossover) against ``reference``
+    (crossover solution of the same model), in ``unit``."""
+    diff = np.abs(cube.values(unit) - reference.values(unit))
+    weight = reference.weight
+    zero = np.abs(cube.eur_per_mwh) < IPM_PRICE_TOL
+    zero_ref = np.abs(reference.eur_per_mwh) < IPM_PRICE_TOL
+    rows = []
+    for i, l in enumerate(reference.layers):
+        for j, n in enumerate(reference.nodes):
+            ref_avg = reference.annual_average(l, n, unit)
+            avg = cube.annual_average(l, n, unit)
+            rows.append({
+                "layer": l,
+                "node": n,
+                "max_abs": float(diff[i, j].max()),
+                "mean_abs": float((diff[i, j] * weight).sum() / weight.sum()),
+                "annual_average": avg,
+                "annual_average_ref": ref_avg,
+                "rel_error_annual_average": abs(avg - ref_avg) / abs(ref_avg) if ref_avg else np.nan,
+                "hours_zero_mismatch": cube.annual_hours(zero[i, j] != zero_ref[i, j]),
+            })
+    return pd.DataFrame(rows)
+
+# -------------------------------------------------------------
+# Storage
+# -------------------------------------------------------------
+def save_price_cube(cube, data_dir):
+    np.savez_compressed(
+        os.path.join(data_dir, PRICE_CUBE_FILE),
+        layers=np.array(cube.layers), nodes=np.array(cube.nodes),
+        hours=np.array(cube.hours), typical_days=np.array(cube.typical_days),
+        dual=cube.dual, weight=cube.weight,
+    )
+
+
+def _cube_from_legacy(df, weight_col):
+    df = df.rename(columns={"p": "l"})
+    dims = ["l", "n", "h", "td"]
+    dual, coords = to_cube(df, dims, "dual_raw")
+    weights = df.drop_duplicates(["h", "td"]).assign(weight=lambda x: x[weight_col] * x["t_op"])
+    weight, _ = to_cube(weights, ["h", "td"], "weight", {"h": coords["h"], "td": coords["td"]})
+    return PriceCube(
+        tuple(coords["l"]), tuple(coords["n"]), tuple(int(h) for h in coords["h"]),
+        tuple(int(td) for td in coords["td"]), dual, weight
+    )
+
+
+def load_price_cube(data_dir):
+    """Price cube of a run folder; falls back to price.csv / dual_vals.csv of older runs."""
+    path = os.path.join(data_dir, PRICE_CUBE_FILE)
+    if os.path.exists(path):
+        with np.load(path) as f:
+            return PriceCube(
+                tuple(f["layers"].tolist()), tuple(f["nodes"].tolist()),
+                tuple(f["hours"].tolist()), tuple(f["typical_days"].tolist()),
+                f["dual"], f["weight"]
+            )
+
+    price_path = os.path.join(data_dir, "price.csv")
+    if os.path.exists(price_path):
+        df = pd.read_csv(price_path)
+        return _cube_from_legacy(df, "w" if "w" in df.columns else "mult")
+
+    dual_path = os.path.join(data_dir, "dual_vals.csv")
+    if os.path.exists(dual_path):
+        df = pd.read_csv(dual_path)
+        weight_file = "w.csv" if os.path.exists(os.path.join(data_dir, "w.csv")) else "mult.csv"
+        weights = pd.read_csv(os.path.join(data_dir, weight_file))
+        t_op = pd.read_csv(os.path.join(data_dir, "t_op.csv"))
+        df = df.merge(weights, on=["h", "td"]).merge(t_op, on=["h", "td"])
+        return _cube_from_legacy(df, weights.columns[-1])
+
+    raise FileNotFoundError(f"No price results found in {data_dir}")
+
+
+if __name__ == "__main__":
+    # python Prices.py <run solved without crossover> <same run solved with crossover>
+    err = price_error(load_price_cube(sys.argv[1]), load_price_cube(sys.argv[2]))
+    print(err.to_string(index=False))
@@ -0,0 +1,184 @@
+import json
+import os
+import re
+import sqlite3
+from functools import cached_property
+
+import pandas as pd
+
+from Prices import load_price_cube
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+default_root = os.path.join(script_dir, "..", "..", "results")
+
+INDEX_FILE = "run_catalog.sqlite"
+# <tag>_eps_<cap> of the epsilon sweep, <tag>_co2_<price> of the carbon-price sweep
+RUN_FOLDER = re.compile(r"^(?P<tag>.+)_(?P<kind>eps|co2)_(?P<eps>NONE|None|-?[0-9.]+)$")
+ENERGYSCOPE_FILE = re.compile(r"^run_results_(?P<eps>None|NONE|-?[0-9.]+)\.csv$")
+
+COLUMNS = {
+    "path": "TEXT PRIMARY KEY",
+    "kind": "TEXT",              # "run" (market model) or "energyscope" (linear reference)
+    "scenario": "TEXT",          # e.g. NormalPrice, HighPrice, 2024
+    "elasticity_tag": "TEXT",
+    "epsilon": "REAL",           # NULL for unconstrained emissions
+    "TotalGWP": "REAL",
+    "TotalCost": "REAL",
+    "SocialWelfare": "REAL",
+    "solve_time": "REAL",
+    "mtime": "REAL",
+}
+
+# -------------------------------------------------------------
+# Run handle with lazily loaded tables
+# -------------------------------------------------------------
+class Run:
+    def __init__(self, meta, root):
+        self.meta = meta
+        self.path = os.path.join(root, meta["path"])
+        self._tables = {}
+
+    def __getitem__(self, key):
+        return self.meta[key]
+
+    def __repr__(self):
+        return f"Run({self.meta['path']})"
+
+    def table(self, name):
+        """Result table ``<name>.csv`` of the run, read on first access."""
+        if name not in self._tables:
+            self._tables[name] = pd.read_csv(os.path.join(self.path, f"{name}.csv"))
+        return self._tables[name]
+
+    @cached_property
+    def results(self):
+        with open(os.path.join(self.path, "last_run.json"), "r") as f:
+            return json.load(f)
+
+    @cached_property
+    def price(self):
+        return load_price_cube(self.path)
+
+# -------------------------------------------------------------
+# Catalog
+# -------------------------------------------------------------
+def _scenario_of(folder):
+    name = os.path.basename(folder)
+    return name[len("Data"):] if name.startswith("Data") else name
+
+
+def _parse_eps(eps):
+    return None if eps.upper() == "NONE" else float(eps)
+
+
+def _scan(root):
+    rows = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel = os.path.relpath(dirpath, root)
+        if "last_run.json" in filenames:
+            with open(os.path.join(dirpath, "last_run.json"), "r") as f:
+                res = json.load(f)
+            m = RUN_FOLDER.match(os.path.basename(dirpath))
+            scenario_dir = os.path.dirname(dirpath) if m else dirpath  # e.g. results/Data2024 is a run itself
+            rows.append({
+                "path": rel,
+                "kind": "run",
+                "scenario": res.get("scenario", _scenario_of(scenario_dir)),
+                "elasticity_tag": res.get("elasticity_tag", m.group("tag") if m else None),
+                "epsilon": res.get("epsilon", _parse_eps(m.group("eps")) if m and m.group("kind") == "eps" else None),
+                "TotalGWP": res.get("TotalGWP"),
+                "TotalCost": res.get("TotalCost"),
+                "SocialWelfare": res.get("SocialWelfare"),
+                "solve_time": res.get("solve_time"),
+                "mtime": os.path.getmtime(os.path.join(dirpath, "last_run.json")),
+            })
+            dirnames[:] = []  # run folders only hold result tables and figures
+            continue
+
+        if os.path.basename(dirpath) == "EnergyScope":
+            for fname in filenames:
+                m = ENERGYSCOPE_FILE.match(fname)
+                if not m:
+                    continue
+                res = pd.read_csv(os.path.join(dirpath, fname)).iloc[0]
+                solve_time = res.get("gurobi_solve_time")
+                if pd.isna(solve_time):
+                    solve_time = res.get("python_wall_clock_time")
+                rows.append({
+                    "path": os.path.join(rel, fname),
+                    "kind": "energyscope",
+                    "scenario": _scenario_of(os.path.dirname(dirpath)),
+                    "elasticity_tag": "demand_fixed",
+                    "epsilon": _parse_eps(m.group("eps")),
+                    "TotalGWP": float(res["TotalGWP"]),
+                    "TotalCost": float(res["TotalCost"]),
+                    "SocialWelfare": None,
+                    "solve_time": float(solve_time),
+                    "mtime": os.path.getmtime(os.path.join(dirpath, fname)),
+                })
+    return rows
+
+
+def _newest_result(root):
+    """Latest modification time [s] of a last_run.json or EnergyScope results file below ``root``."""
+    newest = 0.0
+    for dirpath, dirnames, filenames in os.walk(root):
+        if "last_run.json" in filenames:
+            newest = max(newest, os.path.getmtime(os.path.join(dirpath, "last_run.json")))
+            dirnames[:] = []
+        elif os.path.basename(dirpath) == "EnergyScope":
+            for fname in filter(ENERGYSCOPE_FILE.match, filenames):
+                newest = max(newest, os.path.getmtime(os.path.join(dirpath, fname)))
+    return newest
+
+
+class RunCatalog:
+    """Index of every run below ``root``, stored in a small SQLite file next to the results; rebuilt
+    when a run was written after the index."""
+
+    def __init__(self, root=default_root, refresh=False):
+        self.root = os.path.abspath(root)
+        self.index_path = os.path.join(self.root, INDEX_FILE)
+        fresh = not os.path.exists(self.index_path) or _newest_result(self.root) > os.path.getmtime(self.index_path)
+        self.con = sqlite3.connect(self.index_path)
+        self.con.row_factory = sqlite3.Row
+        if fresh or refresh:
+            self.refresh()
+
+    def refresh(self):
+        cols = ", ".join(f"{c} {t}" for c, t in COLUMNS.items())
+        with self.con:
+            self.con.execute("DROP TABLE IF EXISTS runs")
+            self.con.execute(f"CREATE TABLE runs ({cols})")
+            self.con.executemany(
+                f"INSERT INTO runs VALUES ({', '.join(':' + c for c in COLUMNS)})", _scan(self.root)
+            )
+
+    def query(self, order_by="TotalGWP", kind="run", **filters):
+        """Runs matching ``filters`` (column=value, None matches NULL), e.g.
+        ``query(scenario="HighPrice", elasticity_tag="elast_5pct")``."""
+        if order_by not in COLUMNS:
+            raise ValueError(f"Unknown catalog column: {order_by}")
+        filters["kind"] = kind
+        where, args = [], []
+        for col, val in filters.items():
+            if col not in COLUMNS:
+                raise ValueError(f"Unknown catalog column: {col}")
+            if val is None:
+                where.append(f"{col} IS NULL")
+            else:
+                where.append(f"{col} = ?")
+                args.append(val)
+        sql = f"SELECT * FROM runs WHERE {' AND '.join(where)} ORDER BY {order_by}"
+        return [Run(dict(r), self.root) for r in self.con.execute(sql, args)]
+
+    def frame(self):
+        return pd.read_sql_query("SELECT * FROM runs", self.con)
+
+    def scenarios(self):
+        return [r[0] for r in self.con.execute("SELECT DISTINCT scenario FROM runs ORDER BY scenario")]
+
+
+if __name__ == "__main__":
+    catalog = RunCatalog(refresh=True)
+    print(catalog.frame().to_string(index=False))
@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+from dataclasses import asdict, replace
+from multiprocessing import Pool, Queue
+from multiprocessing.connection import Client, Listener
+
+import Solvers
+from Scaling import row_scale_overrides
+from Scenarios import SCENARIOS, ScenarioState, apply_scenario, carbon_price_overrides, metadata
+
+ADDRESS = ("localhost", 6061)
+AUTHKEY = b"CaseStudyCoreGermany"
+
+# Fields of a request and their defaults
+REQUEST = {
+    "scenario": None,          # name in SCENARIOS
+    "elasticity_tag": None,    # name in ELASTICITIES
+    "epsilon": None,           # [ktCO2-eq./year], None: no cap
+    "stepwise_bids": False,
+    "carbon_price": None,      # [€/tCO2-eq.]
+    "row_scale": False,        # rescale the definitional rows (Scaling.suggest_row_scale) before the solve
+    "overrides": None,         # {param: value or {index: value}}, applied last
+    "objective": "welfare",    # key of CaseStudy.OBJECTIVES
+    "options": None,           # SolverOptions fields that differ from the service's
+    "data_dir": None,          # export the run there, as CaseStudy.py does
+    "tables": True,
+}
+
+# -------------------------------------------------------------
+# Worker processes: one loaded model each, kept between requests
+# -------------------------------------------------------------
+_worker = {}
+
+
+def _init_worker(config, ready):
+    from CaseStudy import load_model
+
+    ampl = load_model()
+    _worker.update(ampl=ampl, state=ScenarioState(ampl), config=config,
+                   options=Solvers.SolverOptions(**config["options"]))
+    ready.put(os.getpid())
+
+
+def _run(request):
+    """Solve one request on this worker's model; the results of last_run.json, or the solve status."""
+    from CaseStudy import OBJECTIVES, export_results, last_run
+
+    ampl, state, config = _worker["ampl"], _worker["state"], _worker["config"]
+    req = {**REQUEST, **request}
+    if req["scenario"] is not None and req["scenario"] not in SCENARIOS:
+        raise KeyError(f"Unknown scenario {req['scenario']!r}, expected one of {', '.join(SCENARIOS)}")
+    start = time.time()
+    scenario = SCENARIOS[req["scenario"]] if req["scenario"] else None
+    apply_scenario(state, scenario, req["elasticity_tag"], req["epsilon"], req["stepwise_bids"])
+    meta = metadata(scenario, req["elasticity_tag"], req["epsilon"], req["stepwise_bids"])
+    if req["carbon_price"] is not None:
+        state.apply(carbon_price_overrides(req["carbon_price"]))
+        meta["carbon_price_eur_per_t"] = req["carbon_price"]
+    state.apply(req["overrides"])
+    if req["row_scale"]:
+        state.apply(row_scale_overrides(ampl))
+        meta["row_scale"] = True
+    try:
+        ampl.eval(f"objective {OBJECTIVES[req['objective']]};")
+        meta["objective"] = req["objective"]
+        options = replace(_worker["options"], **(req["options"] or {}))
+        record = Solvers.solve(ampl, config["backend"], options)
+        if req["data_dir"]:
+            export_results(ampl, req["data_dir"], record, meta, tables=req["tables"])
+        return {
+            "record": record.to_dict(), "worker": os.getpid(), "worker_time": time.time() - start,
+            "results": last_run(ampl, record, meta) if record.ok else None,
+        }
+    finally:
+        ampl.eval("objective SocialWelfare;")  # the next request starts from the model's default objective
+
+# -------------------------------------------------------------
+# Service: a pool of warm models behind a local socket
+# -------------------------------------------------------------
+class RunService:
+    """Keeps ``workers`` processes with the model loaded and answers run requests sent by RunClient
+    over a local socket; requests of several clients are solved in parallel, one per worker."""
+
+    def __init__(self, workers=None, backend=None, options=None, address=ADDRESS, authkey=AUTHKEY):
+        options = options or Solvers.SolverOptions(verbose=False)
+        config = {"backend": Solvers.select_backend(backend), "options": asdict(options)}
+        self.workers = workers or os.cpu_count()
+        ready = Queue()
+        self.pool = Pool(self.workers, initializer=_init_worker, initargs=(config, ready))
+        # every worker reads the model before the first request is accepted
+        for _ in range(self.workers):
+            ready.get()
+        print(f"{self.workers} workers ready ({config['backend']})")
+        self.listener = Listener(address, authkey=authkey)
+        self.stopped = threading.Event()
+
+    def _handle(self, conn):
+        with conn:
+            while not self.stopped.is_set():
+                try:
+                    request = conn.recv()
+                except EOFError:
+                    return
+                if request == "shutdown":
+                    self.stopped.set()
+                    conn.send("ok")
+                    return
+                start = time.time()
+                try:
+                    response = self.pool.apply_async(_run, (request,)).get()
+                except Exception as exc:  # reported to the client, the service keeps running
+                    response = {"error": f"{type(exc).__name__}: {exc}"}
+                response["service_time"] = time.time() - start
+                conn.send(response)
+
+    def serve(self):
+        print(f"listening on {self.listener.address}")
+        try:
+            while not self.stopped.is_set():
+                conn = self.listener.accept()
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self.close()
+
+    def close(self):
+        self.listener.close()
+        self.pool.terminate()
+        self.pool.join()
+
+
+class RunClient:
+    """Connection to a RunService, e.g. ``RunClient().run(scenario="HighPrice", elasticity_tag="elast_5pct")``."""
+
+    def __init__(self, address=ADDRESS, authkey=AUTHKEY):
+        self.address, self.authkey = address, authkey
+        self.conn = Client(address, authkey=authkey)
+
+    def run(self, **request):
+        unknown = set(request) - set(REQUEST)
+        if unknown:
+            raise KeyError(f"Unknown request fields: {', '.join(sorted(unknown))}")
+        self.conn.send(request)
+        response = self.conn.recv()
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    def shutdown(self):
+        """Stop the service; requests still being solved for other clients are dropped."""
+        self.conn.send("shutdown")
+        self.conn.recv()
+        Client(self.address, authkey=self.authkey).close()  # wake the accept loop
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from Scenarios import ELASTICITIES
+
+    parser = argparse.ArgumentParser(description="Pool of loaded models that solves run requests over a local socket.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="start the service")
+    serve.add_argument("--workers", type=int, default=None)
+    Solvers.add_arguments(serve)
+    run = sub.add_parser("run", help="send one request to a running service")
+    run.add_argument("data_dir", nargs="?", default=None, help="export the run there; only last_run.json fields otherwise")
+    run.add_argument("--scenario", choices=list(SCENARIOS), default=None)
+    run.add_argument("--elasticity", choices=list(ELASTICITIES), default=None)
+    run.add_argument("--epsilon", type=float, default=None)
+    run.add_argument("--carbon-price", type=float, default=None, help="[€/tCO2-eq.]")
+    run.add_argument("--stepwise-bids", action="store_true")
+    run.add_argument("--row-scale", action="store_true")
+    run.add_argument("--no-tables", action="store_true")
+    sub.add_parser("stop", help="shut a running service down")
+    for p in sub.choices.values():
+        p.add_argument("--port", type=int, default=ADDRESS[1])
+    args = parser.parse_args()
+    address = (ADDRESS[0], args.port)
+
+    if args.command == "serve":
+        RunService(args.workers, args.solver, Solvers.options_from_args(args), address).serve()
+    elif args.command == "run":
+        with RunClient(address) as client:
+            response = client.run(scenario=args.scenario, elasticity_tag=args.elasticity, epsilon=args.epsilon,
+                                  carbon_price=args.carbon_price, stepwise_bids=args.stepwise_bids, row_scale=args.row_scale,
+                                  data_dir=args.data_dir and os.path.abspath(args.data_dir), tables=not args.no_tables)
+        print(json.dumps(response, indent=4))
+    else:
+        RunClient(address).shutdown()
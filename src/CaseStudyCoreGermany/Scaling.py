@@ -0,0 +1,210 @@
+import os
+import tempfile
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+import Solvers
+
+WARN_RANGE = 6  # [log10], matrix / objective ranges above this slow the barrier down
+
+# -------------------------------------------------------------
+# Generated instance: the .nl file AMPL hands to the solver, after presolve
+# -------------------------------------------------------------
+def _family(name):
+    return name.split("[")[0]
+
+
+def _bound_pair(code, values):
+    """(lower, upper) of an .nl ``r`` / ``b`` line."""
+    code = int(code)
+    if code == 0:
+        return values[0], values[1]
+    if code == 1:
+        return -np.inf, values[0]
+    if code == 2:
+        return values[0], np.inf
+    if code == 4:
+        return values[0], values[0]
+    return -np.inf, np.inf
+
+
+def read_nl(stub):
+    """Linear part of a text (g) .nl file written with ``option auxfiles rc``: row and column names,
+    Jacobian and objective gradient entries, row and column bounds."""
+    with open(stub + ".nl", "r") as f:
+        lines = f.read().splitlines()
+    with open(stub + ".row", "r") as f:
+        row_names = f.read().splitlines()
+    with open(stub + ".col", "r") as f:
+        col_names = f.read().splitlines()
+    n_vars, n_cons = (int(x) for x in lines[1].split()[:2])
+
+    jac, grad, row_bounds, col_bounds = [], [], [], []
+    i = 10
+    while i < len(lines):
+        if not lines[i]:
+            i += 1
+            continue
+        tag, parts = lines[i][0], lines[i][1:].split()
+        if tag in "JG":
+            n = int(parts[1])
+            entries = [l.split() for l in lines[i + 1:i + 1 + n]]
+            target = jac if tag == "J" else grad
+            target += [(int(parts[0]), int(j), float(v)) for j, v in entries]
+            i += n + 1
+        elif tag in "rb":
+            n = n_cons if tag == "r" else n_vars
+            target = row_bounds if tag == "r" else col_bounds
+            for l in lines[i + 1:i + 1 + n]:
+                code, *values = l.split()
+                target.append(_bound_pair(code, [float(v) for v in values]))
+            i += n + 1
+        elif tag in "kdx":
+            i += int(parts[0]) + 1
+        elif tag == "S":
+            i += int(parts[1]) + 1
+        elif tag == "V":
+            i += int(parts[1]) + 1  # linear part; the expression lines that follow are skipped one by one
+        else:
+            i += 1  # C / O / F headers and expression lines
+
+    return {
+        "rows": row_names[:n_cons], "cols": col_names[:n_vars],
+        "jac": np.array(jac).reshape(-1, 3), "grad": np.array(grad).reshape(-1, 3),
+        "row_bounds": np.array(row_bounds).reshape(-1, 2), "col_bounds": np.array(col_bounds).reshape(-1, 2),
+    }
+
+
+def write_instance(ampl, stub):
+    ampl.eval("option auxfiles rc;")
+    ampl.eval(f"write g{stub};")
+
+# -------------------------------------------------------------
+# Ranges per family
+# -------------------------------------------------------------
+def _range_rows(kind, families, values):
+    df = pd.DataFrame({"family": families, "abs": np.abs(values)})
+    df = df[(df["abs"] > 0) & np.isfinite(df["abs"])]
+    out = df.groupby("family")["abs"].agg(count="count", min_abs="min", max_abs="max").reset_index()
+    out.insert(0, "kind", kind)
+    return out
+
+
+def coefficient_ranges(ampl):
+    """Nonzero magnitudes of the instance handed to the solver, per constraint / variable family:
+    matrix coefficients, right-hand sides, variable bounds and objective coefficients (the
+    quadratic bid terms 0.5 * b * w * t_op are taken from the data)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        stub = os.path.join(tmp, "instance")
+        write_instance(ampl, stub)
+        nl = read_nl(stub)
+
+    rows = np.array([_family(r) for r in nl["rows"]], dtype=object)
+    cols = np.array([_family(c) for c in nl["cols"]], dtype=object)
+    jac, grad = nl["jac"], nl["grad"]
+    frames = [
+        _range_rows("matrix", rows[jac[:, 0].astype(int)], jac[:, 2]),
+        _range_rows("rhs", np.concatenate([rows, rows]), nl["row_bounds"].T.ravel()),
+        _range_rows("bounds", np.concatenate([cols, cols]), nl["col_bounds"].T.ravel()),
+        _range_rows("objective", cols[grad[:, 1].astype(int)], grad[:, 2]),
+    ]
+    if ampl.get_parameter("stepwise_bids").value() != 1:
+        quad = ampl.get_data("{k in SEGMENTS, c in CONSUMERS, n in NODES, h in HOURS, td in TYPICAL_DAYS} "
+                             "0.5 * b[k,c,n,h,td] * w[h,td] * t_op[h,td]").to_pandas()
+        frames.append(_range_rows("objective_quadratic", ["d_seg"] * len(quad), quad.iloc[:, -1].to_numpy()))
+
+    df = pd.concat(frames, ignore_index=True)
+    df["log10_range"] = np.log10(df["max_abs"] / df["min_abs"])
+    return df
+
+
+def overall_ranges(ranges):
+    """log10 of max/min magnitude over all families, per kind."""
+    g = ranges.groupby("kind")
+    return np.log10(g["max_abs"].max() / g["min_abs"].min())
+
+# -------------------------------------------------------------
+# Rescaling
+# -------------------------------------------------------------
+def scaled_rows(ampl):
+    """Families whose rows may be rescaled (set SCALED_ROWS / param row_scale of CaseStudy_Math.mod):
+    definitional rows whose duals are not exported, so results need no unscaling."""
+    return ampl.get_set("SCALED_ROWS").get_values().to_list()
+
+
+def suggest_row_scale(ranges, families):
+    """Power-of-two factor per scalable family that centres its matrix coefficients on 1 (geometric
+    mean of min and max); powers of two scale without rounding."""
+    matrix = ranges[(ranges["kind"] == "matrix") & ranges["family"].isin(families)]
+    centre = np.sqrt(matrix["min_abs"] * matrix["max_abs"])
+    return dict(zip(matrix["family"], np.exp2(-np.round(np.log2(centre)))))
+
+
+def apply_row_scale(ampl, factors):
+    ampl.get_parameter("row_scale").set_values({f: float(v) for f, v in factors.items()})
+
+
+def row_scale_overrides(ampl):
+    """suggest_row_scale of the model as it is now, as overrides for ScenarioState; the model must
+    not be rescaled already (factors are relative to row_scale = 1)."""
+    return {"row_scale": {f: float(v) for f, v in suggest_row_scale(coefficient_ranges(ampl), scaled_rows(ampl)).items()}}
+
+
+def compare(backend=None, options=None, scaling="aggressive"):
+    """Solve the base case as is and rescaled (model row factors plus solver ``scaling``), each from a
+    fresh model; solve time, iterations, ranges and the deviation of welfare and prices."""
+    from CaseStudy import load_model
+    from Prices import price_cube_from_ampl
+
+    options = options or Solvers.SolverOptions()
+    rows, cubes = [], []
+    for setup in ["unscaled", "scaled"]:
+        ampl = load_model()
+        opts = options
+        if setup == "scaled":
+            apply_row_scale(ampl, suggest_row_scale(coefficient_ranges(ampl), scaled_rows(ampl)))
+            opts = replace(options, scaling=scaling)
+        record = Solvers.solve(ampl, backend, opts)
+        overall = overall_ranges(coefficient_ranges(ampl))
+        rows.append({
+            "setup": setup, "status": record.status, "wall_time": record.wall_time,
+            "simplex_iterations": record.simplex_iterations, "barrier_iterations": record.barrier_iterations,
+            "SocialWelfare": ampl.get_objective("SocialWelfare").value() if record.ok else np.nan,
+            **{f"log10_range_{k}": v for k, v in overall.items()},
+        })
+        cubes.append(price_cube_from_ampl(ampl) if record.ok else None)
+        ampl.close()
+
+    df = pd.DataFrame(rows)
+    if all(c is not None for c in cubes):
+        df["max_price_diff_eur_per_mwh"] = [0.0, float(np.abs(cubes[1].eur_per_mwh - cubes[0].eur_per_mwh).max())]
+    return df
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Coefficient ranges of the generated instance per family; optionally solve it unscaled and rescaled.")
+    parser.add_argument("--compare", action="store_true", help="solve unscaled and rescaled and compare")
+    parser.add_argument("--all", action="store_true", help="list every family, not only the wide ones")
+    Solvers.add_arguments(parser)
+    args = parser.parse_args()
+    options = Solvers.options_from_args(args)
+
+    from CaseStudy import load_model
+
+    ampl = load_model()
+    ranges = coefficient_ranges(ampl)
+    shown = ranges if args.all else ranges[ranges["log10_range"] > WARN_RANGE / 2]
+    print(shown.sort_values("log10_range", ascending=False).to_string(index=False))
+    print("\nlog10 range over all families:")
+    print(overall_ranges(ranges).to_string())
+    print("\nSuggested row_scale:")
+    for family, factor in suggest_row_scale(ranges, scaled_rows(ampl)).items():
+        print(f"    {family:25s} {factor:g}")
+    ampl.close()
+
+    if args.compare:
+        print(compare(args.solver, options, args.scaling or "aggressive").to_string(index=False))
@@ -0,0 +1,195 @@
+import os
+from dataclasses import dataclass, field
+
+# -------------------------------------------------------------
+# Declarative scenarios: parameter overrides on top of CaseStudy_Math.dat
+# -------------------------------------------------------------
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    overrides: dict = field(default_factory=dict)  # param -> scalar or {index: value}
+    scale: dict = field(default_factory=dict)      # param -> factor on the base values
+
+    def folder(self):
+        """Results folder name of the scenario, e.g. DataHighPrice."""
+        return f"Data{self.name}"
+
+
+# Consumer bid values alpha_d [M€/GWh]
+ALPHA_D_2024 = {  # https://www.energy-charts.info/charts/price_average/chart.htm?l=de&c=DE
+    "ELECTRICITY": 0.07957,
+    "HEAT_HIGH_T": 0.039785,       # COP = 2
+    "HEAT_LOW_T_DHN": 0.00198925,  # COP = 4
+    "HEAT_LOW_T_DECEN": 0.0198925, # COP = 4
+}
+ALPHA_D_2050 = {  # 5% elasticity, tight but non-zero emissions (epsilon_value = 27000), yearly average
+    "ELECTRICITY": 0.054299106,
+    "HEAT_HIGH_T": 0.031665799,
+    "HEAT_LOW_T_DHN": 0.015802950,
+    "HEAT_LOW_T_DECEN": 0.028538782,
+}
+
+SCENARIOS = {s.name: s for s in [
+    Scenario("2024", {"alpha_d": ALPHA_D_2024}),
+    Scenario("NormalPrice", {"alpha_d": ALPHA_D_2050}),
+    Scenario("LowPrice", {"alpha_d": {k: 0.5 * v for k, v in ALPHA_D_2050.items()}}),
+    Scenario("HighPrice", {"alpha_d": {k: 2 * v for k, v in ALPHA_D_2050.items()}}),
+]}
+
+# Demand response settings of the sweeps; None = fixed demand
+ELASTICITIES = {
+    "elast_10pct": -0.10,
+    "elast_5pct": -0.05,
+    "elast_2_5pct": -0.025,
+    "demand_fixed": None,
+}
+
+UNCONSTRAINED_EPSILON = 1e12
+EUR_PER_T = 1e-3  # [M€/ktCO2-eq.] per [€/tCO2-eq.]
+
+
+def elasticity_overrides(tag):
+    eps = ELASTICITIES[tag]
+    if eps is None:
+        return {"elasticity": -0.02, "fix_demand": 1}
+    return {"elasticity": eps, "fix_demand": 0}
+
+
+def epsilon_overrides(epsilon):
+    """Emission cap [ktCO2-eq./year]; None leaves emissions unconstrained."""
+    if epsilon is None:
+        return {"use_epsilon": 0, "epsilon_value": UNCONSTRAINED_EPSILON}
+    return {"use_epsilon": 1, "epsilon_value": float(epsilon)}
+
+
+def bid_overrides(stepwise):
+    """Demand bids as flat blocks at the segment average price (LP) or the exact PWL curve (QP)."""
+    return {"stepwise_bids": int(bool(stepwise))}
+
+
+def carbon_price_overrides(price):
+    """Carbon charge [€/tCO2-eq.] on TotalGWP in SocialWelfare; None or 0 removes it."""
+    return {"carbon_price": float(price or 0) * EUR_PER_T}
+
+
+def run_folder(elasticity_tag, epsilon):
+    eps = "NONE" if epsilon is None else f"{epsilon:.2f}"
+    return f"{elasticity_tag}_eps_{eps}"
+
+
+def carbon_folder(elasticity_tag, price):
+    return f"{elasticity_tag}_co2_{price:.2f}"
+
+# -------------------------------------------------------------
+# In-memory application to a loaded model
+# -------------------------------------------------------------
+class ScenarioState:
+    """Applies overrides to a live AMPL model and keeps the base values to revert them."""
+
+    def __init__(self, ampl):
+        self.ampl = ampl
+        self.base = {}
+
+    def _get(self, name):
+        param = self.ampl.get_parameter(name)
+        if param.indexarity() == 0:
+            return param.value()
+        return param.get_values().to_dict()
+
+    def _set(self, name, value):
+        param = self.ampl.get_parameter(name)
+        if param.indexarity() == 0:
+            param.set(value)
+        else:
+            param.set_values(value)
+
+    def _snapshot(self, name):
+        if name not in self.base:
+            self.base[name] = self._get(name)
+        return self.base[name]
+
+    def apply(self, overrides=None, scale=None):
+        for name, value in (overrides or {}).items():
+            self._snapshot(name)
+            self._set(name, value)
+        # factors apply to the current values: the data, or the overrides applied since the last revert
+        for name, factor in (scale or {}).items():
+            self._snapshot(name)
+            current = self._get(name)
+            if isinstance(current, dict):
+                self._set(name, {k: v * factor for k, v in current.items()})
+            else:
+                self._set(name, current * factor)
+
+    def revert(self):
+        for name, value in self.base.items():
+            self._set(name, value)
+        self.base = {}
+
+
+def apply_scenario(state, scenario=None, elasticity_tag=None, epsilon=None, stepwise_bids=False):
+    """Revert ``state`` to the base data, then apply a scenario, demand response setting, emission cap
+    and bid representation."""
+    state.revert()
+    if scenario is not None:
+        state.apply(scenario.overrides, scenario.scale)
+    if elasticity_tag is not None:
+        state.apply(elasticity_overrides(elasticity_tag))
+    state.apply(epsilon_overrides(epsilon))
+    if stepwise_bids:
+        state.apply(bid_overrides(True))
+
+
+def metadata(scenario=None, elasticity_tag=None, epsilon=None, stepwise_bids=False):
+    """Scenario identity stored in last_run.json and picked up by the run catalog."""
+    meta = {
+        "scenario": None if scenario is None else scenario.name,
+        "elasticity_tag": elasticity_tag,
+        "epsilon": epsilon,
+    }
+    if stepwise_bids:
+        meta["stepwise_bids"] = True
+    return meta
+
+# -------------------------------------------------------------
+# Grid runner
+# -------------------------------------------------------------
+def run_grid(root, scenarios, elasticity_tags, epsilons, backend=None, options=None, stepwise_bids=False):
+    """Solve every scenario x elasticity x epsilon combination on one loaded model and
+    export each run to ``root/Data<scenario>/<elasticity>_eps_<epsilon>``."""
+    from CaseStudy import export_results, load_model, solve_model
+
+    ampl = load_model()
+    state = ScenarioState(ampl)
+    records = []
+    for scenario in scenarios:
+        for tag in elasticity_tags:
+            for eps in epsilons:
+                apply_scenario(state, scenario, tag, eps, stepwise_bids)
+                record = solve_model(ampl, backend, options)
+                folder = os.path.join(root, scenario.folder(), run_folder(tag, eps))
+                export_results(ampl, folder, record, metadata(scenario, tag, eps, stepwise_bids))
+                records.append((scenario.name, tag, eps, record))
+    state.revert()
+    return records
+
+
+if __name__ == "__main__":
+    import argparse
+    import Solvers
+
+    parser = argparse.ArgumentParser(description="Run a scenario x elasticity x epsilon grid.")
+    parser.add_argument("root", help="results root, runs go to <root>/Data<scenario>/<elasticity>_eps_<epsilon>")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--elasticities", nargs="+", choices=list(ELASTICITIES), default=list(ELASTICITIES))
+    parser.add_argument("--epsilons", nargs="+", default=["none"], help="emission caps or 'none'")
+    parser.add_argument("--stepwise-bids", action="store_true", help="LP with flat bid blocks instead of the QP")
+    Solvers.add_arguments(parser)
+    args = parser.parse_args()
+
+    epsilons = [None if e.lower() == "none" else float(e) for e in args.epsilons]
+    for name, tag, eps, record in run_grid(
+        args.root, [SCENARIOS[s] for s in args.scenarios], args.elasticities, epsilons,
+        args.solver, Solvers.options_from_args(args), args.stepwise_bids
+    ):
+        print(f"{name:12s} {run_folder(tag, eps):30s} {record.status} ({record.wall_time:.1f} s)")
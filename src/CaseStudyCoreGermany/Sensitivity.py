@@ -0,0 +1,290 @@
+import dataclasses
+import os
+
+import numpy as np
+import pandas as pd
+
+import Solvers
+
+# Basis ranging is read from solver suffixes: backend -> options, (objective lo, hi), (rhs lo, hi)
+RANGING = {
+    "gurobi": ({"alg:sens": 1}, ("sensobjlo", "sensobjhi"), ("sensrhslo", "sensrhshi")),
+    "cplex": ({"sensitivity": ""}, ("down", "up"), ("down", "up")),
+}
+INF = 1e20  # |bound| above this is reported as infinite
+
+# With fixed demand the consumer part of SocialWelfare is a constant, so the supply side is an LP
+SUPPLY_COST = """
+minimize SupplyCost:
+    sum {j in TECHNOLOGIES} (tau[j] * C_inv[j] + C_maint[j])
+  + sum {s in SUPPLIERS, n in NODES, h in HOURS, td in TYPICAL_DAYS} c_op[s] * g[s,n,h,td] * w[h,td] * t_op[h,td];
+"""
+
+# -------------------------------------------------------------
+# Reading AMPL entities with several suffixes
+# -------------------------------------------------------------
+def _frame(entity, dims, suffixes):
+    df = entity.get_values(list(suffixes)).to_pandas().reset_index()
+    df.columns = list(dims) + list(suffixes)
+    return df
+
+
+def _scalar(ampl, name, suffixes):
+    return {s: ampl.get_value(f"{name}.{s}") for s in suffixes}
+
+
+def _param(ampl, name):
+    return ampl.get_parameter(name).get_values().to_dict()
+
+
+def _weights(ampl):
+    w = _param(ampl, "w")
+    t_op = _param(ampl, "t_op")
+    return {k: w[k] * t_op[k] for k in w}
+
+
+def _bound(values):
+    values = np.asarray(values, dtype=float)
+    return np.where(values <= -INF, -np.inf, np.where(values >= INF, np.inf, values))
+
+
+def _hundred_percent(step, room):
+    """Largest simultaneous change (in units of ``step``) that uses at most the allowable ``room``
+    of all coefficients together (100% rule)."""
+    step, room = np.asarray(step, dtype=float), np.maximum(np.asarray(room, dtype=float), 0.0)
+    use = step > 0
+    with np.errstate(divide="ignore"):
+        total = (step[use] / room[use]).sum()
+    return np.inf if total == 0 else 1.0 / total
+
+# -------------------------------------------------------------
+# Basis ranging of the fixed-demand LP
+# -------------------------------------------------------------
+def _ensure_supply_cost(ampl):
+    if "SupplyCost" not in [name for name, _ in ampl.get_objectives()]:
+        ampl.eval(SUPPLY_COST)
+
+
+def _cost_ranges(ampl, obj):
+    """Ranges of c_op, c_inv and c_maint within which the optimal basis, and so F, stays unchanged."""
+    wt = _weights(ampl)
+    rows = []
+
+    # c_op[s] multiplies the objective coefficients of all g[s,n,h,td] at once
+    c_op = _param(ampl, "c_op")
+    g = _frame(ampl.get_variable("g"), ["s", "n", "h", "td"], obj)
+    g["wt"] = [wt[(h, td)] for h, td in zip(g["h"], g["td"])]
+    g["coef"] = g["s"].map(c_op) * g["wt"]
+    g["lo"], g["hi"] = _bound(g[obj[0]]), _bound(g[obj[1]])
+    removed = (g[obj[0]] == 0) & (g[obj[1]] == 0) & (g["coef"] != 0)  # not sent to the solver
+    g.loc[removed, ["lo", "hi"]] = [-np.inf, np.inf]
+    for s, grp in g.groupby("s"):
+        down = _hundred_percent(grp["wt"], grp["coef"] - grp["lo"])
+        up = _hundred_percent(grp["wt"], grp["hi"] - grp["coef"])
+        rows.append(("c_op", s, c_op[s], max(c_op[s] - down, 0.0), c_op[s] + up))
+
+    # c_inv[j] and c_maint[j] scale the objective coefficients tau[j] of C_inv[j] and 1 of C_maint[j]
+    tau = _param(ampl, "tau")
+    for param, var, coef in [("c_inv", "C_inv", tau), ("c_maint", "C_maint", None)]:
+        value = _param(ampl, param)
+        df = _frame(ampl.get_variable(var), ["j"], obj)
+        for j, lo, hi in zip(df["j"], _bound(df[obj[0]]), _bound(df[obj[1]])):
+            c = 1.0 if coef is None else coef[j]
+            rows.append((param, j, value[j], value[j] * max(lo / c, 0.0), value[j] * hi / c))
+
+    # without demand response the consumer bids do not enter the supply-side problem
+    for param in ["VOLL", "elasticity"]:
+        rows.append((param, None, ampl.get_parameter(param).value(), -np.inf, np.inf))
+    return pd.DataFrame(rows, columns=["param", "index", "value", "low", "high"])
+
+
+def _rhs_ranges(ampl, rhs):
+    """Ranges of avail, epsilon_value and a per-consumer demand scale within which the optimal basis,
+    and so the prices, stays unchanged; F moves linearly inside them."""
+    rows = []
+
+    avail = _param(ampl, "avail")
+    df = _frame(ampl.get_constraint("resource_availability"), ["i"], ["dual", *rhs])
+    for i, dual, lo, hi in zip(df["i"], df["dual"], _bound(df[rhs[0]]), _bound(df[rhs[1]])):
+        rows.append(("avail", i, avail[i], lo, hi, dual))
+
+    if ampl.get_parameter("use_epsilon").value() == 1:
+        eps = _scalar(ampl, "Minimum_GWP_constraint", ["dual", *rhs])
+        rows.append(("epsilon_value", None, ampl.get_parameter("epsilon_value").value(),
+                     _bound(eps[rhs[0]]).item(), _bound(eps[rhs[1]]).item(), eps["dual"]))
+
+    # scaling d_ref[c,*,*,*] by a common factor shifts the rhs of all satisfy_demand[c,*,*,*]
+    d_ref = _param(ampl, "d_ref")
+    df = _frame(ampl.get_constraint("satisfy_demand"), ["c", "n", "h", "td"], rhs)
+    df["rhs"] = [d_ref[k] for k in zip(df["c"], df["n"], df["h"], df["td"])]
+    df["lo"], df["hi"] = _bound(df[rhs[0]]), _bound(df[rhs[1]])
+    for c, grp in df.groupby("c"):
+        down = _hundred_percent(grp["rhs"], grp["rhs"] - grp["lo"])
+        up = _hundred_percent(grp["rhs"], grp["hi"] - grp["rhs"])
+        rows.append(("demand_scale", c, 1.0, max(1.0 - down, 0.0), 1.0 + up, np.nan))
+    return pd.DataFrame(rows, columns=["param", "index", "value", "low", "high", "dual"])
+
+
+def basis_ranging(ampl, backend=None, options=None):
+    """Re-solve the fixed-demand case as the equivalent supply-cost LP with basis ranging enabled.
+    Returns the solve record and the cost, rhs and capacity tables; the model is left on SocialWelfare."""
+    if ampl.get_parameter("fix_demand").value() != 1:
+        raise ValueError("Basis ranging needs fixed demand (fix_demand = 1); use envelope_gradients otherwise.")
+    backend = Solvers.select_backend(backend)
+    if backend not in RANGING:
+        raise ValueError(f"Basis ranging is not available for {backend} (supported: {', '.join(RANGING)}).")
+    extra, obj, rhs = RANGING[backend]
+
+    options = options or Solvers.SolverOptions()
+    options = dataclasses.replace(
+        options,
+        method=options.method or "dual_simplex",
+        crossover=True if options.method == "barrier" else options.crossover,  # ranging needs a basis
+        extra={**options.extra, **extra},
+    )
+
+    _ensure_supply_cost(ampl)
+    presolve = ampl.get_option("presolve")
+    ampl.set_option("presolve", 0)  # keep satisfy_demand rows, presolve would turn them into bounds
+    ampl.eval("objective SupplyCost;")
+    try:
+        record = Solvers.solve(ampl, backend, options)
+        if not record.ok:
+            return record, {}
+        F = _frame(ampl.get_variable("F"), ["j"], ["val", "rc"])
+        F.columns = ["j", "F", "reduced_cost"]
+        return record, {
+            "capacity": F,
+            "cost_ranges": _cost_ranges(ampl, obj),
+            "rhs_ranges": _rhs_ranges(ampl, rhs),
+        }
+    finally:
+        ampl.eval("objective SocialWelfare;")
+        ampl.set_option("presolve", presolve)
+
+# -------------------------------------------------------------
+# Local sensitivities of the elastic QP (envelope theorem)
+# -------------------------------------------------------------
+def envelope_gradients(ampl):
+    """dSocialWelfare/dparam [M€/year per unit] at the current optimum, from primal values and duals.
+    First-order only: exact for infinitesimal changes, an estimate while the active set stays the same."""
+    wt = _weights(ampl)
+    rows = []
+
+    c_op = _param(ampl, "c_op")
+    g = _frame(ampl.get_variable("g"), ["s", "n", "h", "td"], ["val"])
+    g["flow"] = g["val"] * [wt[(h, td)] for h, td in zip(g["h"], g["td"])]
+    for s, flow in g.groupby("s")["flow"].sum().items():
+        rows.append(("c_op", s, c_op[s], -flow))
+
+    tau = _param(ampl, "tau")
+    cap = ampl.get_variable("F").get_values().to_dict()
+    for param, coef in [("c_inv", tau), ("c_maint", None)]:
+        value = _param(ampl, param)
+        for j, f in cap.items():
+            rows.append((param, j, value[j], -f * (1.0 if coef is None else coef[j])))
+
+    avail = _param(ampl, "avail")
+    for i, dual in ampl.get_constraint("resource_availability").get_values("dual").to_dict().items():
+        rows.append(("avail", i, avail[i], dual))
+
+    if ampl.get_parameter("use_epsilon").value() == 1:
+        rows.append(("epsilon_value", None, ampl.get_parameter("epsilon_value").value(),
+                     ampl.get_value("Minimum_GWP_constraint.dual")))
+
+    # VOLL is the intercept a[1] of the first segment and enters its slope b[1] = (VOLL - p_pwl[1]) / D[1]
+    if ampl.get_parameter("fix_demand").value() != 1:
+        seg = _frame(ampl.get_variable("d_seg"), ["k", "c", "n", "h", "td"], ["val"])
+        seg = seg[seg["k"] == 1]
+        D = _param(ampl, "D")
+        width = np.array([D[k] for k in zip(seg["k"], seg["c"], seg["n"], seg["h"], seg["td"])])
+        x = seg["val"].to_numpy()
+        weight = np.array([wt[(h, td)] for h, td in zip(seg["h"], seg["td"])])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            grad = np.where(width > 0, weight * (x - 0.5 * x ** 2 / width), 0.0).sum()
+        rows.append(("VOLL", None, ampl.get_parameter("VOLL").value(), grad))
+
+    df = pd.DataFrame(rows, columns=["param", "index", "value", "gradient"])
+    df["per_percent"] = df["gradient"] * df["value"] / 100  # [M€/year] for a +1% change
+    return df
+
+
+def slacks(ampl):
+    """Body, slack and dual of the aggregate constraints."""
+    frames = []
+    for name, dims in [("resource_availability", ["index"]), ("process_capacity_factor", ["index"])]:
+        df = _frame(ampl.get_constraint(name), dims, ["body", "slack", "dual"])
+        df.insert(0, "constraint", name)
+        frames.append(df)
+    for name in ["solar_area_limited", "Minimum_GWP_constraint"]:
+        frames.append(pd.DataFrame([{"constraint": name, "index": None,
+                                     **_scalar(ampl, name, ["body", "slack", "dual"])}]))
+    return pd.concat(frames, ignore_index=True)
+
+# -------------------------------------------------------------
+# Report
+# -------------------------------------------------------------
+def sensitivity_report(ampl, backend=None, options=None):
+    """Solve the current case and collect its sensitivities: envelope gradients and slacks always,
+    basis ranges of F and the prices when demand is fixed."""
+    record = Solvers.solve(ampl, backend, options)
+    if not record.ok:
+        return record, {}
+    report = {"gradients": envelope_gradients(ampl), "slacks": slacks(ampl)}
+    if ampl.get_parameter("fix_demand").value() == 1:
+        ranging_record, ranges = basis_ranging(ampl, record.backend, options)
+        report.update(ranges)
+        if not ranging_record.ok:
+            print(f"Basis ranging failed: {ranging_record.message}")
+    return record, report
+
+
+def write_report(out_dir, report):
+    os.makedirs(out_dir, exist_ok=True)
+    for name, df in report.items():
+        df.to_csv(os.path.join(out_dir, f"sensitivity_{name}.csv"), index=False)
+
+
+def load_report(out_dir):
+    report = {}
+    for name in ["gradients", "slacks", "capacity", "cost_ranges", "rhs_ranges"]:
+        path = os.path.join(out_dir, f"sensitivity_{name}.csv")
+        if os.path.exists(path):
+            report[name] = pd.read_csv(path)
+    return report
+
+
+def needs_resolve(report, param, value, index=None):
+    """True if setting ``param[index]`` to ``value`` leaves its basis range (or no range is known):
+    inside a cost range F is unchanged, inside an rhs range the prices are unchanged."""
+    for table in ["cost_ranges", "rhs_ranges"]:
+        df = report.get(table)
+        if df is None:
+            continue
+        row = df[(df["param"] == param) & ((df["index"] == index) if index is not None else df["index"].isna())]
+        if len(row):
+            return not (row["low"].iloc[0] <= value <= row["high"].iloc[0])
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+    from CaseStudy import load_model
+    from Scenarios import ELASTICITIES, SCENARIOS, ScenarioState, apply_scenario
+
+    parser = argparse.ArgumentParser(description="Sensitivity report of one case without re-solving per parameter.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--scenario", choices=list(SCENARIOS), default="NormalPrice")
+    parser.add_argument("--elasticity", choices=list(ELASTICITIES), default="demand_fixed")
+    parser.add_argument("--epsilon", type=float, default=None)
+    Solvers.add_arguments(parser)
+    args = parser.parse_args()
+
+    ampl = load_model()
+    apply_scenario(ScenarioState(ampl), SCENARIOS[args.scenario], args.elasticity, args.epsilon)
+    record, report = sensitivity_report(ampl, args.solver, Solvers.options_from_args(args))
+    print(f"Solver: {record.backend} ({record.status})")
+    write_report(args.out_dir, report)
+    for name, df in report.items():
+        print(f"\n{name}:")
+        print(df.to_string(index=False))
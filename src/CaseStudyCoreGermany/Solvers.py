@@ -0,0 +1,241 @@
+import os
+import re
+import shutil
+import time
+from argparse import BooleanOptionalAction
+from dataclasses import asdict, dataclass, field
+
+# -------------------------------------------------------------
+# Backend-neutral options and solve record
+# -------------------------------------------------------------
+@dataclass
+class SolverOptions:
+    threads: int = None
+    method: str = None          # "barrier", "simplex", "dual_simplex" or None (solver default)
+    crossover: bool = None      # only meaningful for method="barrier"
+    feasibility_tol: float = None
+    optimality_tol: float = None
+    barrier_tol: float = None
+    time_limit: float = None    # [s]
+    scaling: str = None         # "off", "standard", "aggressive" or None (solver default)
+    obj_scale: float = None     # objective divided by this inside the solver, results are unscaled
+    verbose: bool = True
+    extra: dict = field(default_factory=dict)  # raw backend options, passed through unchanged
+
+
+# Barrier without crossover: much faster on the QP, prices from interior-point duals
+FAST_PRICES = SolverOptions(method="barrier", crossover=False)
+
+
+@dataclass
+class SolveRecord:
+    backend: str
+    status: str                 # AMPL solve_result: solved, infeasible, unbounded, limit, failure
+    status_num: int
+    message: str
+    simplex_iterations: int
+    barrier_iterations: int
+    wall_time: float            # [s], around ampl.solve()
+    method: str = None
+    crossover: bool = None      # False: duals are interior-point, not vertex duals
+    scaling: str = None
+
+    @property
+    def ok(self):
+        return self.status == "solved"
+
+    def to_dict(self):
+        return asdict(self)
+
+# -------------------------------------------------------------
+# Per-backend option translation
+# -------------------------------------------------------------
+SCALING = ["off", "standard", "aggressive"]
+
+
+def _gurobi(o):
+    methods = {"simplex": 0, "dual_simplex": 1, "barrier": 2}
+    return {
+        "threads": o.threads,
+        "method": methods.get(o.method),
+        "crossover": None if o.crossover is None else (-1 if o.crossover else 0),
+        "feastol": o.feasibility_tol,
+        "opttol": o.optimality_tol,
+        "barconvtol": o.barrier_tol,
+        "timelim": o.time_limit,
+        "scaleflag": {"off": 0, "standard": 1, "aggressive": 2}.get(o.scaling),
+        "objscale": o.obj_scale,
+        "outlev": int(o.verbose),
+    }
+
+
+def _highs(o):
+    methods = {"simplex": "simplex", "dual_simplex": "simplex", "barrier": "ipm"}
+    return {
+        "tech:threads": o.threads,
+        "alg:method": methods.get(o.method),
+        "alg:crossover": None if o.crossover is None else ("on" if o.crossover else "off"),
+        "alg:feastol": o.feasibility_tol,
+        "alg:dualfeastol": o.optimality_tol,
+        "alg:ipmtol": o.barrier_tol,
+        "lim:time": o.time_limit,
+        "tech:outlev": int(o.verbose),
+    }
+
+
+def _cplex(o):
+    methods = {"simplex": "primalopt", "dual_simplex": "dualopt", "barrier": "baropt"}
+    opts = {
+        "threads": o.threads,
+        "crossover": None if o.crossover is None else (1 if o.crossover else 0),
+        "feasibility": o.feasibility_tol,
+        "optimality": o.optimality_tol,
+        "bartol": o.barrier_tol,
+        "time": o.time_limit,
+        "scale": {"off": -1, "standard": 0, "aggressive": 1}.get(o.scaling),
+        "display": int(o.verbose),
+    }
+    if o.method in methods:
+        opts[methods[o.method]] = ""  # keyword-only option
+    return opts
+
+
+def _xpress(o):
+    methods = {"simplex": "primal", "dual_simplex": "dual", "barrier": "barrier"}
+    opts = {
+        "threads": o.threads,
+        "crossover": None if o.crossover is None else int(o.crossover),
+        "feastol": o.feasibility_tol,
+        "opttol": o.optimality_tol,
+        "bargaptol": o.barrier_tol,
+        "maxtime": o.time_limit,
+        "outlev": int(o.verbose),
+    }
+    if o.method in methods:
+        opts[methods[o.method]] = ""
+    return opts
+
+
+BACKENDS = {
+    "gurobi": _gurobi,
+    "highs": _highs,
+    "cplex": _cplex,
+    "xpress": _xpress,
+}
+
+DEFAULT_BACKEND = os.environ.get("CASESTUDY_SOLVER", "gurobi")
+
+
+def option_string(backend, options):
+    translate = BACKENDS.get(backend, lambda o: {})
+    opts = {k: v for k, v in translate(options).items() if v is not None}
+    opts.update(options.extra)
+    return " ".join(k if v == "" else f"{k}={v}" for k, v in opts.items())
+
+
+def available_backends():
+    """Backends with an executable on PATH or installed as an amplpy module."""
+    found = [b for b in BACKENDS if shutil.which(b)]
+    try:
+        from amplpy import modules
+        found += [b for b in modules.installed() if b in BACKENDS and b not in found]
+    except ImportError:
+        pass
+    return found
+
+
+def select_backend(preferred=None):
+    """``preferred`` if given, else the first available of DEFAULT_BACKEND, highs, gurobi, cplex, xpress."""
+    if preferred:
+        return preferred
+    available = available_backends()
+    for b in [DEFAULT_BACKEND] + list(BACKENDS):
+        if b in available:
+            return b
+    raise RuntimeError("No supported solver found (tried " + ", ".join(BACKENDS) + ").")
+
+# -------------------------------------------------------------
+# Solve
+# -------------------------------------------------------------
+def _iterations(message, kind):
+    m = re.search(rf"(\d+)\s+{kind}\s+iterations?", message, re.IGNORECASE)
+    return int(m.group(1)) if m else None
+
+
+def configure(ampl, backend, options=None):
+    options = options or SolverOptions()
+    ampl.set_option("solver", backend)
+    ampl.set_option("solver_msg", int(options.verbose))
+    ampl.set_option(f"{backend}_options", option_string(backend, options))
+
+
+def solve(ampl, backend=None, options=None):
+    backend = select_backend(backend)
+    options = options or SolverOptions()
+    configure(ampl, backend, options)
+
+    start = time.time()
+    ampl.solve()
+    wall_time = time.time() - start
+
+    message = ampl.get_value("solve_message")
+    return SolveRecord(
+        backend=backend,
+        status=ampl.solve_result,
+        status_num=int(ampl.get_value("solve_result_num")),
+        message=message,
+        simplex_iterations=_iterations(message, "simplex"),
+        barrier_iterations=_iterations(message, "barrier"),
+        wall_time=wall_time,
+        method=options.method,
+        crossover=options.crossover,
+        scaling=options.scaling,
+    )
+
+
+def add_arguments(parser):
+    """Backend-neutral solver flags shared by the command-line drivers."""
+    parser.add_argument("--solver", default=None, help=f"backend ({', '.join(BACKENDS)}), default: first available")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--method", choices=["barrier", "simplex", "dual_simplex"], default=None)
+    parser.add_argument("--crossover", action=BooleanOptionalAction, default=None)
+    parser.add_argument("--feastol", type=float, default=None)
+    parser.add_argument("--opttol", type=float, default=None)
+    parser.add_argument("--bartol", type=float, default=None)
+    parser.add_argument("--time-limit", type=float, default=None)
+    parser.add_argument("--scaling", choices=SCALING, default=None, help="solver-side row/column scaling (gurobi, cplex)")
+    parser.add_argument("--obj-scale", type=float, default=None, help="objective divided by this inside the solver (gurobi)")
+    parser.add_argument("--verbose", action=BooleanOptionalAction, default=True, help="solver log")
+    parser.add_argument("--solver-option", action="append", default=[], metavar="KEY[=VALUE]",
+                        help="raw backend option, passed through unchanged; repeatable")
+
+
+def _parse_extra(items):
+    return dict(item.split("=", 1) if "=" in item else (item, "") for item in items)
+
+
+def options_from_args(args):
+    return SolverOptions(
+        threads=args.threads, method=args.method, crossover=args.crossover,
+        feasibility_tol=args.feastol, optimality_tol=args.opttol, barrier_tol=args.bartol,
+        time_limit=args.time_limit, scaling=args.scaling, obj_scale=args.obj_scale,
+        verbose=args.verbose, extra=_parse_extra(args.solver_option),
+    )
+
+
+def options_to_args(options):
+    """Inverse of options_from_args, for drivers started as subprocesses; extra values come back as strings."""
+    args = []
+    for flag, val in [("--threads", options.threads), ("--method", options.method),
+                      ("--feastol", options.feasibility_tol), ("--opttol", options.optimality_tol),
+                      ("--bartol", options.barrier_tol), ("--time-limit", options.time_limit),
+                      ("--scaling", options.scaling), ("--obj-scale", options.obj_scale)]:
+        if val is not None:
+            args += [flag, str(val)]
+    if options.crossover is not None:
+        args.append("--crossover" if options.crossover else "--no-crossover")
+    if not options.verbose:
+        args.append("--no-verbose")
+    for key, val in options.extra.items():
+        args += ["--solver-option", key if val == "" else f"{key}={val}"]
+    return args
@@ -0,0 +1,207 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from Cubes import ampl_cube, to_cube
+
+SUMMARY_FILE = "summary.npz"
+
+# Annual quantities of a run and the coordinate each one is indexed by
+FIELDS = {
+    "supply": "resources",          # [GWh/year], weighted sum of g
+    "production": "processors",     # [GWh/year], weighted sum of e
+    "demand": "consumers",          # [GWh/year], weighted sum of d
+    "storage_in": "storages",       # [GWh/year]
+    "storage_out": "storages",      # [GWh/year]
+    "layer_supply": "layers",       # [GWh/year], inflow into each layer
+    "layer_use": "layers",          # [GWh/year], outflow from each layer incl. final demand
+    "F": "technologies",            # [GW], storage [GWh]
+    "C_inv": "technologies",        # [M€]
+    "C_maint": "technologies",      # [M€/year]
+    "C_op": "resources",            # [M€/year]
+    "GWP_op": "resources",          # [ktCO2-eq./year]
+}
+TOTALS = ["TotalCost", "TotalGWP", "SocialWelfare", "epsilon_value", "use_epsilon"]
+# [M€/year], SocialWelfare without the carbon charge, which is a transfer; equal to the objective at carbon_price = 0
+WELFARE = "SocialWelfare + carbon_price * TotalGWP"
+
+# -------------------------------------------------------------
+# Summary of one run
+# -------------------------------------------------------------
+class RunSummary:
+    """Annual, w * t_op weighted totals of a run; a few kilobytes instead of the hourly tables."""
+
+    def __init__(self, coords, values, totals):
+        self.coords = coords
+        self.values = values
+        self.totals = totals
+
+    def __getitem__(self, name):
+        return self.series(name)
+
+    def series(self, name):
+        return pd.Series(self.values[name], index=list(self.coords[FIELDS[name]]), name=name)
+
+    def share(self, name, keys):
+        """Fraction of the total of ``name`` coming from ``keys``."""
+        s = self.series(name)
+        return float(s[s.index.isin(keys)].sum() / s.sum())
+
+
+def _layer_balance(lio, lio_rows, layers, flows, demand, consumers, sto_in, sto_out):
+    """Inflow and outflow per layer from annual flows [rows] and layers_in_out [rows, l]."""
+    supply = (np.clip(lio, 0, None) * flows[:, None]).sum(axis=0) + sto_out.sum(axis=0)
+    use = (np.clip(-lio, 0, None) * flows[:, None]).sum(axis=0) + sto_in.sum(axis=0)
+    use += to_cube(pd.DataFrame({"l": consumers, "val": demand}), ["l"], "val", {"l": layers})[0]
+    return supply, use
+
+
+def _build(coords, weight, g, e, d, sto_in, sto_out, lio, F, costs, totals):
+    """Weighted annual totals from [.., h, td] flow cubes; sto_in/out are [j, l, h, td]."""
+    supply = (g * weight).sum(axis=(-2, -1))
+    production = (e * weight).sum(axis=(-2, -1))
+    demand = (d * weight).sum(axis=(-2, -1))
+    sto_in_l = (sto_in * weight).sum(axis=(-2, -1))
+    sto_out_l = (sto_out * weight).sum(axis=(-2, -1))
+
+    flows = np.concatenate([supply, production])
+    layer_supply, layer_use = _layer_balance(
+        lio, coords["resources"] + coords["processors"], coords["layers"],
+        flows, demand, coords["consumers"], sto_in_l, sto_out_l
+    )
+    values = {
+        "supply": supply, "production": production, "demand": demand,
+        "storage_in": sto_in_l.sum(axis=1), "storage_out": sto_out_l.sum(axis=1),
+        "layer_supply": layer_supply, "layer_use": layer_use, "F": F,
+    }
+    values.update(costs)
+    return RunSummary({k: tuple(v) for k, v in coords.items()}, values, totals)
+
+# -------------------------------------------------------------
+# Build from a solved model
+# -------------------------------------------------------------
+def summary_from_ampl(ampl):
+    def members(name):
+        return ampl.get_set(name).get_values().to_list()
+
+    hours = [int(h) for h in members("HOURS")]
+    tds = [int(td) for td in members("TYPICAL_DAYS")]
+    coords = {
+        "resources": members("RESOURCES"), "processors": members("PROCESSORS"),
+        "consumers": members("CONSUMERS"), "storages": members("STORAGE_TECH"),
+        "technologies": members("TECHNOLOGIES"), "layers": members("LAYERS"),
+    }
+    nodes = members("NODES")
+    ht = {"h": hours, "td": tds}
+
+    def flows(name, dim):
+        cube, _ = ampl_cube(ampl.get_variable(name), [dim, "n", "h", "td"], coords={dim: coords[dim], "n": nodes, **ht})
+        return cube.sum(axis=1)
+
+    def storage(name):
+        cube, _ = ampl_cube(ampl.get_variable(name), ["j", "l", "n", "h", "td"],
+                            coords={"j": coords["storages"], "l": coords["layers"], "n": nodes, **ht})
+        return cube.sum(axis=2)
+
+    def by(entity, dim):
+        return ampl_cube(entity, [dim], coords={dim: coords[dim]})[0]
+
+    w, _ = ampl_cube(ampl.get_parameter("w"), ["h", "td"], coords=ht)
+    t_op, _ = ampl_cube(ampl.get_parameter("t_op"), ["h", "td"], coords=ht)
+    lio, _ = ampl_cube(ampl.get_parameter("layers_in_out"), ["k", "l"],
+                       coords={"k": coords["resources"] + coords["processors"], "l": coords["layers"]})
+    costs = {
+        "C_inv": by(ampl.get_variable("C_inv"), "technologies"),
+        "C_maint": by(ampl.get_variable("C_maint"), "technologies"),
+        "C_op": by(ampl.get_variable("C_op"), "resources"),
+        "GWP_op": by(ampl.get_variable("GWP_op"), "resources"),
+    }
+    totals = {
+        "TotalCost": ampl.get_variable("TotalCost").value(),
+        "TotalGWP": ampl.get_variable("TotalGWP").value(),
+        "SocialWelfare": ampl.get_value(WELFARE),
+        "epsilon_value": ampl.get_parameter("epsilon_value").value(),
+        "use_epsilon": ampl.get_parameter("use_epsilon").value(),
+    }
+    return _build(
+        coords, w * t_op,
+        flows("g", "resources"), flows("e", "processors"), flows("d", "consumers"),
+        storage("Storage_in"), storage("Storage_out"), lio,
+        by(ampl.get_variable("F"), "technologies"), costs, totals,
+    )
+
+# -------------------------------------------------------------
+# Storage
+# -------------------------------------------------------------
+def save_summary(summary, data_dir):
+    arrays = {f"coord_{k}": np.array(v) for k, v in summary.coords.items()}
+    arrays.update(summary.values)
+    arrays["totals"] = np.array(json.dumps(summary.totals))
+    np.savez_compressed(os.path.join(data_dir, SUMMARY_FILE), **arrays)
+
+
+def _summary_from_csv(data_dir):
+    """Summary of an older run from its hourly tables; costs are not exported there and stay NaN."""
+    def read(name):
+        return pd.read_csv(os.path.join(data_dir, name))
+
+    s, e, d = read("s_vals.csv"), read("e_vals.csv"), read("d_vals.csv")
+    lio_df = read("layers_in_out.csv")
+    weights = read("mult.csv").merge(read("t_op.csv"), on=["h", "td"])
+    weights["weight"] = weights["mult"] * weights["t_op"]
+    F_df = read("F_capacities.csv")
+    F_df.columns = ["TECHNOLOGY", "capacity"]
+
+    storages = read("storage_tech.csv")["STORAGE_TECH"].tolist()
+    resources = sorted(s["st"].unique())
+    processors = sorted(e["pt"].unique())
+    consumers = sorted(d["ct"].unique())
+    layers = sorted(set(lio_df["p"]) | set(resources) | set(consumers))
+    coords = {
+        "resources": resources, "processors": processors, "consumers": consumers,
+        "storages": storages, "technologies": F_df["TECHNOLOGY"].tolist(), "layers": layers,
+    }
+    ht = {"h": sorted(weights["h"].unique()), "td": sorted(weights["td"].unique())}
+    weight, _ = to_cube(weights, ["h", "td"], "weight", ht)
+
+    def flows(df, col, dim):
+        return to_cube(df.groupby([col, "h", "td"], as_index=False)["val"].sum(), [col, "h", "td"], "val",
+                       {col: coords[dim], **ht})[0]
+
+    # storage tables are per technology only: attribute them to the layer they serve
+    layer_of = dict(zip(read("storage_of_end_use.csv")["STORAGE_TECH"], read("storage_of_end_use.csv")["END_USE_TYPE"]))
+    layer_of.update({j: j[:-len("_STORAGE")] for j in storages if j.endswith("_STORAGE")})
+
+    def storage(name):
+        df = read(name)
+        df["l"] = df["j"].map(layer_of)
+        return to_cube(df.dropna(subset=["l"]), ["j", "l", "h", "td"], "val", {"j": storages, "l": layers, **ht})[0]
+
+    # suppliers are not in the exported layers_in_out: each resource feeds its own layer
+    lio_df = pd.concat([lio_df, pd.DataFrame({"pt": resources, "p": resources, "layers_in_out": 1.0})])
+    lio, _ = to_cube(lio_df, ["pt", "p"], "layers_in_out", {"pt": resources + processors, "p": layers})
+
+    F, _ = to_cube(F_df, ["TECHNOLOGY"], "capacity", {"TECHNOLOGY": coords["technologies"]})
+    nan = {k: np.full(len(coords[FIELDS[k]]), np.nan) for k in ["C_inv", "C_maint", "C_op", "GWP_op"]}
+    with open(os.path.join(data_dir, "last_run.json"), "r") as f:
+        res = json.load(f)
+    totals = {k: res.get(k) for k in TOTALS}
+    return _build(
+        coords, weight,
+        flows(s, "st", "resources"), flows(e, "pt", "processors"), flows(d, "ct", "consumers"),
+        storage("storage_charge.csv"), storage("storage_discharge.csv"), lio, F, nan, totals,
+    )
+
+
+def load_summary(data_dir):
+    """Summary of a run folder; rebuilt from the hourly tables for runs exported before summary.npz."""
+    path = os.path.join(data_dir, SUMMARY_FILE)
+    if not os.path.exists(path):
+        return _summary_from_csv(data_dir)
+    with np.load(path) as f:
+        coords = {k[len("coord_"):]: tuple(f[k].tolist()) for k in f.files if k.startswith("coord_")}
+        values = {k: f[k] for k in FIELDS}
+        totals = json.loads(str(f["totals"]))
+    return RunSummary(coords, values, totals)
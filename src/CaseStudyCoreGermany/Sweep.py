@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from ArrayStore import LabeledArray, TABLES, open_array, run_array, run_array_available, stack_arrays
+from RunCatalog import RunCatalog
+from Summary import FIELDS, load_summary
+
+SWEEP_DIR = "sweep"
+META_FILE = "sweep.json"
+META = ["path", "elasticity_tag", "epsilon", "TotalGWP", "TotalCost", "SocialWelfare", "solve_time"]
+
+# -------------------------------------------------------------
+# Consolidation: one array per table with a leading run dimension
+# -------------------------------------------------------------
+def consolidate(scenario_dir):
+    """Stack the price, summary and hourly arrays of every run below ``scenario_dir``
+    into ``<scenario_dir>/sweep``; returns the opened Sweep."""
+    runs = RunCatalog(scenario_dir, refresh=True).query(order_by="path")
+    out_dir = os.path.join(scenario_dir, SWEEP_DIR)
+    names = []
+
+    def stack(name, arrays):
+        if any(a is not None for a in arrays):
+            stack_arrays(os.path.join(out_dir, name), arrays)
+            names.append(name)
+
+    for name in list(TABLES) + ["price", "weight"]:
+        stack(name, [run_array(r.path, name) if run_array_available(r.path, name) else None for r in runs])
+
+    summaries = [load_summary(r.path) for r in runs]
+    for field, dim in FIELDS.items():
+        stack(f"summary_{field}", [
+            LabeledArray(s.values[field], [dim], {dim: list(s.coords[dim])}) for s in summaries
+        ])
+
+    meta = {
+        "runs": [{k: r[k] for k in META} for r in runs],
+        "arrays": names,
+    }
+    with open(os.path.join(out_dir, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+    return Sweep(out_dir)
+
+# -------------------------------------------------------------
+# Reading
+# -------------------------------------------------------------
+class Sweep:
+    """Consolidated, memory-mapped arrays of one sweep, e.g.
+    ``sweep.sel("price", l="ELECTRICITY", h=12, td=6)`` -> [run, n] over all elasticities and epsilons."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE), "r") as f:
+            meta = json.load(f)
+        self.runs = pd.DataFrame(meta["runs"], columns=META)
+        self.names = meta["arrays"]
+        self._arrays = {}
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def labeled(self, name):
+        if name not in self._arrays:
+            self._arrays[name] = open_array(os.path.join(self.path, name))
+        return self._arrays[name]
+
+    def dims(self, name):
+        return self.labeled(name).dims
+
+    def coords(self, name):
+        return self.labeled(name).coords
+
+    def array(self, name):
+        """Full [run, ...] array, memory-mapped."""
+        return self.labeled(name).data
+
+    def sel(self, name, runs=None, **labels):
+        """Array ``name`` at the given labels (dim=label); ``runs`` optionally restricts the run axis."""
+        values = self.labeled(name).sel(**labels)
+        return values if runs is None else values[runs]
+
+    def where(self, **filters):
+        """Positions of the runs matching run metadata filters, e.g. where(elasticity_tag="elast_5pct")."""
+        mask = np.ones(len(self.runs), dtype=bool)
+        for col, val in filters.items():
+            mask &= self.runs[col].isna().to_numpy() if val is None else (self.runs[col] == val).to_numpy()
+        return np.flatnonzero(mask)
+
+    def annual_average(self, layer, node=None):
+        """[run] w * t_op weighted annual average price [€/MWh] of ``layer`` at ``node`` (first by default)."""
+        nodes = self.coords("price")["n"]
+        price = self.sel("price", l=layer, n=nodes[0] if node is None else node)
+        weight = self.array("weight")
+        return (np.nan_to_num(price) * weight).sum(axis=(1, 2)) / weight.sum(axis=(1, 2))
+
+
+def _stale(scenario_dir, meta_path):
+    mtime = os.path.getmtime(meta_path)
+    for name in os.listdir(scenario_dir):
+        res = os.path.join(scenario_dir, name, "last_run.json")
+        if os.path.exists(res) and os.path.getmtime(res) > mtime:
+            return True
+    return False
+
+
+def open_sweep(scenario_dir, rebuild=False):
+    """Sweep of ``scenario_dir``, consolidated first if missing or older than any of its runs."""
+    meta_path = os.path.join(scenario_dir, SWEEP_DIR, META_FILE)
+    if rebuild or not os.path.exists(meta_path) or _stale(scenario_dir, meta_path):
+        return consolidate(scenario_dir)
+    return Sweep(os.path.dirname(meta_path))
+
+
+if __name__ == "__main__":
+    # python Sweep.py <scenario dir>, e.g. results/DataNormalPrice
+    sweep = consolidate(sys.argv[1])
+    print(sweep.runs.to_string(index=False))
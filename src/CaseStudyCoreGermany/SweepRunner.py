@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+case_script = os.path.join(script_dir, "CaseStudy.py")
+
+JOURNAL_FILE = "sweep_journal.json"
+# Inputs of a point besides its flags: model and data, the scenario and elasticity definitions, the export
+MODEL_FILES = ["CaseStudy_Math.mod", "CaseStudy_Math.dat", "CaseStudyDays.dat", "CaseStudyTimeSeries.dat",
+               "Scenarios.py", "CaseStudy.py"]
+
+# Solver flags tried in turn when a point crashes, times out or stops without a result;
+# appended after the point's own flags, so they take precedence
+FALLBACKS = [
+    [],
+    ["--method", "barrier", "--no-crossover"],
+    ["--method", "dual_simplex"],
+]
+# Solve statuses that are an answer for the point, not a failure of the run
+FINAL = {"solved", "infeasible", "unbounded"}
+
+def _kill_group(proc):
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    else:
+        proc.kill()
+    proc.wait()
+
+# -------------------------------------------------------------
+# Journal: one entry per point, rewritten atomically on every state change
+# -------------------------------------------------------------
+def model_digest():
+    h = hashlib.sha256()
+    for f in MODEL_FILES:
+        with open(os.path.join(script_dir, f), "rb") as fh:
+            h.update(fh.read())
+    return h.hexdigest()
+
+
+class SweepRunner:
+    """Runs CaseStudy.py once per point in a subprocess and journals queued/running/done/failed
+    per point in ``<root>/sweep_journal.json``; a restarted sweep skips points that are done
+    with an unchanged inputs hash (model files + the point's flags)."""
+
+    def __init__(self, root, timeout=None, fallbacks=FALLBACKS):
+        self.root = root
+        self.timeout = timeout    # [s] per attempt
+        self.fallbacks = fallbacks
+        self.path = os.path.join(root, JOURNAL_FILE)
+        self.model = model_digest()
+        self.journal = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self.journal = json.load(f)
+
+    def _save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.journal, f, indent=4)
+        os.replace(tmp, self.path)
+
+    def inputs_hash(self, case_args):
+        return hashlib.sha256((self.model + json.dumps(case_args)).encode()).hexdigest()
+
+    def _set(self, name, **fields):
+        self.journal.setdefault(name, {}).update(fields, updated=time.strftime("%Y-%m-%d %H:%M:%S"))
+        self._save()
+
+    def is_done(self, name, case_args):
+        entry = self.journal.get(name, {})
+        folder = os.path.join(self.root, name)
+        return (entry.get("state") == "done" and entry.get("hash") == self.inputs_hash(case_args)
+                and os.path.exists(os.path.join(folder, "solve_record.json"))
+                and (entry.get("status") != "solved" or os.path.exists(os.path.join(folder, "last_run.json"))))
+
+    def queue(self, points):
+        for name, case_args in points:
+            if not self.is_done(name, case_args):
+                self._set(name, state="queued", hash=self.inputs_hash(case_args), args=case_args, attempts=[])
+
+    # -------------------------------------------------------------
+    # Running one point
+    # -------------------------------------------------------------
+    def _attempt(self, folder, case_args, fallback):
+        for stale in ["last_run.json", "solve_record.json"]:
+            if os.path.exists(os.path.join(folder, stale)):
+                os.remove(os.path.join(folder, stale))
+        attempt = {"flags": fallback}
+        start = time.time()
+        # own session: on timeout the whole group (python, ampl, solver) is killed, not only python
+        proc = subprocess.Popen([sys.executable, case_script, folder] + case_args + fallback, start_new_session=True)
+        try:
+            attempt["returncode"] = proc.wait(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            _kill_group(proc)
+            attempt["returncode"] = None
+            attempt["status"] = "timeout"
+        attempt["wall_time"] = time.time() - start
+
+        record = os.path.join(folder, "solve_record.json")
+        if "status" not in attempt:
+            if attempt["returncode"] != 0 or not os.path.exists(record):
+                attempt["status"] = "crashed"
+            else:
+                with open(record, "r") as f:
+                    attempt["status"] = json.load(f)["status"]
+                if attempt["status"] == "solved" and not os.path.exists(os.path.join(folder, "last_run.json")):
+                    attempt["status"] = "crashed"  # solved, but the export did not finish
+        return attempt
+
+    def run(self, name, case_args):
+        """Run point ``name`` (folder below root) unless it is done; returns its journal entry."""
+        if self.is_done(name, case_args):
+            return self.journal[name]
+
+        folder = os.path.join(self.root, name)
+        os.makedirs(folder, exist_ok=True)
+        attempts = []
+        self._set(name, state="running", hash=self.inputs_hash(case_args), args=case_args, attempts=attempts)
+        for fallback in self.fallbacks:
+            attempt = self._attempt(folder, case_args, fallback)
+            attempts.append(attempt)
+            if attempt["status"] in FINAL:
+                self._set(name, state="done", status=attempt["status"], attempts=attempts)
+                return self.journal[name]
+            print(f"    {name}: {attempt['status']} with flags {fallback or 'as given'}, retrying")
+            self._set(name, attempts=attempts)
+        self._set(name, state="failed", status=attempts[-1]["status"], attempts=attempts)
+        return self.journal[name]
+
+    def run_all(self, points):
+        """Queue all (name, flags) points, then run them in order; a failed point does not stop the sweep."""
+        self.queue(points)
+        for name, case_args in points:
+            entry = self.run(name, case_args)
+            print(f"{name:45s} {entry['state']:7s} {entry.get('status', '')}")
+        return {name: self.journal[name] for name, _ in points}
+
+
+def grid_points(scenarios, elasticity_tags, epsilons, extra_args=()):
+    """(folder, CaseStudy.py flags) of every scenario x elasticity x epsilon point."""
+    from Scenarios import SCENARIOS, run_folder
+
+    points = []
+    for s in scenarios:
+        for tag in elasticity_tags:
+            for eps in epsilons:
+                name = os.path.join(SCENARIOS[s].folder(), run_folder(tag, eps))
+                case_args = ["--scenario", s, "--elasticity", tag, "--epsilon", "none" if eps is None else str(eps)]
+                points.append((name, case_args + list(extra_args)))
+    return points
+
+
+if __name__ == "__main__":
+    import argparse
+    from Scenarios import ELASTICITIES, SCENARIOS
+
+    parser = argparse.ArgumentParser(description="Resumable scenario x elasticity x epsilon sweep; other flags go to CaseStudy.py.")
+    parser.add_argument("root", help="results root, runs go to <root>/Data<scenario>/<elasticity>_eps_<epsilon>")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--elasticities", nargs="+", choices=list(ELASTICITIES), default=list(ELASTICITIES))
+    parser.add_argument("--epsilons", nargs="+", default=["none"], help="emission caps or 'none'")
+    parser.add_argument("--timeout", type=float, default=None, help="[s] per attempt")
+    parser.add_argument("--status", action="store_true", help="only print the journal")
+    args, case_args = parser.parse_known_args()
+
+    runner = SweepRunner(args.root, args.timeout)
+    if args.status:
+        for name, entry in sorted(runner.journal.items()):
+            print(f"{name:45s} {entry['state']:7s} {entry.get('status', '')} ({len(entry['attempts'])} attempts)")
+    else:
+        epsilons = [None if e.lower() == "none" else float(e) for e in args.epsilons]
+        runner.run_all(grid_points(args.scenarios, args.elasticities, epsilons, case_args))
@@ -1,9 +1,13 @@
 import os
+import sys
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from Colors import colors_end_use_type
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Prices import load_price_cube
+
 plt.rcParams.update({
     "text.usetex": False,
     "font.family": "sans-serif",
@@ -68,7 +72,7 @@ p_pw_df  = read_param_csv("p_pw.csv", "p_pw.val", data_dir)
 
 d_ref_df = pd.read_csv(os.path.join(data_dir, "d_ref.csv"))
 p_ref_df = pd.read_csv(os.path.join(data_dir, "p_ref.csv"))
-price_df = pd.read_csv(os.path.join(data_dir, "price.csv"))
+price_cube = load_price_cube(data_dir)
 d_vals   = pd.read_csv(os.path.join(data_dir, "d_vals.csv"))
 
 p_pw_df["p_pw"] *= 1000.0
@@ -105,13 +109,9 @@ print(f"Plotting for: CT={TARGET_CT}, TD={td}, hour={h}")
 # ---------------------------------------------------------
 
 def get_price(ct, n, h, td):
-    match = price_df[
-        (price_df["p"] == ct) &
-        (price_df["n"] == n) &
-        (price_df["h"] == h) &
-        (price_df["td"] == td)
-    ]
-    return match["price_€_per_MWh"].values[0] if not match.empty else np.nan
+    if ct not in price_cube.layers or n not in price_cube.nodes:
+        return np.nan
+    return price_cube.at(ct, n, h, td)
 
 
 def get_curve(ct, n, h, td):
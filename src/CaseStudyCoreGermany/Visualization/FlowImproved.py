@@ -1,5 +1,11 @@
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # figures are rendered in worker processes
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.lines import Line2D
@@ -12,6 +18,10 @@ from Colors import (
     colors_storage,
 )
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ArrayStore import run_array
+from Cubes import to_cube
+
 plt.rcParams.update({
     "text.usetex": False,
     "font.family": "sans-serif",
@@ -27,43 +37,110 @@ data_dir = os.path.join(script_dir, "..", "DataNormalPrice", "demand_fixed_eps_0
 output_dir = os.path.join(script_dir, "..", "Results", "Figures", "Flow")
 os.makedirs(output_dir, exist_ok=True)
 
-# ------------------------------------------------------------------------------
-# Read Data
-# ------------------------------------------------------------------------------
-s_vals = pd.read_csv(os.path.join(data_dir, "s_vals.csv"))
-d_vals = pd.read_csv(os.path.join(data_dir, "d_vals.csv"))
-e_vals = pd.read_csv(os.path.join(data_dir, "e_vals.csv"))
-d_diff_vals = pd.read_csv(os.path.join(data_dir, "d_diff_vals.csv"))
-d_ref_df = pd.read_csv(os.path.join(data_dir, "d_ref.csv"))
-tech_map = pd.read_csv(os.path.join(data_dir, "tech_of_end_use.csv"))
-storage_map = pd.read_csv(os.path.join(data_dir, "storage_of_end_use.csv"))
-storage_discharge = pd.read_csv(os.path.join(data_dir, "storage_discharge.csv"))
-storage_in = pd.read_csv(os.path.join(data_dir, "storage_charge.csv"))
-layers = pd.read_csv(os.path.join(data_dir, "layers_in_out.csv"))
+end_uses = ["ELECTRICITY", "HEAT_HIGH_T", "HEAT_LOW_T_DHN", "HEAT_LOW_T_DECEN"]
+renewables = {"RES_WIND", "RES_SOLAR", "RES_HYDRO", "RES_GEO"}
+TOL = 1e-6
 
 # ------------------------------------------------------------------------------
-# Preprocess Storage
+# Read data: every table pivoted once into a [tech, h, td] array (summed over nodes)
 # ------------------------------------------------------------------------------
-storage_in["val"] = -abs(storage_in["val"])
+def load_node_sum(name):
+    arr = run_array(data_dir, name)
+    return np.asarray(arr.data).sum(axis=1), arr.coords
+
+
+def load_table(fname, col, value, ht):
+    df = pd.read_csv(os.path.join(data_dir, fname))
+    df = df.groupby([col, "h", "td"], as_index=False)[value].sum()
+    return to_cube(df, [col, "h", "td"], value, {col: sorted(df[col].unique()), **ht})
+
+
+def load_flows():
+    s, s_coords = load_node_sum("s")
+    e, e_coords = load_node_sum("e")
+    d, d_coords = load_node_sum("d")
+    ht = {"h": s_coords["h"], "td": s_coords["td"]}
+
+    d_diff, d_diff_coords = load_table("d_diff_vals.csv", "ct", "val", ht)
+    d_ref, d_ref_coords = load_table("d_ref.csv", "ct", "d_ref", ht)
+    sto_out, sto_coords = load_table("storage_discharge.csv", "j", "val", ht)
+    sto_in, _ = load_table("storage_charge.csv", "j", "val", ht)
+    sto_in = -np.abs(sto_in)
+
+    layers = pd.read_csv(os.path.join(data_dir, "layers_in_out.csv"))
+    lio, _ = to_cube(layers, ["pt", "p"], "layers_in_out", {"pt": e_coords["pt"], "p": end_uses})
+
+    tech_map = pd.read_csv(os.path.join(data_dir, "tech_of_end_use.csv"))
+    storage_map = pd.read_csv(os.path.join(data_dir, "storage_of_end_use.csv"))
+    return {
+        "hours": ht["h"], "typical_days": ht["td"],
+        "s": s, "st": s_coords["st"],
+        "e": e, "pt": e_coords["pt"], "lio": lio,
+        "d": d, "ct": d_coords["ct"],
+        "d_diff": d_diff, "d_diff_ct": d_diff_coords["ct"],
+        "d_ref": d_ref, "d_ref_ct": d_ref_coords["ct"],
+        "sto_out": sto_out, "sto_in": sto_in, "j": sto_coords["j"],
+        "tech_to_eut": dict(zip(tech_map["TECHNOLOGY"], tech_map["END_USE_TYPE"])),
+        "storage_of_eut": storage_map.groupby("END_USE_TYPE")["STORAGE_TECH"].apply(list).to_dict(),
+    }
 
 # ------------------------------------------------------------------------------
-# Pivot helper
+# Panel data of one typical day, sliced from the arrays
 # ------------------------------------------------------------------------------
-def pivot_results(df: pd.DataFrame, col: str) -> pd.DataFrame:
-    if df.empty:
-        return pd.DataFrame()
-    return (
-        df.pivot_table(index="h", columns=col, values="val", aggfunc="sum")
-        .fillna(0)
-        .sort_index()
-    )
+def hourly_frame(values, techs, hours, prune=False):
+    """[tech, h] -> DataFrame (h x tech), columns sorted; optionally without all-zero columns."""
+    df = pd.DataFrame(np.asarray(values).T, index=hours, columns=list(techs)).sort_index(axis=1)
+    if prune and not df.empty:
+        df = df.loc[:, df.abs().sum(axis=0) > TOL]
+    return df
+
+
+def row(values, labels, label):
+    """[h] row of a [label, h] slice, zeros if the label is absent."""
+    return values[labels.index(label)] if label in labels else np.zeros(values.shape[1])
+
+
+def day_panels(flows, i_td):
+    hours = flows["hours"]
+    st = flows["st"]
+    s_td = flows["s"][:, :, i_td]
+    is_ren = np.isin(st, list(renewables))
+
+    panels = {
+        "td": flows["typical_days"][i_td],
+        "tech_to_eut": flows["tech_to_eut"],
+        "ren": hourly_frame(s_td[is_ren], np.array(st)[is_ren], hours, prune=True),
+        "nonren": hourly_frame(s_td[~is_ren], np.array(st)[~is_ren], hours, prune=True),
+        "processors": {},
+        "storages": {},
+        "demand": {},
+    }
+
+    e_td = flows["e"][:, :, i_td]
+    for k, eut in enumerate(end_uses):
+        lio = flows["lio"][:, k]
+        active = lio != 0
+        sto_techs = [j for j in flows["storage_of_eut"].get(eut, []) if j in flows["j"]]
+        i_sto = [flows["j"].index(j) for j in sto_techs]
+
+        values = np.vstack([
+            e_td[active] * lio[active, None],
+            flows["sto_out"][i_sto, :, i_td] + flows["sto_in"][i_sto, :, i_td],
+        ])
+        panels["processors"][eut] = hourly_frame(values, list(np.array(flows["pt"])[active]) + sto_techs, hours)
+        panels["storages"][eut] = sto_techs
+
+        panels["demand"][eut] = {
+            "d": pd.Series(row(flows["d"][:, :, i_td], flows["ct"], eut), index=hours),
+            "d_diff": pd.Series(row(flows["d_diff"][:, :, i_td], flows["d_diff_ct"], eut), index=hours),
+            "d_ref": pd.Series(row(flows["d_ref"][:, :, i_td], flows["d_ref_ct"], eut), index=hours),
+        }
+    return panels
 
 # ------------------------------------------------------------------------------
-# Build mapping tech -> primary END_USE_TYPE
+# Rendering (one typical day per worker)
 # ------------------------------------------------------------------------------
-tech_to_eut = dict(zip(tech_map["TECHNOLOGY"], tech_map["END_USE_TYPE"]))
-
-def get_proc_color(tech: str, eut_plot: str) -> str:
+def get_proc_color(tech: str, eut_plot: str, tech_to_eut: dict) -> str:
     """
     Special rule:
     - If plotted in ELECTRICITY panel
@@ -91,65 +168,14 @@ def get_proc_color(tech: str, eut_plot: str) -> str:
 
     return "gray"
 
-# ------------------------------------------------------------------------------
-# Time loops
-# ------------------------------------------------------------------------------
-typical_days = sorted(s_vals["td"].unique())
-end_uses = ["ELECTRICITY", "HEAT_HIGH_T", "HEAT_LOW_T_DHN", "HEAT_LOW_T_DECEN"]
-renewables = {"RES_WIND", "RES_SOLAR", "RES_HYDRO", "RES_GEO"}
-
-# ------------------------------------------------------------------------------
-# MAIN LOOP
-# ------------------------------------------------------------------------------
-for td in typical_days:
-    fig, axes = plt.subplots(5, 2, figsize=(18, 18))
-    axes = axes.flatten()
-
-    # --------------------------------------------------------------------------
-    # Supplier flows
-    # --------------------------------------------------------------------------
-    s_td = s_vals[s_vals["td"] == td]
-
-    s_ren_hourly = pivot_results(s_td[s_td["st"].isin(renewables)], "st")
-    if not s_ren_hourly.empty:
-        s_ren_hourly = s_ren_hourly.loc[:, (s_ren_hourly.abs().sum(axis=0) > 1e-6)]
-
-    s_nonren_hourly = pivot_results(s_td[~s_td["st"].isin(renewables)], "st")
-    if not s_nonren_hourly.empty:
-        s_nonren_hourly = s_nonren_hourly.loc[:, (s_nonren_hourly.abs().sum(axis=0) > 1e-6)]
-
-    # --- Renewables (LEFT) ---
-    ax = axes[0]
-    if not s_ren_hourly.empty:
-        s_ren_hourly.plot(
-            kind="area",
-            stacked=True,
-            ax=ax,
-            color=[colors_ren.get(st, "gray") for st in s_ren_hourly.columns],
-            linewidth=0
-        )
-        ax.legend(fontsize=12, loc="center left", bbox_to_anchor=(1.02, 0.5))
-    else:
-        ax.text(0.5, 0.5, "No data", ha="center", va="center")
-        ax.set_axis_off()
-
-    ax.set_title("Renewable Suppliers")
-    ax.set_xlabel("Hour")
-    ax.set_ylabel("Power [GW]")
-    ax.grid(True)
-
-    ymin, ymax = ax.get_ylim()
-    if ymax < 1:
-        ax.set_ylim(ymin, 1)
 
-    # --- Non-renewables (RIGHT) ---
-    ax = axes[1]
-    if not s_nonren_hourly.empty:
-        s_nonren_hourly.plot(
+def plot_suppliers(ax, hourly, colors, title):
+    if not hourly.empty:
+        hourly.plot(
             kind="area",
             stacked=True,
             ax=ax,
-            color=[colors_nonren.get(st, "gray") for st in s_nonren_hourly.columns],
+            color=[colors.get(st, "gray") for st in hourly.columns],
             linewidth=0
         )
         ax.legend(fontsize=12, loc="center left", bbox_to_anchor=(1.02, 0.5))
@@ -157,7 +183,7 @@ for td in typical_days:
         ax.text(0.5, 0.5, "No data", ha="center", va="center")
         ax.set_axis_off()
 
-    ax.set_title("Non-renewable Suppliers")
+    ax.set_title(title)
     ax.set_xlabel("Hour")
     ax.set_ylabel("Power [GW]")
     ax.grid(True)
@@ -166,205 +192,148 @@ for td in typical_days:
     if ymax < 1:
         ax.set_ylim(ymin, 1)
 
-    # --------------------------------------------------------------------------
-    # Processor + Storage flows for each END-USE TYPE
-    # --------------------------------------------------------------------------
-    for i, eut in enumerate(end_uses):
 
-        ax_flow = axes[(i + 1) * 2]
-
-        techs = layers[layers["p"] == eut]["pt"].unique()
-        sto_techs = storage_map.loc[
-            storage_map["END_USE_TYPE"] == eut, "STORAGE_TECH"
-        ].tolist()
-
-        e_td = e_vals[e_vals["td"] == td].merge(layers, on="pt", how="left")
-        e_td = e_td[
-            (e_td["p"] == eut)
-            & (e_td["pt"].isin(techs))
-            & (e_td["layers_in_out"] != 0)
-        ]
-        e_td["val"] = e_td["val"] * e_td["layers_in_out"]
-        e_td_form = e_td[["h", "pt", "val"]].rename(columns={"pt": "tech"})
-
-        sto_out = storage_discharge[
-            (storage_discharge["td"] == td)
-            & (storage_discharge["j"].isin(sto_techs))
-        ][["h", "j", "val"]].rename(columns={"j": "tech"})
-
-        sto_in = storage_in[
-            (storage_in["td"] == td)
-            & (storage_in["j"].isin(sto_techs))
-        ][["h", "j", "val"]].rename(columns={"j": "tech"})
-
-        combined = pd.concat([e_td_form, sto_out, sto_in], ignore_index=True)
-
-        if combined.empty:
-            ax_flow.text(0.5, 0.5, f"No supply for {eut}", ha="center", va="center")
-            ax_flow.set_axis_off()
+def plot_processors(ax_flow, ch, sto_techs, eut, tech_to_eut):
+    if ch.empty:
+        ax_flow.text(0.5, 0.5, f"No supply for {eut}", ha="center", va="center")
+        ax_flow.set_axis_off()
+        return
+
+    if eut == "ELECTRICITY":
+        def elec_stack_priority(tech):
+            eut_home = tech_to_eut.get(tech)
+            if tech.endswith("_ELEC") and eut_home != "ELECTRICITY":
+                if eut_home == "HEAT_HIGH_T":
+                    return 1
+                if eut_home == "HEAT_LOW_T_DHN":
+                    return 2
+                if eut_home == "HEAT_LOW_T_DECEN":
+                    return 3
+                return 99
+            return 0  # normal electricity processors stay at the bottom
+        sorted_techs = sorted(ch.columns, key=elec_stack_priority)
+        ch = ch[sorted_techs]
+
+    ax_flow.set_title(f"{eut} – Processors + Storage", color=colors_end_use_type[eut])
+    ax_flow.set_xlabel("Hour")
+    ax_flow.set_ylabel("Power [GW]")
+    ax_flow.grid(True)
+
+    positive = ch.clip(lower=0)
+    negative = ch.clip(upper=0)
+
+    pos_bottom = pd.Series(0.0, index=positive.index)
+    neg_bottom = pd.Series(0.0, index=negative.index)
+
+    handles = []
+
+    for tech in ch.columns:
+        y_pos = positive[tech]
+        y_neg = negative[tech]
+
+        if y_pos.abs().max() < TOL and y_neg.abs().max() < TOL:
             continue
 
-        ch = pivot_results(combined, "tech")
-
-        if eut == "ELECTRICITY":
-            def elec_stack_priority(tech):
-                eut_home = tech_to_eut.get(tech)
-                if tech.endswith("_ELEC") and eut_home != "ELECTRICITY":
-                    if eut_home == "HEAT_HIGH_T":
-                        return 1
-                    if eut_home == "HEAT_LOW_T_DHN":
-                        return 2
-                    if eut_home == "HEAT_LOW_T_DECEN":
-                        return 3
-                    return 99
-                return 0  # normal electricity processors stay at the bottom
-            sorted_techs = sorted(ch.columns, key=elec_stack_priority)
-            ch = ch[sorted_techs]
-
-        ax_flow.set_title(f"{eut} – Processors + Storage", color=colors_end_use_type[eut])
-        ax_flow.set_xlabel("Hour")
-        ax_flow.set_ylabel("Power [GW]")
-        ax_flow.grid(True)
-
-        positive = ch.clip(lower=0)
-        negative = ch.clip(upper=0)
-
-        pos_bottom = pd.Series(0, index=positive.index)
-        neg_bottom = pd.Series(0, index=negative.index)
-
-        handles = []
-
-        for tech in ch.columns:
-            y_pos = positive[tech]
-            y_neg = negative[tech]
-
-            if y_pos.abs().max() < 1e-6 and y_neg.abs().max() < 1e-6:
-                continue
-
-            # --- STORAGE: HATCHED ---
-            if tech in sto_techs:
-                c = colors_storage[eut].get(tech, "gray")
-
-                if (y_pos > 0).any():
-                    ax_flow.fill_between(
-                        y_pos.index,
-                        pos_bottom,
-                        pos_bottom + y_pos,
-                        facecolor="none",
-                        edgecolor=c,
-                        hatch="///",
-                        linewidth=1.0,
-                    )
-                    pos_bottom += y_pos
-
-                if (y_neg < 0).any():
-                    ax_flow.fill_between(
-                        y_neg.index,
-                        neg_bottom,
-                        neg_bottom + y_neg,
-                        facecolor="none",
-                        edgecolor=c,
-                        hatch="///",
-                        linewidth=1.0,
-                    )
-                    neg_bottom += y_neg
-
-                handles.append(
-                    mpatches.Patch(facecolor="none", edgecolor=c, hatch="///", label=tech)
-                )
-                continue
-
-            # --- PROCESSORS: PURE COLOR ---
-            c = get_proc_color(tech, eut)
-
-            if (y_pos > 0).any():
-                ax_flow.fill_between(
-                    y_pos.index,
-                    pos_bottom,
-                    pos_bottom + y_pos,
-                    facecolor=c,
-                    edgecolor=c,
-                    linewidth=0,
-                )
-                pos_bottom += y_pos
-
-            if (y_neg < 0).any():
-                ax_flow.fill_between(
-                    y_neg.index,
-                    neg_bottom,
-                    neg_bottom + y_neg,
-                    facecolor=c,
-                    edgecolor=c,
-                    linewidth=0,
-                )
-                neg_bottom += y_neg
-
+        # --- STORAGE: HATCHED ---
+        if tech in sto_techs:
+            c = colors_storage[eut].get(tech, "gray")
+            style = dict(facecolor="none", edgecolor=c, hatch="///", linewidth=1.0)
+        # --- PROCESSORS: PURE COLOR ---
+        else:
+            c = get_proc_color(tech, eut, tech_to_eut)
+            style = dict(facecolor=c, edgecolor=c, linewidth=0)
+
+        if (y_pos > 0).any():
+            ax_flow.fill_between(y_pos.index, pos_bottom, pos_bottom + y_pos, **style)
+            pos_bottom += y_pos
+
+        if (y_neg < 0).any():
+            ax_flow.fill_between(y_neg.index, neg_bottom, neg_bottom + y_neg, **style)
+            neg_bottom += y_neg
+
+        if tech in sto_techs:
+            handles.append(mpatches.Patch(facecolor="none", edgecolor=c, hatch="///", label=tech))
+        else:
             handles.append(mpatches.Patch(facecolor=c, edgecolor=c, label=tech))
 
-        ax_flow.axhline(0, color="black", linewidth=1.0)
-        ax_flow.legend(handles=handles, fontsize=12, loc="center left", bbox_to_anchor=(1.02, 0.5))
+    ax_flow.axhline(0, color="black", linewidth=1.0)
+    ax_flow.legend(handles=handles, fontsize=12, loc="center left", bbox_to_anchor=(1.02, 0.5))
 
-    # --------------------------------------------------------------------------
-    # DEMAND PANELS
-    # --------------------------------------------------------------------------
-    for i, eut in enumerate(end_uses):
-        ax_c = axes[(i + 1) * 2 + 1]
 
-        d_td = d_vals[(d_vals["td"] == td) & (d_vals["ct"] == eut)]
-        d_diff = d_diff_vals[(d_diff_vals["td"] == td) & (d_diff_vals["ct"] == eut)]
-        d_ref = d_ref_df[(d_ref_df["td"] == td) & (d_ref_df["ct"] == eut)]
+def plot_demand(ax_c, demand, eut):
+    d_sum, d_diff_sum, d_ref_sum = demand["d"], demand["d_diff"], demand["d_ref"]
 
-        d_h = pivot_results(d_td, "ct")
-        d_diff_h = pivot_results(d_diff, "ct")
+    ax_c.fill_between(d_ref_sum.index, 0, d_ref_sum, color="darkgray", alpha=0.4)
+    ax_c.plot(d_ref_sum.index, d_ref_sum, color="black", linewidth=1.2)
+    ax_c.plot(d_sum.index, d_sum, color=colors_end_use_type[eut], linewidth=2)
 
-        d_sum = d_h.sum(axis=1) if not d_h.empty else pd.Series(0, index=range(1, 25))
-        d_diff_sum = d_diff_h.sum(axis=1) if not d_diff_h.empty else pd.Series(0, index=d_sum.index)
-        d_ref_sum = d_ref.groupby("h")["d_ref"].sum().reindex(d_sum.index, fill_value=0)
+    pos = d_diff_sum.clip(lower=0)
+    neg = d_diff_sum.clip(upper=0)
 
-        ax_c.fill_between(d_ref_sum.index, 0, d_ref_sum, color="darkgray", alpha=0.4)
-        ax_c.plot(d_ref_sum.index, d_ref_sum, color="black", linewidth=1.2)
-        ax_c.plot(d_sum.index, d_sum, color=colors_end_use_type[eut], linewidth=2)
+    ax_c.fill_between(d_ref_sum.index, d_ref_sum, d_ref_sum + pos, color="green", alpha=0.3)
+    ax_c.fill_between(d_ref_sum.index, d_ref_sum + neg, d_ref_sum, color="red", alpha=0.3)
 
-        pos = d_diff_sum.clip(lower=0)
-        neg = d_diff_sum.clip(upper=0)
+    ax_c.set_title(f"{eut} – Consumers", color=colors_end_use_type[eut])
+    ax_c.set_xlabel("Hour")
+    ax_c.set_ylabel("Power [GW]")
+    ax_c.grid(True)
 
-        ax_c.fill_between(d_ref_sum.index, d_ref_sum, d_ref_sum + pos, color="green", alpha=0.3)
-        ax_c.fill_between(d_ref_sum.index, d_ref_sum + neg, d_ref_sum, color="red", alpha=0.3)
+    reference_handle = (
+        mpatches.Patch(facecolor="darkgray", alpha=0.4),
+        Line2D([0], [0], color="black", linewidth=1.2),
+    )
 
-        ax_c.set_title(f"{eut} – Consumers", color=colors_end_use_type[eut])
-        ax_c.set_xlabel("Hour")
-        ax_c.set_ylabel("Power [GW]")
-        ax_c.grid(True)
+    legend_handles = [
+        reference_handle,
+        Line2D([0], [0], color=colors_end_use_type[eut], linewidth=2),
+        mpatches.Patch(color="green", alpha=0.3),
+        mpatches.Patch(color="red", alpha=0.3),
+    ]
+
+    legend_labels = [
+        "Reference demand",
+        "Actual demand",
+        "Demand increase",
+        "Demand decrease",
+    ]
+
+    ax_c.legend(
+        handles=legend_handles,
+        labels=legend_labels,
+        fontsize=12,
+        loc="center left",
+        bbox_to_anchor=(1.02, 0.5),
+        frameon=True,
+        framealpha=0.9,
+    )
 
-        reference_handle = (
-            mpatches.Patch(facecolor="darkgray", alpha=0.4),
-            Line2D([0], [0], color="black", linewidth=1.2),
-        )
 
-        legend_handles = [
-            reference_handle,
-            Line2D([0], [0], color=colors_end_use_type[eut], linewidth=2),
-            mpatches.Patch(color="green", alpha=0.3),
-            mpatches.Patch(color="red", alpha=0.3),
-        ]
-
-        legend_labels = [
-            "Reference demand",
-            "Actual demand",
-            "Demand increase",
-            "Demand decrease",
-        ]
-
-        ax_c.legend(
-            handles=legend_handles,
-            labels=legend_labels,
-            fontsize=12,
-            loc="center left",
-            bbox_to_anchor=(1.02, 0.5),
-            frameon=True,
-            framealpha=0.9,
-        )
+def render_day(panels):
+    fig, axes = plt.subplots(5, 2, figsize=(18, 18))
+    axes = axes.flatten()
+
+    # Supplier flows: renewables (LEFT), non-renewables (RIGHT)
+    plot_suppliers(axes[0], panels["ren"], colors_ren, "Renewable Suppliers")
+    plot_suppliers(axes[1], panels["nonren"], colors_nonren, "Non-renewable Suppliers")
+
+    # Processor + storage flows and demand for each END-USE TYPE
+    for i, eut in enumerate(end_uses):
+        plot_processors(axes[(i + 1) * 2], panels["processors"][eut], panels["storages"][eut], eut, panels["tech_to_eut"])
+        plot_demand(axes[(i + 1) * 2 + 1], panels["demand"][eut], eut)
 
     plt.tight_layout(rect=[0, 0, 1, 0.97])
-    plt.savefig(os.path.join(output_dir, f"Flow_TD{td}.pdf"), dpi=300, bbox_inches="tight")
+    save_path = os.path.join(output_dir, f"Flow_TD{panels['td']}.pdf")
+    plt.savefig(save_path, dpi=300, bbox_inches="tight")
     plt.close(fig)
+    return save_path
+
+# ------------------------------------------------------------------------------
+# MAIN
+# ------------------------------------------------------------------------------
+if __name__ == "__main__":
+    flows = load_flows()
+    days = [day_panels(flows, i) for i in range(len(flows["typical_days"]))]
+
+    with ProcessPoolExecutor() as pool:
+        for save_path in pool.map(render_day, days):
+            print("Saved:", save_path)
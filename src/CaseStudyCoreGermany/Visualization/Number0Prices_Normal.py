@@ -1,8 +1,12 @@
 import os
 import json
-import pandas as pd
+import sys
+import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Prices import load_price_cube
+
 # ============================================================
 # GLOBAL STYLE — MATCHES SOLVE-TIME PLOT
 # ============================================================
@@ -67,20 +71,20 @@ fronts_normal = load_pareto_jsons(pareto_normal)
 # LOAD & COUNT ZERO-PRICE HOURS
 # ============================================================
 def load_price_file(path):
-    if not os.path.exists(path):
+    try:
+        price = load_price_cube(path)
+    except FileNotFoundError:
         return None
-    df = pd.read_csv(path)
-    df = df[df["p"] == "ELECTRICITY"].copy()
-    if df.empty:
+    if "ELECTRICITY" not in price.layers:
         return None
-    df["hours_rep"] = df["mult"] * df["t_op"]
-    return df
+    return price
 
 def count_zero_price_hours(path, tol=1e-5):
-    df = load_price_file(path)
-    if df is None:
+    price = load_price_file(path)
+    if price is None:
         return None
-    return df.loc[df["price_€_per_MWh"].abs() < tol, "hours_rep"].sum()
+    elec = price.layer("ELECTRICITY")
+    return price.annual_hours(np.abs(elec) < tol)
 
 def folder_from_point(tag, point):
     eps = point.get("epsilon", None)
@@ -104,8 +108,8 @@ for tag, pts in fronts_normal.items():
         if folder is None:
             continue
 
-        price_csv = os.path.join(data_normal, folder, "price.csv")
-        z = count_zero_price_hours(price_csv)
+        run_dir = os.path.join(data_normal, folder)
+        z = count_zero_price_hours(run_dir)
         if z is None:
             continue
 
@@ -1,7 +1,10 @@
 import os
 import json
+import sys
 import matplotlib.pyplot as plt
-import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Prices import load_price_cube
 
 # ============================================================
 # GLOBAL STYLE — MATCHES ZERO-PRICE & SOLVE-TIME PLOTS
@@ -67,22 +70,24 @@ fronts_low = load_pareto_jsons(pareto_low)
 # PRICE FILE HELPERS
 # ============================================================
 def load_price_file(path):
-    if not os.path.exists(path):
+    try:
+        price = load_price_cube(path)
+    except FileNotFoundError:
         return None
-    df = pd.read_csv(path)
-    df = df[df["p"] == "ELECTRICITY"].copy()
-    if df.empty:
+    if "ELECTRICITY" not in price.layers:
         return None
-    df["hours_rep"] = df["mult"] * df["t_op"]
-    return df
+    return price
 
 def count_peak_price_hours(path, threshold=400.0):
-    df = load_price_file(path)
-    if df is None:
+    price = load_price_file(path)
+    if price is None:
         return None
-    return df.loc[df["price_€_per_MWh"] > threshold, "hours_rep"].sum()
+    elec = price.layer("ELECTRICITY")
+    return price.annual_hours(elec > threshold)
 
 def folder_from_point(tag, point):
+    if point.get("carbon_price_eur_per_t") is not None:
+        return f"{tag}_co2_{point['carbon_price_eur_per_t']:.2f}"
     eps = point.get("epsilon")
     if eps is None:
         return None
@@ -108,8 +113,8 @@ for tag, pts in fronts_low.items():
         if folder is None:
             continue
 
-        price_csv = os.path.join(data_low, folder, "price.csv")
-        hours = count_peak_price_hours(price_csv)
+        run_dir = os.path.join(data_low, folder)
+        hours = count_peak_price_hours(run_dir)
         if hours is None:
             continue
 
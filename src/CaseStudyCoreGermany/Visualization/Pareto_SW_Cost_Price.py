@@ -1,7 +1,10 @@
 import os
 import json
+import sys
 import matplotlib.pyplot as plt
-import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Prices import load_price_cube
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -42,27 +45,24 @@ def load_jsons(pareto_dir):
 # CALCULATE AVERAGE PRICE
 # ============================================================
 def compute_avg_price(folder_path):
-    price_file = os.path.join(folder_path, "price.csv")
-    if not os.path.exists(price_file):
+    try:
+        price = load_price_cube(folder_path)
+    except FileNotFoundError:
         return None
-    
-    df = pd.read_csv(price_file)
-    df = df[df["p"] == "ELECTRICITY"]
-    if df.empty:
+
+    if "ELECTRICITY" not in price.layers:
         return None
 
-    df["price_€_per_MWh"] = df["price_M€_per_GWh"] * 1e3
-    df["weight"] = df["mult"] * df["t_op"]
-    
-    avg_price = (df["price_€_per_MWh"] * df["weight"]).sum() / df["weight"].sum()
-    return float(avg_price)
+    return price.annual_average("ELECTRICITY")
 
 # ============================================================
 # FOLDER NAMING EXACTLY LIKE ORIGINAL SCRIPT
 # ============================================================
 def folder_from_point(pt):
     eps_tag = pt["elasticity_tag"]
-    
+
+    if pt.get("carbon_price_eur_per_t") is not None:
+        return f"{eps_tag}_co2_{pt['carbon_price_eur_per_t']:.2f}"
     if pt["epsilon"] is None:
         eps_string = "NONE"
     else:
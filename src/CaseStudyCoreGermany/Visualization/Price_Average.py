@@ -2,18 +2,21 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.ticker import FuncFormatter
 import os
+import sys
 from Colors import colors_end_use_type
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Prices import load_price_cube
+
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(script_dir)
 data_dir = os.path.join(project_root, r"DataNormalPrice\elast_5pct_eps_0.00")
 figures_dir = os.path.join(project_root, "Results", "Figures", "Price")
 os.makedirs(figures_dir, exist_ok=True)
 
-price = pd.read_csv(os.path.join(data_dir, "price.csv"))
-price["price_€_per_MWh"] = price["price_M€_per_GWh"] * 1e3
+price = load_price_cube(data_dir)
 
-node_ref = price["n"].unique()[0]
+node_ref = price.nodes[0]
 end_uses_types = pd.read_csv(os.path.join(data_dir, "end_uses_types.csv"))["END_USES_TYPES"].tolist()
 
 # -------------------------------------------------------------
@@ -28,27 +31,21 @@ plt.figure(figsize=(10, 6))
 ymax = 0
 
 for eut in end_uses_types:
-    df_eut = price[(price["p"] == eut) & (price["n"] == node_ref)].copy()
-    if df_eut.empty:
+    if eut not in price.layers:
         continue
 
-    df_eut["weighted_price"] = df_eut["price_€_per_MWh"] * df_eut["mult"]
-    price_avg = (
-        df_eut.groupby("h")
-        .apply(lambda g: g["weighted_price"].sum() / g["mult"].sum(), include_groups=False)
-        .reset_index(name="price_€_per_MWh")
-    )
+    price_avg = price.hourly_average(eut, node_ref)
 
     plt.plot(
-        price_avg["h"],
-        price_avg["price_€_per_MWh"],
+        price.hours,
+        price_avg,
         marker="o",
         linewidth=2,
         color=colors_end_use_type.get(eut, "gray"),
         label=eut
     )
 
-    ymax = max(ymax, price_avg["price_€_per_MWh"].max())
+    ymax = max(ymax, price_avg.max())
 
 plt.title(f"Average Hourly Price by End-Use (Node {node_ref}, Averaged Over Typical Days)", fontsize=13)
 plt.xlabel("Hour")
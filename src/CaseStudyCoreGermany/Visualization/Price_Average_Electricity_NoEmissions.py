@@ -1,9 +1,12 @@
 import os
-import pandas as pd
+import sys
 import matplotlib.pyplot as plt
 from matplotlib.ticker import FuncFormatter
 from Colors import colors_elasticity
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Prices import PRICE_CUBE_FILE, load_price_cube
+
 # =====================================================
 # Global Style (MATCHES Pareto plots)
 # =====================================================
@@ -54,42 +57,31 @@ ymax = 0
 for tag, folder in cases.items():
 
     data_dir = os.path.join(data_root, folder)
-    price_path = os.path.join(data_dir, "price.csv")
 
-    if not os.path.exists(price_path):
-        print(f"[WARNING] Missing price.csv for {tag}: {price_path}")
+    try:
+        price = load_price_cube(data_dir)
+    except FileNotFoundError:
+        print(f"[WARNING] Missing {PRICE_CUBE_FILE} for {tag}: {data_dir}")
         continue
 
-    df = pd.read_csv(price_path)
-    df["price_€_per_MWh"] = df["price_M€_per_GWh"] * 1000
-
-    # Detect node
-    node_ref = df["n"].unique()[0]
-
     # Electricity-only
-    df_elec = df[(df["p"] == "ELECTRICITY") & (df["n"] == node_ref)].copy()
-    if df_elec.empty:
+    if "ELECTRICITY" not in price.layers:
         continue
 
-    # Weighted hourly average
-    df_elec["weighted"] = df_elec["price_€_per_MWh"] * df_elec["mult"]
-    price_avg = (
-        df_elec.groupby("h")
-        .apply(lambda g: g["weighted"].sum() / g["mult"].sum(), include_groups=False)
-        .reset_index(name="price_€_per_MWh")
-    )
+    # Weighted hourly average (first node)
+    price_avg = price.hourly_average("ELECTRICITY")
 
     # Plot
     plt.plot(
-        price_avg["h"],
-        price_avg["price_€_per_MWh"],
+        price.hours,
+        price_avg,
         linewidth=2,
         marker="o",
         label=legend_names.get(tag, tag),          # <<< SAME legend style
         color=colors_elasticity.get(tag, "gray")   # <<< SAME color map
     )
 
-    ymax = max(ymax, price_avg["price_€_per_MWh"].max())
+    ymax = max(ymax, price_avg.max())
 
 # =====================================================
 # Formatting
@@ -1,9 +1,14 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.ticker import FuncFormatter
 import os
+import sys
 from Colors import colors_end_use_type
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Prices import load_price_cube, price_tolerance
+
 # -------------------------------------------------------------
 # Paths
 # -------------------------------------------------------------
@@ -16,13 +21,17 @@ os.makedirs(figures_dir, exist_ok=True)
 # -------------------------------------------------------------
 # Load data
 # -------------------------------------------------------------
-price = pd.read_csv(os.path.join(data_dir, "price.csv"))
-price["price_€_per_MWh"] = price["price_M€_per_GWh"] * 1e3
-EPS = 1e-6
-price["price_€_per_MWh"] = price["price_€_per_MWh"].mask(price["price_€_per_MWh"].abs() < EPS, 0)
+# Runs solved with --method barrier --no-crossover carry interior-point duals,
+# which need a looser numerical zero (see Prices.price_error for the deviation)
+price = load_price_cube(data_dir)
+EPS = price_tolerance(data_dir)
+
 
+def clip_zero(values):
+    return np.where(np.abs(values) < EPS, 0, values)
 
-node_ref = price["n"].unique()[0]
+
+node_ref = price.nodes[0]
 
 # Load end-use list
 end_uses_types = pd.read_csv(os.path.join(data_dir, "end_uses_types.csv"))["END_USES_TYPES"].tolist()
@@ -46,29 +55,21 @@ plt.figure(figsize=(10, 6))
 ymax = 0
 
 for eut in end_uses_types:
-    df_eut = price[(price["p"] == eut) & (price["n"] == node_ref)].copy()
-    if df_eut.empty:
+    if eut not in price.layers:
         continue
 
-    df_eut["weighted_price"] = df_eut["price_€_per_MWh"] * df_eut["mult"]
-
-    price_avg = (
-        df_eut.groupby("h")
-        .apply(lambda g: g["weighted_price"].sum() / g["mult"].sum(), include_groups=False)
-        .reset_index(name="price_€_per_MWh")
-    )
-    price_avg["price_€_per_MWh"] = price_avg["price_€_per_MWh"].mask(price_avg["price_€_per_MWh"].abs() < EPS, 0)
+    price_avg = clip_zero(price.hourly_average(eut, node_ref))
 
     plt.plot(
-        price_avg["h"],
-        price_avg["price_€_per_MWh"],
+        price.hours,
+        price_avg,
         marker="o",
         linewidth=2,
         color=colors_end_use_type.get(eut, "gray"),
         label=eut
     )
 
-    ymax = max(ymax, price_avg["price_€_per_MWh"].max())
+    ymax = max(ymax, price_avg.max())
 
 plt.title(f"Average Hourly Electricity Price (Node {node_ref})", fontsize=13)
 plt.xlabel("Hour")
@@ -90,22 +91,17 @@ print("Saved:", save_path)
 # -------------------------------------------------------------
 # 2. Price per Typical Day (TD) for Electricity
 # -------------------------------------------------------------
-for td in sorted(price["td"].unique()):
+for i_td, td in enumerate(price.typical_days):
     plt.figure(figsize=(10, 6))
+    ymax = 0
 
     for eut in end_uses_types:
-        df_eut_td = price[
-            (price["p"] == eut) &
-            (price["n"] == node_ref) &
-            (price["td"] == td)
-        ].copy()
-
-        df_eut_td["price_€_per_MWh"] = df_eut_td["price_€_per_MWh"].mask(df_eut_td["price_€_per_MWh"].abs() < EPS, 0)
-
-        if not df_eut_td.empty:
+        if eut in price.layers:
+            price_td = clip_zero(price.layer(eut, node_ref)[:, i_td])
+            ymax = max(ymax, price_td.max())
             plt.plot(
-                df_eut_td["h"],
-                df_eut_td["price_€_per_MWh"],
+                price.hours,
+                price_td,
                 marker="o",
                 linewidth=2,
                 color=colors_end_use_type.get(eut, "gray"),
@@ -117,12 +113,6 @@ for td in sorted(price["td"].unique()):
     plt.ylabel("Price [€/MWh]")
     plt.gca().yaxis.set_major_formatter(FuncFormatter(lambda x, _: f"{x:.2f}"))
 
-    price_filtered = price[
-        (price["n"] == node_ref) &
-        (price["td"] == td) &
-        (price["p"].isin(end_uses_types))
-    ]
-    ymax = price_filtered["price_€_per_MWh"].max()
     if ymax == 0 or pd.isna(ymax):
         ymax = 1  # fallback to 1 €/MWh
     plt.ylim(0, ymax * 1.05)
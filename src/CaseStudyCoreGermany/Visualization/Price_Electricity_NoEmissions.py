@@ -1,9 +1,13 @@
-import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.ticker import FuncFormatter
 import os
+import sys
 from Colors import colors_elasticity   # uses your elasticity color map
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Prices import PRICE_CUBE_FILE, load_price_cube
+
 plt.rcParams.update({
     "text.usetex": False,
     "font.family": "sans-serif",
@@ -44,56 +48,44 @@ os.makedirs(figures_dir, exist_ok=True)
 
 # Load a sample file to identify typical days and node
 sample_case = list(cases.values())[0]
-sample_price_path = os.path.join(base_dir, sample_case, "price.csv")
-sample_price = pd.read_csv(sample_price_path)
+sample_price = load_price_cube(os.path.join(base_dir, sample_case))
+
+typical_days = sample_price.typical_days
+node_ref = sample_price.nodes[0]
 
-typical_days = sorted(sample_price["td"].unique())
-node_ref = sample_price["n"].unique()[0]
+prices = {}
+for label, folder in cases.items():
+    try:
+        prices[label] = load_price_cube(os.path.join(base_dir, folder))
+    except FileNotFoundError:
+        print(f"[WARNING] Missing {PRICE_CUBE_FILE} for {label}: {os.path.join(base_dir, folder)}")
 
-for td in typical_days:
+for i_td, td in enumerate(typical_days):
 
     plt.figure(figsize=(10, 6))
     ymax = 0
 
-    for label, folder in cases.items():
-
-        data_dir = os.path.join(base_dir, folder)
-        price_path = os.path.join(data_dir, "price.csv")
-
-        if not os.path.exists(price_path):
-            print(f"[WARNING] Missing price.csv for {label}: {price_path}")
-            continue
-
-        # Load price data
-        price = pd.read_csv(price_path)
-        price["price_€_per_MWh"] = price["price_M€_per_GWh"] * 1e3
+    for label, price in prices.items():
 
         # Keep only electricity
-        df_elec_td = price[
-            (price["p"] == "ELECTRICITY") &
-            (price["n"] == node_ref) &
-            (price["td"] == td)
-        ].copy()
-
-        if df_elec_td.empty:
+        if "ELECTRICITY" not in price.layers:
             continue
 
         EPS = 1e-6
-        df_elec_td["price_€_per_MWh"] = df_elec_td["price_€_per_MWh"].mask(
-            df_elec_td["price_€_per_MWh"].abs() < EPS, 0
-        )
+        price_td = price.layer("ELECTRICITY", node_ref)[:, i_td]
+        price_td = np.where(np.abs(price_td) < EPS, 0, price_td)
 
         # Plot
         plt.plot(
-            df_elec_td["h"],
-            df_elec_td["price_€_per_MWh"],
+            price.hours,
+            price_td,
             linewidth=2,
             marker="o",
             label=legend_names.get(label, label),  # <<< clean legend
             color=colors_elasticity.get(label, "gray")
         )
 
-        ymax = max(ymax, df_elec_td["price_€_per_MWh"].max())
+        ymax = max(ymax, price_td.max())
 
     # Formatting
     plt.xlabel("Hour")
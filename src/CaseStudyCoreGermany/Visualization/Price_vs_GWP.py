@@ -1,9 +1,12 @@
 import os
 import json
-import pandas as pd
+import sys
 import matplotlib.pyplot as plt
 from Colors import colors_elasticity
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Sweep import open_sweep
+
 # -----------------------------------------------
 # Global style
 # -----------------------------------------------
@@ -60,27 +63,20 @@ def load_pareto_jsons(folder):
     return result
 
 # -----------------------------------------------
-# Compute weighted annual average electricity price
+# Weighted annual average electricity price of every run, one read per sweep
 # -----------------------------------------------
-def compute_avg_price(folder_path):
-    file = os.path.join(folder_path, "price.csv")
-    if not os.path.exists(file):
-        return None
-
-    df = pd.read_csv(file)
-    df = df[df["p"] == "ELECTRICITY"]
-    if df.empty:
-        return None
-
-    df["price"] = df["price_M€_per_GWh"] * 1000
-    df["weight"] = df["mult"] * df["t_op"]
-
-    return float((df["price"] * df["weight"]).sum() / df["weight"].sum())
+def load_avg_prices(data_root):
+    sweep = open_sweep(data_root)
+    if "ELECTRICITY" not in sweep.coords("price")["l"]:
+        return {}
+    return dict(zip(sweep.runs["path"], sweep.annual_average("ELECTRICITY")))
 
 # -----------------------------------------------
 # Construct subfolder name from Pareto point
 # -----------------------------------------------
 def folder_from_point(pt):
+    if pt.get("carbon_price_eur_per_t") is not None:
+        return f"{pt['elasticity_tag']}_co2_{pt['carbon_price_eur_per_t']:.2f}"
     eps = "NONE" if pt["epsilon"] is None else f"{pt['epsilon']:.2f}"
     return f"{pt['elasticity_tag']}_eps_{eps}"
 
@@ -96,13 +92,14 @@ def make_price_plot(pareto_dict, data_root, output_file):
 
     plot_data = {}
     all_prices = []
+    avg_prices = load_avg_prices(data_root)
 
     # Collect price curves
     for tag, pts in pareto_dict.items():
         values = []
         for pt in pts:
             folder = folder_from_point(pt)
-            avg_price = compute_avg_price(os.path.join(data_root, folder))
+            avg_price = avg_prices.get(folder)
             if avg_price is not None:
                 values.append((pt["TotalGWP"], avg_price))
                 all_prices.append(avg_price)
@@ -1,4 +1,5 @@
 import os
+import sys
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -6,6 +7,9 @@ from matplotlib.lines import Line2D
 from matplotlib.patches import Patch
 from Colors import colors_end_use_type
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Prices import load_price_cube
+
 # ---------------------------------------------------------
 # Matplotlib configuration
 # ---------------------------------------------------------
@@ -81,7 +85,7 @@ b_df     = read_param_csv("b.csv",    "b.val",    data_dir)
 D_df     = read_param_csv("D.csv",    "D.val",    data_dir)
 p_pw_df  = read_param_csv("p_pw.csv", "p_pw.val", data_dir)
 
-price_df = pd.read_csv(os.path.join(data_dir, "price.csv"))
+price_cube = load_price_cube(data_dir)
 d_vals   = pd.read_csv(os.path.join(data_dir, "d_vals.csv"))
 
 p_pw_df["p_pw"] *= 1000.0
@@ -106,13 +110,7 @@ ct = TARGET_CT
 # ---------------------------------------------------------
 
 def get_price(ct, n, h, td):
-    match = price_df[
-        (price_df["p"]  == ct) &
-        (price_df["n"]  == n)  &
-        (price_df["h"]  == h)  &
-        (price_df["td"] == td)
-    ]
-    return match["price_€_per_MWh"].values[0]
+    return price_cube.at(ct, n, h, td)
 
 
 def get_demand_curve(ct, n, h, td):
@@ -1,7 +1,10 @@
 import os
+import sys
 import json
 import matplotlib.pyplot as plt
-import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from RunCatalog import RunCatalog
 
 plt.rcParams.update({
     "text.usetex": False,
@@ -16,7 +19,7 @@ plt.rcParams.update({
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
 pareto_normal = os.path.join(script_dir, "..", "ResultsNormalPrice", "Figures", "Pareto")
-csv_root      = os.path.join(script_dir, "..", "DataNormalPrice", "EnergyScope")
+catalog       = RunCatalog(os.path.join(script_dir, ".."))
 
 elasticity_files = {
     "elast_10pct":  "pareto_SW_vs_GWP_elast_10pct.json",
@@ -62,32 +65,12 @@ def load_pareto_jsons(folder):
 fronts_normal = load_pareto_jsons(pareto_normal)
 
 # ============================================================
-# LOAD CSV SOLVE-TIME SUMMARY (GWP read from CSV, not filename)
+# LOAD ENERGYSCOPE SOLVE-TIME SUMMARY (GWP read from CSV, not filename)
 # ============================================================
-csv_points = []
-
-for fname in os.listdir(csv_root):
-    if not fname.startswith("run_results_") or not fname.endswith(".csv"):
-        continue
-
-    full_path = os.path.join(csv_root, fname)
-    df = pd.read_csv(full_path)
-
-    # extract GWP directly from the CSV content
-    gwp_val = float(df["TotalGWP"].iloc[0])
-
-    # extract solve time (prefer gurobi_solve_time unless NaN)
-    solve_time = df["gurobi_solve_time"].iloc[0]
-    if pd.isna(solve_time):
-        solve_time = df["python_wall_clock_time"].iloc[0]
-
-    csv_points.append({
-        "gwp": gwp_val,
-        "solve_time": solve_time,
-    })
-
-# Sort CSV points by increasing GWP
-csv_points = sorted(csv_points, key=lambda x: x["gwp"])
+csv_points = [
+    {"gwp": r["TotalGWP"], "solve_time": r["solve_time"]}
+    for r in catalog.query(kind="energyscope", scenario="NormalPrice", order_by="TotalGWP")
+]
 
 # ============================================================
 # PLOT: SOLVE TIME VS GWP
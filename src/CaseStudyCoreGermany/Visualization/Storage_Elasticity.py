@@ -1,9 +1,14 @@
 import os
+import sys
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.ticker import ScalarFormatter
 from Colors import colors_elasticity   # uses keys: demand_fixed, elast_2_5pct, elast_5pct, elast_10pct
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Chronology import annual_storage_level, load_chronology
+
 plt.rcParams.update({
     "text.usetex": False,
     "font.family": "sans-serif",
@@ -56,9 +61,11 @@ tech_set = pd.read_csv(os.path.join(sample_dir, "storage_tech.csv"))["STORAGE_TE
 daily_set = pd.read_csv(os.path.join(sample_dir, "storage_daily.csv"))["STORAGE_DAILY"].tolist()
 
 storage_map = pd.read_csv(os.path.join(sample_dir, "storage_of_end_use.csv"))
-storage_to_enduse = {r["STORAGE_TECH"]: r["END_USE_TYPE"] for _, r in storage_map.iterrows()}
+storage_to_enduse = dict(zip(storage_map["STORAGE_TECH"], storage_map["END_USE_TYPE"]))
 
-mapping_df = pd.read_csv(os.path.join(sample_dir, "t_h_td_mapping.csv"))
+chronology = load_chronology(sample_dir)
+first_period = chronology.representative_periods()
+hours = np.arange(1, first_period.shape[0] + 1)
 
 SEASONAL_THRESHOLD = 1e-3
 DAILY_THRESHOLD = 1e-3
@@ -67,26 +74,12 @@ DAILY_THRESHOLD = 1e-3
 # Helper loader
 # =====================================================
 def load_storage(folder):
-    """Load and merge seasonal + daily storage levels."""
-    ddir = os.path.join(base_dir, folder)
-
-    seasonal_df = pd.read_csv(os.path.join(ddir, "storage_level_seasonal.csv"))
-    daily_df = pd.read_csv(os.path.join(ddir, "storage_level_daily.csv"))
-
-    daily_m = daily_df.merge(mapping_df, on=["h", "td"])
-    daily_final = daily_m[["j", "n", "t", "val"]]
-
-    comb = seasonal_df.merge(
-        daily_final, on=["j", "n", "t"], how="left", suffixes=("_s", "_d")
-    )
+    """Chronological storage levels [j, t] (summed over nodes), daily storage taken from the daily levels."""
+    level, coords = annual_storage_level(os.path.join(base_dir, folder), chronology)
+    return {j: series for j, series in zip(coords["j"], level.sum(axis=1))}
 
-    comb["val"] = comb.apply(
-        lambda r: r["val_d"] if (r["j"] in daily_set and pd.notna(r["val_d"]))
-        else r["val_s"],
-        axis=1
-    )
-
-    return comb.merge(mapping_df, on="t")
+levels = {key: load_storage(folder) for key, folder in cases.items()}
+periods = chronology.periods
 
 # =====================================================
 # SEASONAL PLOTS
@@ -102,26 +95,23 @@ for j in sorted(tech_set):
 
     for key, folder in cases.items():
 
-        comb = load_storage(folder)
-        dfj = comb[comb["j"] == j]
-
-        df_season = dfj.groupby("t")["val"].sum().reset_index()
+        series = levels[key][j]
 
-        if df_season["val"].abs().max() < SEASONAL_THRESHOLD:
+        if np.abs(series).max() < SEASONAL_THRESHOLD:
             continue
 
-        df_season["val"] = df_season["val"].mask(df_season["val"].abs() < SEASONAL_THRESHOLD, 0)
+        series = np.where(np.abs(series) < SEASONAL_THRESHOLD, 0, series)
 
         plt.plot(
-            df_season["t"],
-            df_season["val"],
+            periods,
+            series,
             linewidth=2,
             label=legend_names[key],
             color=colors_elasticity[key]
         )
 
         anything_plotted = True
-        ymax = max(ymax, df_season["val"].max())
+        ymax = max(ymax, series.max())
 
     if not anything_plotted:
         plt.close()
@@ -154,17 +144,14 @@ for j in sorted(tech_set):
     active_days = set()
     case_data = {}
 
-    for key, folder in cases.items():
-
-        comb = load_storage(folder)
-        dfj = comb[comb["j"] == j]
+    for key in cases:
 
-        df_daily = dfj.groupby(["td", "h"])["val"].sum().reset_index()
-        df_daily["val"] = df_daily["val"].mask(df_daily["val"].abs() < DAILY_THRESHOLD, 0)
+        profile = levels[key][j][first_period]  # [h, td]
+        profile = np.where(np.abs(profile) < DAILY_THRESHOLD, 0, profile)
 
-        case_data[key] = df_daily
+        case_data[key] = profile
 
-        active_days |= set(df_daily[df_daily["val"] > 0]["td"].unique().tolist())
+        active_days |= set((np.flatnonzero((profile > 0).any(axis=0)) + 1).tolist())
 
     active_days = sorted(active_days)
     if not active_days:
@@ -180,17 +167,15 @@ for j in sorted(tech_set):
     for ax, td_val in zip(axes, active_days):
         ymax = 0
 
-        for key, df_daily in case_data.items():
+        for key, profile in case_data.items():
 
-            dfd = df_daily[df_daily["td"] == td_val]
-            if dfd.empty:
-                continue
+            day = profile[:, td_val - 1]
 
-            ymax = max(ymax, dfd["val"].max())
+            ymax = max(ymax, day.max())
 
             ax.plot(
-                dfd["h"],
-                dfd["val"],
+                hours,
+                day,
                 linewidth=2,
                 label=legend_names[key],
                 color=colors_elasticity[key]
@@ -1,7 +1,10 @@
 import os
-import pandas as pd
+import sys
 import matplotlib.pyplot as plt
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Summary import load_summary
+
 # ============================================================
 # GLOBAL STYLE — MATCHES OTHER FIGURES
 # ============================================================
@@ -34,11 +37,11 @@ NON_RENEWABLES = ALL_RESOURCES - RENEWABLES
 # ============================================================
 # PROCESS SCENARIOS
 # ============================================================
-def compute_shares(path):
-    df = pd.read_csv(path)
-    totals = df.groupby("st")["val"].sum()
+def compute_shares(run_dir):
+    # annual supply, weighted with w * t_op
+    totals = load_summary(run_dir)["supply"]
 
-    renewable_supply = sum(totals.get(r, 0) for r in RENEWABLES)
+    renewable_supply = totals[totals.index.isin(RENEWABLES)].sum()
     nonrenewable_supply = totals.sum() - renewable_supply
     return renewable_supply, nonrenewable_supply
 
@@ -46,8 +49,7 @@ def compute_shares(path):
 # Collect data
 results = {}
 for label, folder in SCENARIOS.items():
-    file_path = os.path.join(BASE, folder, "s_vals.csv")
-    r, nr = compute_shares(file_path)
+    r, nr = compute_shares(os.path.join(BASE, folder))
     results[label] = (r, nr)
 
 